@@ -1,54 +1,48 @@
 from __future__ import annotations
 
-SELECTION_SET_VERSION = "default-v1"
-
 SHORT_LINK_SELECTION_SET = "shortLink"
 
-PRODUCT_OFFER_V2_SELECTION_SET = """
-nodes{
-itemId
-commissionRate
-sellerCommissionRate
-shopeeCommissionRate
-commission
-sales
-priceMax
-priceMin
-productCatIds
-ratingStar
-priceDiscountRate
-imageUrl
-productName
-shopId
-shopName
-shopType
-productLink
-offerLink
-periodStartTime
-periodEndTime
-}
-pageInfo{
-limit
-hasNextPage
-scrollId
-}
-""".strip()
+# Node fields that callers may request through `fields`; the order is the canonical
+# order used in selection sets and cache keys.
+PRODUCT_OFFER_V2_NODE_FIELDS = (
+    "itemId",
+    "commissionRate",
+    "sellerCommissionRate",
+    "shopeeCommissionRate",
+    "commission",
+    "sales",
+    "priceMax",
+    "priceMin",
+    "productCatIds",
+    "ratingStar",
+    "priceDiscountRate",
+    "imageUrl",
+    "productName",
+    "shopId",
+    "shopName",
+    "shopType",
+    "productLink",
+    "offerLink",
+    "periodStartTime",
+    "periodEndTime",
+)
 
-SHOP_OFFER_V2_SELECTION_SET = """
-nodes{
-commissionRate
-imageUrl
-offerLink
-originalLink
-shopId
-shopName
-ratingStar
-shopType
-remainingBudget
-periodStartTime
-periodEndTime
-sellerCommCoveRatio
-}
+SHOP_OFFER_V2_NODE_FIELDS = (
+    "commissionRate",
+    "imageUrl",
+    "offerLink",
+    "originalLink",
+    "shopId",
+    "shopName",
+    "ratingStar",
+    "shopType",
+    "remainingBudget",
+    "periodStartTime",
+    "periodEndTime",
+    "sellerCommCoveRatio",
+)
+
+PAGE_INFO_SELECTION_SET = """
 pageInfo{
 limit
 hasNextPage
@@ -56,3 +50,8 @@ scrollId
 }
 """.strip()
 
+PRODUCT_OFFER_V2_SELECTION_SET = (
+    "nodes{\n" + "\n".join(PRODUCT_OFFER_V2_NODE_FIELDS) + "\n}\n" + PAGE_INFO_SELECTION_SET
+)
+
+SHOP_OFFER_V2_SELECTION_SET = "nodes{\n" + "\n".join(SHOP_OFFER_V2_NODE_FIELDS) + "\n}\n" + PAGE_INFO_SELECTION_SET
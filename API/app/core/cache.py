@@ -1,37 +1,187 @@
 from __future__ import annotations
 
-import copy
 import json
+import math
+import random
 import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
 from typing import Any
 
-from cachetools import TTLCache
+from pydantic import BaseModel
 
 from app.core.config import get_settings
+from app.core.metrics import get_metrics
+from app.core.timing import stage
 
 
 def _normalized_json(value: Any) -> str:
     return json.dumps(value, separators=(",", ":"), sort_keys=True, ensure_ascii=False)
 
 
+@dataclass(frozen=True)
+class CacheEntry:
+    value: Any
+    stale: bool = False
+    refresh: bool = False
+
+
+@dataclass(frozen=True)
+class _StoredValue:
+    value: Any
+    fresh_until: float
+    expires_at: float
+    # Kept (but only served by `lookup_if_error`) until this point.
+    retain_until: float
+    compute_seconds: float
+    size: int
+
+
+# Rough per-entry bookkeeping cost (dict slots, key object, wrapper) on top of the payload.
+_ENTRY_OVERHEAD_BYTES = 256
+
+
+def _approximate_size(key: str, value: Any) -> int:
+    encoded = getattr(value, "json", None)
+    if isinstance(encoded, bytes):
+        payload_size = len(encoded)
+    elif isinstance(value, bytes):
+        payload_size = len(value)
+    elif isinstance(value, BaseModel):
+        payload_size = len(value.model_dump_json())
+    else:
+        payload_size = len(_normalized_json(value).encode("utf-8"))
+    return payload_size + len(key) + _ENTRY_OVERHEAD_BYTES
+
+
 class _TTLStore:
-    def __init__(self, maxsize: int, ttl_seconds: int) -> None:
-        self._cache: TTLCache[str, Any] = TTLCache(maxsize=maxsize, ttl=ttl_seconds)
+    """LRU + TTL store bounded by an entry count and an approximate byte budget.
+
+    Entries are fresh for `ttl_seconds`, then served as stale for another
+    `stale_ttl_seconds` before being dropped. With `early_refresh_beta > 0`, fresh
+    entries are flagged for refresh ahead of expiry (XFetch), weighted by how long
+    the value took to compute, so hot keys do not all expire at once. Expired
+    entries are retained another `stale_if_error_seconds` for `lookup_if_error`,
+    which callers use only when the upstream is failing.
+
+    Each entry is charged its encoded JSON size; when `max_bytes` (or `maxsize`)
+    is exceeded the least recently used entries are evicted. Values are stored and
+    returned as-is (no copies), so callers must cache immutable objects such as
+    frozen pydantic models.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl_seconds: int,
+        *,
+        max_bytes: int = 0,
+        stale_ttl_seconds: int = 0,
+        early_refresh_beta: float = 0.0,
+        stale_if_error_seconds: int = 0,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._entries: OrderedDict[str, _StoredValue] = OrderedDict()
+        # Insertion order equals expiry order because the TTL is fixed per store.
+        self._expiry_order: OrderedDict[str, None] = OrderedDict()
+        self._maxsize = maxsize
+        self._max_bytes = max_bytes
+        self._ttl_seconds = ttl_seconds
+        self._hard_ttl_seconds = ttl_seconds + max(stale_ttl_seconds, 0)
+        self._retain_seconds = self._hard_ttl_seconds + max(stale_if_error_seconds, 0)
+        self._early_refresh_beta = early_refresh_beta
+        self._timer = timer
         self._lock = threading.RLock()
+        self._bytes = 0
+        self._evictions = 0
 
-    def get(self, key: str) -> Any | None:
+    def lookup(self, key: str) -> CacheEntry | None:
+        now = self._timer()
         with self._lock:
-            if key not in self._cache:
+            stored = self._entries.get(key)
+            if stored is None:
+                return None
+            if now >= stored.expires_at:
+                if now >= stored.retain_until:
+                    self._remove(key)
                 return None
-            return copy.deepcopy(self._cache[key])
+            self._entries.move_to_end(key)
+        value = stored.value
+        if now >= stored.fresh_until:
+            return CacheEntry(value=value, stale=True, refresh=True)
+        refresh = False
+        if self._early_refresh_beta > 0 and stored.compute_seconds > 0:
+            jitter = -stored.compute_seconds * self._early_refresh_beta * math.log(1.0 - random.random())
+            refresh = now + jitter >= stored.fresh_until
+        return CacheEntry(value=value, refresh=refresh)
 
-    def set(self, key: str, value: Any) -> None:
+    def lookup_if_error(self, key: str) -> CacheEntry | None:
+        """Return any retained entry, fresh or expired, as a stale fallback."""
+        now = self._timer()
+        with self._lock:
+            stored = self._entries.get(key)
+            if stored is None or now >= stored.retain_until:
+                return None
+        return CacheEntry(value=stored.value, stale=now >= stored.fresh_until)
+
+    def get(self, key: str) -> Any | None:
+        entry = self.lookup(key)
+        return None if entry is None else entry.value
+
+    def set(self, key: str, value: Any, *, compute_seconds: float = 0.0) -> None:
+        size = _approximate_size(key, value)
+        now = self._timer()
+        stored = _StoredValue(
+            value=value,
+            fresh_until=now + self._ttl_seconds,
+            expires_at=now + self._hard_ttl_seconds,
+            retain_until=now + self._retain_seconds,
+            compute_seconds=compute_seconds,
+            size=size,
+        )
         with self._lock:
-            self._cache[key] = copy.deepcopy(value)
+            self._remove(key)
+            if self._max_bytes and size > self._max_bytes:
+                return
+            self._entries[key] = stored
+            self._expiry_order[key] = None
+            self._bytes += size
+            self._purge_expired(now)
+            while self._entries and (
+                len(self._entries) > self._maxsize or (self._max_bytes and self._bytes > self._max_bytes)
+            ):
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self._evictions += 1
+
+    def _purge_expired(self, now: float) -> None:
+        for key in list(self._expiry_order):
+            if self._entries[key].retain_until > now:
+                break
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        stored = self._entries.pop(key, None)
+        if stored is not None:
+            self._expiry_order.pop(key, None)
+            self._bytes -= stored.size
 
     def clear(self) -> None:
         with self._lock:
-            self._cache.clear()
+            self._entries.clear()
+            self._expiry_order.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "maxBytes": self._max_bytes,
+                "evictions": self._evictions,
+            }
 
 
 class CacheManager:
@@ -41,10 +191,38 @@ class CacheManager:
         self.product_offers = _TTLStore(
             maxsize=settings.cache_maxsize,
             ttl_seconds=settings.cache_product_offers_ttl_seconds,
+            max_bytes=settings.cache_product_offers_max_bytes,
+            stale_ttl_seconds=settings.cache_product_offers_stale_ttl_seconds,
+            early_refresh_beta=settings.cache_product_offers_early_refresh_beta,
+            stale_if_error_seconds=settings.cache_product_offers_stale_if_error_seconds,
         )
         self.shop_offers = _TTLStore(
             maxsize=settings.cache_maxsize,
             ttl_seconds=settings.cache_shop_offers_ttl_seconds,
+            max_bytes=settings.cache_shop_offers_max_bytes,
+            stale_ttl_seconds=settings.cache_shop_offers_stale_ttl_seconds,
+            early_refresh_beta=settings.cache_shop_offers_early_refresh_beta,
+            stale_if_error_seconds=settings.cache_shop_offers_stale_if_error_seconds,
+        )
+        # itemId -> latest full productOfferV2 node seen in any search response.
+        self.product_items = _TTLStore(
+            maxsize=settings.cache_maxsize,
+            ttl_seconds=settings.cache_product_items_ttl_seconds,
+            max_bytes=settings.cache_product_items_max_bytes,
+        )
+        # Share/short URL -> (shopId, itemId) found by following its redirects.
+        self.resolved_links = _TTLStore(
+            maxsize=settings.cache_maxsize,
+            ttl_seconds=settings.cache_resolved_links_ttl_seconds,
+        )
+        # Final /products/from-url results by "shopId:itemId", and short-lived failures.
+        self.product_from_url = _TTLStore(
+            maxsize=settings.cache_maxsize,
+            ttl_seconds=settings.cache_product_from_url_ttl_seconds,
+        )
+        self.product_from_url_failures = _TTLStore(
+            maxsize=settings.cache_maxsize,
+            ttl_seconds=settings.cache_product_from_url_negative_ttl_seconds,
         )
 
     def build_key(self, operation: str, request_payload: dict[str, Any], selection_set_version: str) -> str:
@@ -52,20 +230,50 @@ class CacheManager:
         return f"{operation}:{selection_set_version}:{normalized}"
 
     def get(self, cache_name: str, key: str) -> Any | None:
+        entry = self.lookup(cache_name, key)
+        return None if entry is None else entry.value
+
+    def lookup(self, cache_name: str, key: str) -> CacheEntry | None:
         if not self.enabled:
             return None
         store = getattr(self, cache_name)
-        return store.get(key)
+        with stage("cache"):
+            entry = store.lookup(key)
+        result = "miss" if entry is None else "stale" if entry.stale else "hit"
+        get_metrics().cache_lookups.inc(cache_name, result)
+        return entry
 
-    def set(self, cache_name: str, key: str, value: Any) -> None:
+    def lookup_if_error(self, cache_name: str, key: str) -> CacheEntry | None:
+        if not self.enabled:
+            return None
+        store = getattr(self, cache_name)
+        with stage("cache"):
+            return store.lookup_if_error(key)
+
+    def set(self, cache_name: str, key: str, value: Any, *, compute_seconds: float = 0.0) -> None:
         if not self.enabled:
             return
         store = getattr(self, cache_name)
-        store.set(key, value)
+        store.set(key, value, compute_seconds=compute_seconds)
+        get_metrics().cache_sets.inc(cache_name)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {
+            "product_offers": self.product_offers.stats(),
+            "shop_offers": self.shop_offers.stats(),
+            "product_items": self.product_items.stats(),
+            "resolved_links": self.resolved_links.stats(),
+            "product_from_url": self.product_from_url.stats(),
+            "product_from_url_failures": self.product_from_url_failures.stats(),
+        }
 
     def clear_all(self) -> None:
         self.product_offers.clear()
         self.shop_offers.clear()
+        self.product_items.clear()
+        self.resolved_links.clear()
+        self.product_from_url.clear()
+        self.product_from_url_failures.clear()
 
 
 _cache_manager: CacheManager | None = None
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from app.core.config import get_settings
+from app.core.exceptions import UpstreamShopeeException
+
+
+@dataclass(frozen=True)
+class BreakerCall:
+    """Handed out by `before_call`; the outcome of the call is reported with it."""
+
+    generation: int
+    probe: bool
+
+
+class CircuitBreaker:
+    """Fails Shopee calls fast while the recent upstream error rate is too high.
+
+    Outcomes of the last `window_seconds` are tracked; once at least `min_calls`
+    were seen and the failure ratio reaches `failure_ratio`, the circuit opens for
+    `open_seconds`. After that a single probe call is let through (half-open): its
+    success closes the circuit, its failure opens it again, and a probe that ends
+    without an upstream answer frees the slot for the next call. Outcomes of calls
+    that started before the circuit last opened are ignored.
+    """
+
+    def __init__(
+        self,
+        *,
+        failure_ratio: float,
+        min_calls: int,
+        window_seconds: float,
+        open_seconds: float,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._failure_ratio = failure_ratio
+        self._min_calls = max(1, min_calls)
+        self._window_seconds = window_seconds
+        self._open_seconds = open_seconds
+        self._timer = timer
+        self._outcomes: deque[tuple[float, bool]] = deque()
+        self._opened_at: float | None = None
+        self._probe_inflight = False
+        # Bumped every time the circuit opens, so stragglers can be told apart.
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(self._timer())
+
+    def _state(self, now: float) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if now - self._opened_at < self._open_seconds:
+            return "open"
+        return "half_open"
+
+    def before_call(self, *, operation: str) -> BreakerCall:
+        """Raise `shopee_circuit_open` unless a call may go upstream now."""
+        with self._lock:
+            now = self._timer()
+            state = self._state(now)
+            if state == "closed":
+                return BreakerCall(self._generation, probe=False)
+            if state == "half_open" and not self._probe_inflight:
+                self._probe_inflight = True
+                return BreakerCall(self._generation, probe=True)
+            self.rejected += 1
+            retry_after = max(0.0, self._open_seconds - (now - (self._opened_at or now)))
+        raise UpstreamShopeeException(
+            status_code=503,
+            code="shopee_circuit_open",
+            message="Shopee API is failing; calls are paused briefly",
+            upstream={"operation": operation, "retryAfterSeconds": round(retry_after, 3)},
+        )
+
+    def _is_current_probe(self, call: BreakerCall) -> bool:
+        return call.probe and call.generation == self._generation and self._opened_at is not None
+
+    def release_probe(self, call: BreakerCall) -> None:
+        """Let another call probe; for a probe that got no upstream answer (cancelled, queue timeout)."""
+        with self._lock:
+            if self._is_current_probe(call):
+                self._probe_inflight = False
+
+    def record_success(self, call: BreakerCall) -> None:
+        with self._lock:
+            if self._is_current_probe(call):
+                self._close()
+            elif self._opened_at is None and call.generation == self._generation:
+                self._record(self._timer(), True)
+
+    def record_failure(self, call: BreakerCall) -> None:
+        with self._lock:
+            now = self._timer()
+            if self._is_current_probe(call):
+                self._open(now)
+                return
+            if self._opened_at is not None or call.generation != self._generation:
+                return
+            self._record(now, False)
+            calls = len(self._outcomes)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            if calls >= self._min_calls and failures / calls >= self._failure_ratio:
+                self._open(now)
+
+    def _record(self, now: float, ok: bool) -> None:
+        self._outcomes.append((now, ok))
+        while self._outcomes and now - self._outcomes[0][0] > self._window_seconds:
+            self._outcomes.popleft()
+
+    def _open(self, now: float) -> None:
+        self._opened_at = now
+        self._generation += 1
+        self._probe_inflight = False
+        self._outcomes.clear()
+        self.times_opened += 1
+
+    def _close(self) -> None:
+        self._opened_at = None
+        self._probe_inflight = False
+        self._outcomes.clear()
+
+    def snapshot(self) -> dict[str, str | int]:
+        with self._lock:
+            return {
+                "state": self._state(self._timer()),
+                "timesOpened": self.times_opened,
+                "rejected": self.rejected,
+            }
+
+
+_circuit_breaker: CircuitBreaker | None = None
+_circuit_breaker_lock = threading.Lock()
+
+
+def get_circuit_breaker() -> CircuitBreaker | None:
+    """Return the shared breaker, or None when it is disabled."""
+    global _circuit_breaker
+    settings = get_settings()
+    if not settings.shopee_circuit_breaker_enabled:
+        return None
+    if _circuit_breaker is None:
+        with _circuit_breaker_lock:
+            if _circuit_breaker is None:
+                _circuit_breaker = CircuitBreaker(
+                    failure_ratio=settings.shopee_circuit_failure_ratio,
+                    min_calls=settings.shopee_circuit_min_calls,
+                    window_seconds=settings.shopee_circuit_window_seconds,
+                    open_seconds=settings.shopee_circuit_open_seconds,
+                )
+    return _circuit_breaker
+
+
+def reset_circuit_breaker() -> None:
+    global _circuit_breaker
+    with _circuit_breaker_lock:
+        _circuit_breaker = None
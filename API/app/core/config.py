@@ -25,11 +25,62 @@ class Settings(BaseSettings):
     shopee_app_secret: str = Field(..., min_length=1)
     shopee_graphql_url: str = "https://open-api.affiliate.shopee.com.br/graphql"
     shopee_timeout_seconds: float = 20.0
+    shopee_http_max_connections: int = 20
+    shopee_http_max_keepalive_connections: int = 10
+    shopee_http_keepalive_expiry_seconds: float = 30.0
+    shopee_http2_enabled: bool = False
+    # Optional pool "appId:secret[:weight],..." replacing SHOPEE_APP_ID/SHOPEE_APP_SECRET.
+    shopee_credentials: str = ""
+    shopee_credential_cooldown_seconds: float = 30.0
+    shopee_rate_limit_enabled: bool = False
+    shopee_rate_limit_initial_rps: float = 10.0
+    shopee_rate_limit_min_rps: float = 0.5
+    shopee_rate_limit_max_rps: float = 50.0
+    shopee_rate_limit_burst: int = 10
+    shopee_rate_limit_increase_rps: float = 0.1
+    shopee_rate_limit_decrease_factor: float = 0.5
+    shopee_rate_limit_max_wait_seconds: float = 2.0
+    shopee_request_deadline_seconds: float = 20.0
+    shopee_retry_max_attempts: int = 3
+    shopee_retry_backoff_base_seconds: float = 0.2
+    shopee_retry_backoff_max_seconds: float = 2.0
+    shopee_retry_mutations: bool = False
+    shopee_circuit_breaker_enabled: bool = True
+    shopee_circuit_failure_ratio: float = 0.5
+    shopee_circuit_min_calls: int = 10
+    shopee_circuit_window_seconds: float = 30.0
+    shopee_circuit_open_seconds: float = 15.0
 
     cache_enabled: bool = True
     cache_product_offers_ttl_seconds: int = 90
+    cache_product_offers_stale_ttl_seconds: int = 0
+    cache_product_offers_early_refresh_beta: float = 0.0
+    cache_product_offers_stale_if_error_seconds: int = 600
     cache_shop_offers_ttl_seconds: int = 90
-    cache_maxsize: int = 256
+    cache_shop_offers_stale_ttl_seconds: int = 0
+    cache_shop_offers_early_refresh_beta: float = 0.0
+    cache_shop_offers_stale_if_error_seconds: int = 600
+    cache_maxsize: int = 10000
+    cache_product_offers_max_bytes: int = 16 * 1024 * 1024
+    cache_shop_offers_max_bytes: int = 4 * 1024 * 1024
+    cache_serve_encoded_responses: bool = True
+    cache_product_items_ttl_seconds: int = 300
+    cache_product_items_max_bytes: int = 8 * 1024 * 1024
+    cache_resolved_links_ttl_seconds: int = 86400
+    cache_product_from_url_ttl_seconds: int = 300
+    cache_product_from_url_negative_ttl_seconds: int = 30
+
+    short_link_cache_enabled: bool = True
+    short_link_cache_maxsize: int = 10000
+    short_link_cache_path: str = ""
+
+    product_from_url_batch_concurrency: int = 5
+
+    metrics_enabled: bool = False
+
+    request_capture_path: str = ""
+    request_capture_max_bytes: int = 10 * 1024 * 1024
+    request_capture_backup_count: int = 5
 
     cors_enabled: bool = False
     cors_allow_origins: str = ""
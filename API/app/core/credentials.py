@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable, Collection
+from dataclasses import dataclass, field
+
+from app.core.config import Settings, get_settings
+
+
+@dataclass(frozen=True)
+class ShopeeCredential:
+    app_id: str
+    app_secret: str = field(repr=False)
+    weight: int = 1
+
+
+def parse_credentials(raw: str) -> list[ShopeeCredential]:
+    """Parse `appId:secret[:weight]` entries separated by commas."""
+    credentials: list[ShopeeCredential] = []
+    for entry in raw.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        parts = entry.split(":")
+        if len(parts) not in (2, 3) or not parts[0].strip() or not parts[1].strip():
+            raise ValueError("SHOPEE_CREDENTIALS entries must look like appId:secret[:weight]")
+        weight = int(parts[2]) if len(parts) == 3 else 1
+        if weight < 1:
+            raise ValueError("SHOPEE_CREDENTIALS weights must be >= 1")
+        credentials.append(ShopeeCredential(app_id=parts[0].strip(), app_secret=parts[1].strip(), weight=weight))
+    return credentials
+
+
+def configured_credentials(settings: Settings) -> list[ShopeeCredential]:
+    """`SHOPEE_CREDENTIALS` when set, otherwise the single `SHOPEE_APP_ID`/`SHOPEE_APP_SECRET` pair."""
+    return parse_credentials(settings.shopee_credentials) or [
+        ShopeeCredential(app_id=settings.shopee_app_id, app_secret=settings.shopee_app_secret)
+    ]
+
+
+@dataclass
+class _CredentialState:
+    credential: ShopeeCredential
+    current_weight: int = 0
+    cooldown_until: float = 0.0
+    last_throttled_at: float | None = None
+    requests: int = 0
+    successes: int = 0
+    rate_limited: int = 0
+    failures: int = 0
+
+
+class CredentialPool:
+    """Spreads Shopee calls over several affiliate accounts, each with its own rate limit.
+
+    Available credentials are picked by smooth weighted round robin. A credential
+    answered with 10030 cools down for `cooldown_seconds`; when every candidate is
+    cooling down, the least recently throttled one is used.
+    """
+
+    def __init__(
+        self,
+        credentials: list[ShopeeCredential],
+        *,
+        cooldown_seconds: float,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not credentials:
+            raise ValueError("CredentialPool needs at least one credential")
+        self._states = {credential.app_id: _CredentialState(credential) for credential in credentials}
+        self._cooldown_seconds = cooldown_seconds
+        self._timer = timer
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def _available(self, now: float, exclude: Collection[str]) -> list[_CredentialState]:
+        return [
+            state
+            for app_id, state in self._states.items()
+            if app_id not in exclude and state.cooldown_until <= now
+        ]
+
+    def select(self, *, exclude: Collection[str] = ()) -> ShopeeCredential:
+        with self._lock:
+            now = self._timer()
+            available = self._available(now, exclude)
+            if available:
+                total = 0
+                for state in available:
+                    state.current_weight += state.credential.weight
+                    total += state.credential.weight
+                chosen = max(available, key=lambda state: state.current_weight)
+                chosen.current_weight -= total
+            else:
+                candidates = [state for app_id, state in self._states.items() if app_id not in exclude]
+                chosen = min(
+                    candidates or self._states.values(),
+                    key=lambda state: state.last_throttled_at or float("-inf"),
+                )
+            chosen.requests += 1
+            return chosen.credential
+
+    def available_count(self, *, exclude: Collection[str] = ()) -> int:
+        with self._lock:
+            return len(self._available(self._timer(), exclude))
+
+    def record_success(self, app_id: str) -> None:
+        with self._lock:
+            self._states[app_id].successes += 1
+
+    def record_failure(self, app_id: str) -> None:
+        with self._lock:
+            self._states[app_id].failures += 1
+
+    def record_rate_limited(self, app_id: str) -> None:
+        with self._lock:
+            state = self._states[app_id]
+            now = self._timer()
+            state.rate_limited += 1
+            state.last_throttled_at = now
+            state.cooldown_until = now + self._cooldown_seconds
+
+    def snapshot(self) -> list[dict[str, str | int | bool]]:
+        with self._lock:
+            now = self._timer()
+            return [
+                {
+                    "appId": app_id,
+                    "weight": state.credential.weight,
+                    "coolingDown": state.cooldown_until > now,
+                    "requests": state.requests,
+                    "successes": state.successes,
+                    "rateLimited": state.rate_limited,
+                    "failures": state.failures,
+                }
+                for app_id, state in self._states.items()
+            ]
+
+
+_credential_pool: CredentialPool | None = None
+_credential_pool_lock = threading.Lock()
+
+
+def get_credential_pool() -> CredentialPool:
+    global _credential_pool
+    if _credential_pool is None:
+        with _credential_pool_lock:
+            if _credential_pool is None:
+                settings = get_settings()
+                _credential_pool = CredentialPool(
+                    configured_credentials(settings),
+                    cooldown_seconds=settings.shopee_credential_cooldown_seconds,
+                )
+    return _credential_pool
+
+
+def reset_credential_pool() -> None:
+    global _credential_pool
+    with _credential_pool_lock:
+        _credential_pool = None
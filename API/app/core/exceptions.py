@@ -9,7 +9,7 @@ from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
-from app.schemas.common import error_response
+from app.schemas.common import ErrorBody, error_response
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +31,9 @@ class ApiException(Exception):
         self.details = details
         self.upstream = upstream
 
+    def to_error_body(self) -> ErrorBody:
+        return ErrorBody(code=self.code, message=self.message, details=self.details, upstream=self.upstream)
+
 
 class UpstreamShopeeException(ApiException):
     pass
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import threading
+
+import httpx
+
+from app.core.config import Settings, get_settings
+
+
+def build_http_client(settings: Settings) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.shopee_http_max_connections,
+        max_keepalive_connections=settings.shopee_http_max_keepalive_connections,
+        keepalive_expiry=settings.shopee_http_keepalive_expiry_seconds,
+    )
+    return httpx.AsyncClient(
+        timeout=settings.shopee_timeout_seconds,
+        limits=limits,
+        http2=settings.shopee_http2_enabled,
+    )
+
+
+_http_client: httpx.AsyncClient | None = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide upstream client.
+
+    The app lifespan opens and closes it; outside a running app (scripts, direct
+    service calls) it is created lazily and lives until `close_http_client`.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        with _http_client_lock:
+            if _http_client is None or _http_client.is_closed:
+                _http_client = build_http_client(get_settings())
+    return _http_client
+
+
+async def open_http_client() -> httpx.AsyncClient:
+    await close_http_client()
+    return get_http_client()
+
+
+async def close_http_client() -> None:
+    global _http_client
+    with _http_client_lock:
+        client = _http_client
+        _http_client = None
+    if client is not None and not client.is_closed:
+        await client.aclose()
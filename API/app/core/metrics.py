@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import bisect
+import threading
+from collections.abc import Iterable, Sequence
+
+# Seconds; covers cache-hit requests (~ms) up to the Shopee timeout.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        with self._lock:
+            return self._values.get(labels, 0.0)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}"
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._bounds = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (non-cumulative, last = +Inf), sum]
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = ([0] * (len(self._bounds) + 1), [0.0])
+                self._series[labels] = series
+            series[0][index] += 1
+            series[1][0] += value
+
+    def count(self, *labels: str) -> int:
+        with self._lock:
+            series = self._series.get(labels)
+            return 0 if series is None else sum(series[0])
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            snapshot = sorted((labels, (list(counts), total[0])) for labels, (counts, total) in self._series.items())
+        bucket_names = (*self.labelnames, "le")
+        for labels, (counts, total) in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip((*self._bounds, float("inf")), counts):
+                cumulative += bucket_count
+                bucket_labels = format_labels(bucket_names, (*labels, format_value(bound)))
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            label_text = format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_text} {format_value(total)}"
+            yield f"{self.name}_count{label_text} {cumulative}"
+
+
+def render_samples(
+    name: str,
+    documentation: str,
+    metric_type: str,
+    labelnames: Sequence[str],
+    samples: Iterable[tuple[Sequence[str], float]],
+) -> Iterable[str]:
+    """Render point-in-time samples (read from their owner at scrape time)."""
+    yield f"# HELP {name} {documentation}"
+    yield f"# TYPE {name} {metric_type}"
+    for labels, value in samples:
+        yield f"{name}{format_labels(labelnames, labels)} {format_value(value)}"
+
+
+class Metrics:
+    """Process-wide instruments fed from the request path.
+
+    Point-in-time values (cache sizes, limiter state, ...) are not stored here; they
+    are read from their owners when `/metrics` is scraped.
+    """
+
+    def __init__(self) -> None:
+        self.upstream_requests = Counter(
+            "promoshare_shopee_requests_total",
+            "Shopee GraphQL calls by operation and outcome.",
+            ("operation", "outcome"),
+        )
+        self.upstream_duration = Histogram(
+            "promoshare_shopee_request_duration_seconds",
+            "Shopee GraphQL call latency in seconds.",
+            ("operation", "outcome"),
+        )
+        self.cache_lookups = Counter(
+            "promoshare_cache_lookups_total",
+            "Cache lookups by store and result (hit, stale, miss).",
+            ("cache", "result"),
+        )
+        self.cache_sets = Counter("promoshare_cache_sets_total", "Values written to each cache store.", ("cache",))
+        self.http_requests = Counter(
+            "promoshare_http_requests_total",
+            "HTTP requests by method, route template and status.",
+            ("method", "route", "status"),
+        )
+        self.http_duration = Histogram(
+            "promoshare_http_request_duration_seconds",
+            "HTTP request latency in seconds by method and route template.",
+            ("method", "route"),
+        )
+
+    def instruments(self) -> tuple[Counter | Histogram, ...]:
+        return (
+            self.http_requests,
+            self.http_duration,
+            self.upstream_requests,
+            self.upstream_duration,
+            self.cache_lookups,
+            self.cache_sets,
+        )
+
+
+_metrics: Metrics | None = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = Metrics()
+    return _metrics
+
+
+def reset_metrics() -> None:
+    global _metrics
+    with _metrics_lock:
+        _metrics = None
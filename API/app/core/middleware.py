@@ -4,30 +4,106 @@ import logging
 import time
 import uuid
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import get_metrics
+from app.core.request_capture import CAPTURED_PATHS, MAX_CAPTURED_BODY_BYTES, get_request_capture
+from app.core.timing import StageTimings, finish_request_timings, start_request_timings
 
 logger = logging.getLogger("app.request")
 
 
-class RequestContextMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next) -> Response:
-        request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
-        request.state.request_id = request_id
+def _route_label(scope: Scope) -> str:
+    """Route template for metrics labels, so unknown paths and IDs cannot grow the series count."""
+    if scope.get("route") is None:
+        return "unmatched"
+    segments = scope["path"].split("/")
+    values = {str(value): name for name, value in scope.get("path_params", {}).items()}
+    return "/".join(f"{{{values[segment]}}}" if segment in values else segment for segment in segments)
+
+
+class RequestContextMiddleware:
+    """Request ID, per-stage timings, metrics and the request log line.
+
+    Plain ASGI rather than `BaseHTTPMiddleware`, which wraps every request in an
+    extra task and memory stream. `Server-Timing` is added when the response starts,
+    so for streamed responses it covers the time to the first byte; the log line is
+    written once the response is complete.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get("x-request-id") or uuid.uuid4().hex
+        scope.setdefault("state", {})["request_id"] = request_id
+        timings, token = start_request_timings()
+        started_at = time.time()
         start = time.perf_counter()
+        status_code = 500
+
+        capture = get_request_capture() if scope["path"] in CAPTURED_PATHS else None
+        body_chunks: list[bytes] = []
+        body_size = 0
+
+        async def receive_with_capture() -> Message:
+            nonlocal body_size
+            message = await receive()
+            if message["type"] == "http.request" and body_size <= MAX_CAPTURED_BODY_BYTES:
+                chunk = message.get("body", b"")
+                body_size += len(chunk)
+                body_chunks.append(chunk)
+            return message
 
-        response = await call_next(request)
+        async def send_with_context(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers["X-Request-ID"] = request_id
+                headers.append("Server-Timing", timings.server_timing(time.perf_counter() - start))
+            await send(message)
 
-        elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
-        response.headers["X-Request-ID"] = request_id
+        try:
+            await self.app(scope, receive_with_capture if capture is not None else receive, send_with_context)
+        finally:
+            finish_request_timings(token)
+            elapsed = time.perf_counter() - start
+            self._record(scope, request_id, status_code, elapsed, timings)
+            if capture is not None and body_size <= MAX_CAPTURED_BODY_BYTES:
+                capture.record(
+                    timestamp=started_at,
+                    request_id=request_id,
+                    method=scope["method"],
+                    path=scope["path"],
+                    status=status_code,
+                    duration_ms=round(elapsed * 1000, 2),
+                    body=b"".join(body_chunks),
+                )
+
+    @staticmethod
+    def _record(scope: Scope, request_id: str, status_code: int, elapsed: float, timings: StageTimings) -> None:
+        method = scope["method"]
+        route = _route_label(scope)
+        metrics = get_metrics()
+        metrics.http_requests.inc(method, route, str(status_code))
+        metrics.http_duration.observe(elapsed, method, route)
         logger.info(
-            "request_id=%s method=%s path=%s status=%s duration_ms=%s",
+            "request_id=%s method=%s path=%s status=%s duration_ms=%s "
+            "auth_ms=%s cache_ms=%s upstream_ms=%s validation_ms=%s serialization_ms=%s",
             request_id,
-            request.method,
-            request.url.path,
-            response.status_code,
-            elapsed_ms,
+            method,
+            scope["path"],
+            status_code,
+            round(elapsed * 1000, 2),
+            timings.milliseconds("auth"),
+            timings.milliseconds("cache"),
+            timings.milliseconds("upstream"),
+            timings.milliseconds("validation"),
+            timings.milliseconds("serialization"),
         )
-        return response
-
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import heapq
+import itertools
+import threading
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import ParamSpec, TypeVar
+
+from app.core.config import get_settings
+from app.core.exceptions import ApiException
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+# Shortest sleep while queued, so waiters behind the head re-check their turn promptly.
+_MIN_POLL_SECONDS = 0.005
+
+
+class Priority(IntEnum):
+    """Upstream call classes; lower values are served first when budget is tight."""
+
+    INTERACTIVE = 0
+    NORMAL = 1
+    BULK = 2
+
+
+_upstream_priority: ContextVar[Priority | None] = ContextVar("upstream_priority", default=None)
+
+
+def current_priority() -> Priority:
+    priority = _upstream_priority.get()
+    return Priority.NORMAL if priority is None else priority
+
+
+@contextmanager
+def upstream_priority(priority: Priority) -> Iterator[None]:
+    """Tag Shopee calls made in this context (and tasks it spawns) with `priority`,
+    unless an outer caller already chose one (the entry point decides)."""
+    outer = _upstream_priority.get()
+    token = _upstream_priority.set(priority if outer is None else outer)
+    try:
+        yield
+    finally:
+        _upstream_priority.reset(token)
+
+
+def with_priority(priority: Priority) -> Callable[[Callable[P, Awaitable[T]]], Callable[P, Awaitable[T]]]:
+    def decorate(func: Callable[P, Awaitable[T]]) -> Callable[P, Awaitable[T]]:
+        @functools.wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+            with upstream_priority(priority):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+class AdaptiveRateLimiter:
+    """Token bucket in front of Shopee calls whose rate is learned with AIMD.
+
+    Every successful call adds `increase_rps` to the rate (up to `max_rps`); an
+    upstream rate-limit answer (10030) multiplies it by `decrease_factor` (down to
+    `min_rps`) and empties the bucket. Callers that find no token queue by priority
+    for at most `max_wait_seconds` (or their own remaining budget, if shorter)
+    before failing with `shopee_rate_limited`.
+    """
+
+    def __init__(
+        self,
+        *,
+        rate: float,
+        min_rate: float,
+        max_rate: float,
+        burst: int,
+        increase_rps: float,
+        decrease_factor: float,
+        max_wait_seconds: float,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._min_rate = min_rate
+        self._max_rate = max_rate
+        self._rate = min(max(rate, min_rate), max_rate)
+        self._burst = max(1, burst)
+        self._increase_rps = increase_rps
+        self._decrease_factor = decrease_factor
+        self._max_wait_seconds = max_wait_seconds
+        self._timer = timer
+        self._tokens = float(self._burst)
+        self._updated_at = timer()
+        self._waiters: list[tuple[int, int]] = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self.rate_limited = 0
+        self.queue_timeouts = 0
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self._updated_at)
+        self._tokens = min(float(self._burst), self._tokens + elapsed * self._rate)
+        self._updated_at = now
+
+    def _try_take(self, waiter: tuple[int, int] | None) -> float:
+        """Take a token if `waiter` (None = not queued) is next; else return seconds to wait."""
+        with self._lock:
+            now = self._timer()
+            self._refill(now)
+            is_next = not self._waiters if waiter is None else self._waiters[0] == waiter
+            if is_next and self._tokens >= 1:
+                self._tokens -= 1
+                if waiter is not None:
+                    heapq.heappop(self._waiters)
+                return 0.0
+            return max(_MIN_POLL_SECONDS, (1 - self._tokens) / self._rate)
+
+    async def acquire(self, priority: Priority = Priority.NORMAL, *, max_wait: float | None = None) -> None:
+        delay = self._try_take(None)
+        if delay == 0.0:
+            return
+
+        max_wait_seconds = self._max_wait_seconds if max_wait is None else min(self._max_wait_seconds, max_wait)
+        waiter = (int(priority), next(self._sequence))
+        with self._lock:
+            heapq.heappush(self._waiters, waiter)
+        deadline = self._timer() + max_wait_seconds
+        acquired = False
+        try:
+            while True:
+                remaining = deadline - self._timer()
+                if remaining <= 0:
+                    break
+                await asyncio.sleep(min(delay, remaining))
+                delay = self._try_take(waiter)
+                if delay == 0.0:
+                    acquired = True
+                    return
+        finally:
+            if not acquired:
+                self._abandon(waiter)
+
+        with self._lock:
+            self.queue_timeouts += 1
+        raise ApiException(
+            status_code=429,
+            code="shopee_rate_limited",
+            message="Shopee API rate limit budget exhausted; request waited too long in queue",
+            details={"priority": priority.name.lower(), "maxWaitSeconds": round(max_wait_seconds, 3)},
+        )
+
+    def _abandon(self, waiter: tuple[int, int]) -> None:
+        with self._lock:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+
+    def on_success(self) -> None:
+        with self._lock:
+            self._rate = min(self._max_rate, self._rate + self._increase_rps)
+
+    def on_rate_limited(self) -> None:
+        with self._lock:
+            self._refill(self._timer())
+            self._rate = max(self._min_rate, self._rate * self._decrease_factor)
+            self._tokens = min(self._tokens, 0.0)
+            self.rate_limited += 1
+
+    def queue_depth(self) -> int:
+        with self._lock:
+            return len(self._waiters)
+
+    def snapshot(self) -> dict[str, float | int]:
+        with self._lock:
+            return {
+                "rate": round(self._rate, 3),
+                "tokens": round(self._tokens, 3),
+                "queueDepth": len(self._waiters),
+                "rateLimited": self.rate_limited,
+                "queueTimeouts": self.queue_timeouts,
+            }
+
+
+# One limiter per credential: each Shopee affiliate account has its own upstream bucket.
+_rate_limiters: dict[str, AdaptiveRateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(app_id: str) -> AdaptiveRateLimiter | None:
+    """Return the limiter for `app_id`, or None when client-side rate limiting is disabled."""
+    settings = get_settings()
+    if not settings.shopee_rate_limit_enabled:
+        return None
+    limiter = _rate_limiters.get(app_id)
+    if limiter is None:
+        with _rate_limiters_lock:
+            limiter = _rate_limiters.get(app_id)
+            if limiter is None:
+                limiter = AdaptiveRateLimiter(
+                    rate=settings.shopee_rate_limit_initial_rps,
+                    min_rate=settings.shopee_rate_limit_min_rps,
+                    max_rate=settings.shopee_rate_limit_max_rps,
+                    burst=settings.shopee_rate_limit_burst,
+                    increase_rps=settings.shopee_rate_limit_increase_rps,
+                    decrease_factor=settings.shopee_rate_limit_decrease_factor,
+                    max_wait_seconds=settings.shopee_rate_limit_max_wait_seconds,
+                )
+                _rate_limiters[app_id] = limiter
+    return limiter
+
+
+def rate_limiter_snapshots() -> dict[str, dict[str, float | int]]:
+    with _rate_limiters_lock:
+        limiters = dict(_rate_limiters)
+    return {app_id: limiter.snapshot() for app_id, limiter in limiters.items()}
+
+
+def reset_rate_limiters() -> None:
+    with _rate_limiters_lock:
+        _rate_limiters.clear()
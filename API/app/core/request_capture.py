@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import json
+import logging
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Any
+
+from app.core.config import get_settings
+
+# Routes whose request bodies are captured for replay (`benchmarks/replay.py`).
+CAPTURED_PATHS = frozenset(
+    {
+        "/api/v1/shopee/offers/products/search",
+        "/api/v1/shopee/offers/products/search/batch",
+        "/api/v1/shopee/offers/products/stream",
+        "/api/v1/shopee/offers/products/from-url",
+        "/api/v1/shopee/offers/shops/search",
+        "/api/v1/shopee/products/from-url",
+        "/api/v1/shopee/products/from-url/batch",
+        "/api/v1/shopee/short-links",
+        "/api/v1/shopee/short-links/batch",
+    }
+)
+
+# Bodies larger than this are not captured (batch limits keep real requests far below).
+MAX_CAPTURED_BODY_BYTES = 64 * 1024
+
+_REDACTED_KEYS = frozenset({"password", "secret", "token", "accesstoken", "authorization", "apikey"})
+_MAX_STRING_LENGTH = 2048
+
+
+def sanitize_body(value: Any) -> Any:
+    """Drop credential-like fields and clip very long strings from a JSON request body."""
+    if isinstance(value, dict):
+        return {
+            key: "[redacted]" if key.replace("_", "").lower() in _REDACTED_KEYS else sanitize_body(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [sanitize_body(item) for item in value]
+    if isinstance(value, str) and len(value) > _MAX_STRING_LENGTH:
+        return value[:_MAX_STRING_LENGTH]
+    return value
+
+
+class RequestCapture:
+    """Appends one JSON line per captured request to a size-rotated file.
+
+    Lines are handed to a background thread through a queue, so the event loop
+    never waits on disk I/O.
+    """
+
+    def __init__(self, *, path: str, max_bytes: int, backup_count: int) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        self._listener = QueueListener(self._queue, handler)
+        self._handler = handler
+        self._logger = logging.getLogger("app.capture")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._logger.addHandler(QueueHandler(self._queue))
+        self._listener.start()
+
+    def record(
+        self,
+        *,
+        timestamp: float,
+        request_id: str,
+        method: str,
+        path: str,
+        status: int,
+        duration_ms: float,
+        body: bytes,
+    ) -> None:
+        try:
+            payload: Any = sanitize_body(json.loads(body)) if body else None
+        except ValueError:
+            payload = None
+        line = {
+            "ts": round(timestamp, 6),
+            "request_id": request_id,
+            "method": method,
+            "path": path,
+            "status": status,
+            "duration_ms": duration_ms,
+            "body": payload,
+        }
+        self._logger.info("%s", json.dumps(line, ensure_ascii=False, separators=(",", ":")))
+
+    def close(self) -> None:
+        """Flush pending lines and close the file."""
+        self._listener.stop()
+        self._handler.close()
+        self._logger.handlers.clear()
+
+
+_request_capture: RequestCapture | None = None
+_request_capture_lock = threading.Lock()
+
+
+def get_request_capture() -> RequestCapture | None:
+    """Return the shared capture, or None when `REQUEST_CAPTURE_PATH` is not set."""
+    global _request_capture
+    settings = get_settings()
+    if not settings.request_capture_path:
+        return None
+    if _request_capture is None:
+        with _request_capture_lock:
+            if _request_capture is None:
+                _request_capture = RequestCapture(
+                    path=settings.request_capture_path,
+                    max_bytes=settings.request_capture_max_bytes,
+                    backup_count=settings.request_capture_backup_count,
+                )
+    return _request_capture
+
+
+def reset_request_capture() -> None:
+    global _request_capture
+    with _request_capture_lock:
+        if _request_capture is not None:
+            _request_capture.close()
+        _request_capture = None
@@ -10,6 +10,7 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from app.core.config import get_settings
 from app.core.exceptions import ApiException
+from app.core.timing import stage
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
@@ -57,5 +58,6 @@ async def get_current_user(
 ) -> dict[str, Any]:
     if credentials is None or credentials.scheme.lower() != "bearer":
         raise ApiException(status_code=401, code="unauthorized", message="Missing bearer token")
-    return decode_access_token(credentials.credentials)
+    with stage("auth"):
+        return decode_access_token(credentials.credentials)
 
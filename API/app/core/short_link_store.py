@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+from cachetools import LRUCache
+
+from app.core.config import get_settings
+from app.core.timing import stage
+
+
+def normalize_origin_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", parts.query, ""))
+
+
+def short_link_key(app_id: str, origin_url: str, sub_ids: list[str] | None) -> str:
+    """Short links carry the affiliate account, so the app id that generated one is part of its key."""
+    return json.dumps(
+        [app_id, normalize_origin_url(origin_url), sub_ids or []], separators=(",", ":"), ensure_ascii=False
+    )
+
+
+class ShortLinkStore:
+    """Memoizes generated short links: in-memory LRU in front of an optional SQLite file."""
+
+    def __init__(self, *, maxsize: int, path: str = "") -> None:
+        self._memory: LRUCache[str, str] = LRUCache(maxsize=maxsize)
+        self._memory_lock = threading.Lock()
+        self._path = path
+        self._db: sqlite3.Connection | None = None
+        self._db_lock = threading.Lock()
+
+    async def get(self, key: str) -> str | None:
+        with stage("cache"):
+            with self._memory_lock:
+                short_link = self._memory.get(key)
+            if short_link is not None or not self._path:
+                return short_link
+
+            short_link = await asyncio.to_thread(self._disk_get, key)
+            if short_link is not None:
+                with self._memory_lock:
+                    self._memory[key] = short_link
+            return short_link
+
+    async def set(self, key: str, short_link: str) -> None:
+        with self._memory_lock:
+            self._memory[key] = short_link
+        if self._path:
+            await asyncio.to_thread(self._disk_set, key, short_link)
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = sqlite3.connect(self._path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS short_links ("
+                "key TEXT PRIMARY KEY, short_link TEXT NOT NULL, created_at INTEGER NOT NULL)"
+            )
+            self._db.commit()
+        return self._db
+
+    def _disk_get(self, key: str) -> str | None:
+        with self._db_lock:
+            row = self._connection().execute("SELECT short_link FROM short_links WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _disk_set(self, key: str, short_link: str) -> None:
+        with self._db_lock:
+            db = self._connection()
+            db.execute(
+                "INSERT OR REPLACE INTO short_links (key, short_link, created_at) VALUES (?, ?, ?)",
+                (key, short_link, int(time.time())),
+            )
+            db.commit()
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_short_link_store: ShortLinkStore | None = None
+_short_link_store_lock = threading.Lock()
+
+
+def get_short_link_store() -> ShortLinkStore | None:
+    """Return the shared store, or None when short-link caching is disabled."""
+    global _short_link_store
+    settings = get_settings()
+    if not settings.short_link_cache_enabled:
+        return None
+    if _short_link_store is None:
+        with _short_link_store_lock:
+            if _short_link_store is None:
+                _short_link_store = ShortLinkStore(
+                    maxsize=settings.short_link_cache_maxsize,
+                    path=settings.short_link_cache_path,
+                )
+    return _short_link_store
+
+
+def reset_short_link_store() -> None:
+    global _short_link_store
+    with _short_link_store_lock:
+        if _short_link_store is not None:
+            _short_link_store.close()
+        _short_link_store = None
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+class _LeaderCancelled(Exception):
+    """Set on the shared future when the leader is cancelled, so followers retry."""
+
+
+class SingleFlight:
+    """Coalesces concurrent calls sharing a key into one in-flight upstream call.
+
+    The first caller for a key (the leader) runs the call; callers arriving while it
+    is in flight await the same future and receive its result or exception. If the
+    leader is cancelled (its client went away), waiting followers run the call again
+    and one of them becomes the new leader.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[str, asyncio.Future[Any]] = {}
+        self._waiters: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.waiters_served = 0
+        self.max_waiters = 0
+
+    async def run(self, key: str, call: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """Return `(result, shared)` where `shared` is True for followers."""
+        while True:
+            with self._lock:
+                future = self._inflight.get(key)
+                if future is None:
+                    leader = True
+                    future = asyncio.get_running_loop().create_future()
+                    self._inflight[key] = future
+                    self._waiters[key] = 0
+                else:
+                    leader = False
+                    self._waiters[key] += 1
+            if not leader:
+                try:
+                    return await asyncio.shield(future), True
+                except _LeaderCancelled:
+                    continue
+
+            try:
+                result = await call()
+            except asyncio.CancelledError:
+                self._finish(key)
+                future.set_exception(_LeaderCancelled())
+                future.exception()
+                raise
+            except BaseException as exc:
+                self._finish(key)
+                future.set_exception(exc)
+                # Mark retrieved so an unawaited failure does not log "exception never retrieved".
+                future.exception()
+                raise
+            self._finish(key)
+            future.set_result(result)
+            return result, False
+
+    def is_inflight(self, key: str) -> bool:
+        with self._lock:
+            return key in self._inflight
+
+    def _finish(self, key: str) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+            waiters = self._waiters.pop(key, 0)
+            self.leaders += 1
+            self.waiters_served += waiters
+            self.max_waiters = max(self.max_waiters, waiters)
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "inflight": len(self._inflight),
+                "leaders": self.leaders,
+                "waitersServed": self.waiters_served,
+                "maxWaiters": self.max_waiters,
+            }
+
+
+_single_flight: SingleFlight | None = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    global _single_flight
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                _single_flight = SingleFlight()
+    return _single_flight
+
+
+def reset_single_flight() -> None:
+    global _single_flight
+    with _single_flight_lock:
+        _single_flight = None
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+
+# Stages reported in `Server-Timing` and in the request log line, in that order.
+STAGES = ("auth", "cache", "upstream", "validation", "serialization")
+
+
+class StageTimings:
+    """Seconds spent per stage while serving one request.
+
+    Time is summed per stage, so stages run concurrently (batch endpoints) can add
+    up to more than the request's total duration.
+    """
+
+    __slots__ = ("durations",)
+
+    def __init__(self) -> None:
+        self.durations: dict[str, float] = {}
+
+    def add(self, stage_name: str, seconds: float) -> None:
+        self.durations[stage_name] = self.durations.get(stage_name, 0.0) + seconds
+
+    def milliseconds(self, stage_name: str) -> float:
+        return round(self.durations.get(stage_name, 0.0) * 1000, 2)
+
+    def server_timing(self, total_seconds: float) -> str:
+        metrics = [f"{name};dur={self.milliseconds(name)}" for name in STAGES if name in self.durations]
+        metrics.append(f"total;dur={round(total_seconds * 1000, 2)}")
+        return ", ".join(metrics)
+
+
+_request_timings: ContextVar[StageTimings | None] = ContextVar("request_timings", default=None)
+
+
+def start_request_timings() -> tuple[StageTimings, Token[StageTimings | None]]:
+    timings = StageTimings()
+    return timings, _request_timings.set(timings)
+
+
+def finish_request_timings(token: Token[StageTimings | None]) -> None:
+    _request_timings.reset(token)
+
+
+def record_stage(stage_name: str, seconds: float) -> None:
+    """Add already measured time to the current request, if there is one."""
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.add(stage_name, seconds)
+
+
+@contextmanager
+def stage(stage_name: str) -> Iterator[None]:
+    timings = _request_timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(stage_name, time.perf_counter() - started)
@@ -1,13 +1,30 @@
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import get_settings
 from app.core.exceptions import register_exception_handlers
+from app.core.http_client import close_http_client, open_http_client
 from app.core.logging import setup_logging
 from app.core.middleware import RequestContextMiddleware
-from app.routers import auth, health, shopee_offers, shopee_products, shopee_short_links
+from app.core.request_capture import reset_request_capture
+from app.core.short_link_store import reset_short_link_store
+from app.routers import auth, health, metrics, shopee_offers, shopee_products, shopee_short_links
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    await open_http_client()
+    try:
+        yield
+    finally:
+        await close_http_client()
+        reset_short_link_store()
+        reset_request_capture()
 
 
 def create_app() -> FastAPI:
@@ -20,6 +37,7 @@ def create_app() -> FastAPI:
         docs_url=settings.docs_url,
         redoc_url=settings.redoc_url,
         openapi_url=settings.openapi_url,
+        lifespan=lifespan,
     )
 
     if settings.cors_enabled and settings.cors_allow_origins_list:
@@ -35,6 +53,8 @@ def create_app() -> FastAPI:
     register_exception_handlers(app)
 
     app.include_router(health.router, prefix="/api/v1")
+    if settings.metrics_enabled:
+        app.include_router(metrics.router, prefix="/api/v1")
     app.include_router(auth.router, prefix="/api/v1")
     app.include_router(shopee_short_links.router, prefix="/api/v1")
     app.include_router(shopee_products.router, prefix="/api/v1")
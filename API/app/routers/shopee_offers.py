@@ -1,33 +1,84 @@
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
+from typing import Any
+
 from fastapi import APIRouter, Depends
+from fastapi.responses import Response, StreamingResponse
 
+from app.core.config import get_settings
+from app.core.exceptions import ApiException
 from app.core.security import get_current_user
-from app.schemas.common import SuccessEnvelope, success_response
+from app.schemas.common import EncodedData, SuccessEnvelope, encoded_success_response, success_response
 from app.schemas.shopee_offers import (
     ProductFromUrlData,
     ProductFromUrlRequest,
+    ProductOfferSearchBatchData,
     ProductOfferSearchData,
+    ProductOffersSearchBatchRequest,
     ProductOffersSearchRequest,
+    ProductOffersStreamRequest,
+    ProductOfferV2Node,
     ShopOfferSearchData,
     ShopOffersSearchRequest,
 )
 from app.services.shopee_offer_service import (
     get_product_post_data_from_url,
-    search_product_offers,
-    search_shop_offers,
+    search_product_offers_batch,
+    search_product_offers_encoded,
+    search_shop_offers_encoded,
+    stream_product_offer_nodes,
 )
 
 router = APIRouter(prefix="/shopee/offers", tags=["shopee-offers"])
 
 
+def _search_response(data: EncodedData[Any], meta: dict[str, Any]) -> dict | Response:
+    # Cache hits reuse the pre-encoded `data` bytes and skip the encoder/response_model passes.
+    if meta.get("cached") and get_settings().cache_serve_encoded_responses:
+        return encoded_success_response(data, meta=meta)
+    return success_response(data.value, meta=meta)
+
+
 @router.post("/products/search", response_model=SuccessEnvelope[ProductOfferSearchData])
 async def product_offers_search(
     payload: ProductOffersSearchRequest,
     _: dict = Depends(get_current_user),
+) -> dict | Response:
+    data, cache_meta = await search_product_offers_encoded(payload)
+    return _search_response(data, {"operation": "productOfferV2", **cache_meta})
+
+
+@router.post("/products/search/batch", response_model=SuccessEnvelope[ProductOfferSearchBatchData])
+async def product_offers_search_batch(
+    payload: ProductOffersSearchBatchRequest,
+    _: dict = Depends(get_current_user),
 ) -> dict:
-    data, cached = await search_product_offers(payload)
-    return success_response(data, meta={"operation": "productOfferV2", "cached": cached})
+    data = await search_product_offers_batch(payload)
+    cached = all(item.cached for item in data.items)
+    return success_response(data, meta={"operation": "productOfferV2", "batch": True, "cached": cached})
+
+
+async def _ndjson_lines(nodes: AsyncIterator[ProductOfferV2Node]) -> AsyncIterator[bytes]:
+    try:
+        async for node in nodes:
+            yield node.model_dump_json().encode("utf-8") + b"\n"
+    except ApiException as exc:
+        # Headers are already sent: report the failure as the last line instead.
+        yield b'{"error":' + exc.to_error_body().model_dump_json(exclude_none=True).encode("utf-8") + b"}\n"
+
+
+@router.post(
+    "/products/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}, "description": "One ProductOfferV2Node per line"}},
+)
+async def product_offers_stream(
+    payload: ProductOffersStreamRequest,
+    _: dict = Depends(get_current_user),
+) -> StreamingResponse:
+    nodes = await stream_product_offer_nodes(payload.search_request(), max_items=payload.maxItems)
+    return StreamingResponse(_ndjson_lines(nodes), media_type="application/x-ndjson")
 
 
 @router.post("/products/from-url", response_model=SuccessEnvelope[ProductFromUrlData])
@@ -35,14 +86,14 @@ async def product_offers_from_url(
     payload: ProductFromUrlRequest,
     _: dict = Depends(get_current_user),
 ) -> dict:
-    data, cached = await get_product_post_data_from_url(payload)
-    return success_response(data, meta={"operation": "productFromUrl", "cached": cached})
+    data, cache_meta = await get_product_post_data_from_url(payload)
+    return success_response(data, meta={"operation": "productFromUrl", **cache_meta})
 
 
 @router.post("/shops/search", response_model=SuccessEnvelope[ShopOfferSearchData])
 async def shop_offers_search(
     payload: ShopOffersSearchRequest,
     _: dict = Depends(get_current_user),
-) -> dict:
-    data, cached = await search_shop_offers(payload)
-    return success_response(data, meta={"operation": "shopOfferV2", "cached": cached})
+) -> dict | Response:
+    data, cache_meta = await search_shop_offers_encoded(payload)
+    return _search_response(data, {"operation": "shopOfferV2", **cache_meta})
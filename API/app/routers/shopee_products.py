@@ -4,8 +4,13 @@ from fastapi import APIRouter, Depends
 
 from app.core.security import get_current_user
 from app.schemas.common import SuccessEnvelope, success_response
-from app.schemas.shopee_offers import ProductFromUrlData, ProductFromUrlRequest
-from app.services.shopee_offer_service import get_product_post_data_from_url
+from app.schemas.shopee_offers import (
+    ProductFromUrlBatchData,
+    ProductFromUrlBatchRequest,
+    ProductFromUrlData,
+    ProductFromUrlRequest,
+)
+from app.services.shopee_offer_service import get_product_post_data_from_url, get_product_post_data_from_urls_batch
 
 router = APIRouter(prefix="/shopee/products", tags=["shopee-products"])
 
@@ -15,6 +20,15 @@ async def product_from_url(
     payload: ProductFromUrlRequest,
     _: dict = Depends(get_current_user),
 ) -> dict:
-    data, cached = await get_product_post_data_from_url(payload)
-    return success_response(data, meta={"operation": "productFromUrl", "cached": cached})
+    data, cache_meta = await get_product_post_data_from_url(payload)
+    return success_response(data, meta={"operation": "productFromUrl", **cache_meta})
 
+
+@router.post("/from-url/batch", response_model=SuccessEnvelope[ProductFromUrlBatchData])
+async def product_from_url_batch(
+    payload: ProductFromUrlBatchRequest,
+    _: dict = Depends(get_current_user),
+) -> dict:
+    data = await get_product_post_data_from_urls_batch(payload)
+    cached = all(item.cached for item in data.items)
+    return success_response(data, meta={"operation": "productFromUrl", "batch": True, "cached": cached})
@@ -4,8 +4,13 @@ from fastapi import APIRouter, Depends
 
 from app.core.security import get_current_user
 from app.schemas.common import SuccessEnvelope, success_response
-from app.schemas.shopee_short_links import ShortLinkCreateRequest, ShortLinkData
-from app.services.shopee_short_link_service import generate_short_link
+from app.schemas.shopee_short_links import (
+    ShortLinkBatchData,
+    ShortLinkBatchRequest,
+    ShortLinkCreateRequest,
+    ShortLinkData,
+)
+from app.services.shopee_short_link_service import generate_short_link, generate_short_links_batch
 
 router = APIRouter(prefix="/shopee", tags=["shopee-short-links"])
 
@@ -15,5 +20,15 @@ async def create_short_link(
     payload: ShortLinkCreateRequest,
     _: dict = Depends(get_current_user),
 ) -> dict:
-    data = await generate_short_link(payload)
-    return success_response(data, meta={"operation": "generateShortLink", "cached": False})
+    data, cached = await generate_short_link(payload)
+    return success_response(data, meta={"operation": "generateShortLink", "cached": cached})
+
+
+@router.post("/short-links/batch", response_model=SuccessEnvelope[ShortLinkBatchData])
+async def create_short_links_batch(
+    payload: ShortLinkBatchRequest,
+    _: dict = Depends(get_current_user),
+) -> dict:
+    data = await generate_short_links_batch(payload)
+    cached = all(item.cached for item in data.items)
+    return success_response(data, meta={"operation": "generateShortLink", "batch": True, "cached": cached})
@@ -1,11 +1,17 @@
 from __future__ import annotations
 
+import json
+from dataclasses import dataclass
 from typing import Any, Generic, TypeVar
 
 from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
 from pydantic import BaseModel, Field
 
+from app.core.timing import stage
+
 T = TypeVar("T")
+ModelT = TypeVar("ModelT", bound=BaseModel)
 
 
 class ErrorBody(BaseModel):
@@ -32,15 +38,45 @@ class HealthData(BaseModel):
 
 
 def success_response(data: Any, meta: dict[str, Any] | None = None) -> dict[str, Any]:
-    payload: dict[str, Any] = {
-        "success": True,
-        "data": jsonable_encoder(data, exclude_none=True),
-    }
-    if meta is not None:
-        payload["meta"] = jsonable_encoder(meta, exclude_none=True)
+    with stage("serialization"):
+        payload: dict[str, Any] = {
+            "success": True,
+            "data": jsonable_encoder(data, exclude_none=True),
+        }
+        if meta is not None:
+            payload["meta"] = jsonable_encoder(meta, exclude_none=True)
     return payload
 
 
+@dataclass(frozen=True)
+class EncodedData(Generic[ModelT]):
+    """A validated model together with its `data` JSON, encoded once and reused."""
+
+    value: ModelT
+    json: bytes
+
+    @classmethod
+    def encode(cls, value: ModelT) -> "EncodedData[ModelT]":
+        with stage("serialization"):
+            return cls(value=value, json=value.model_dump_json().encode("utf-8"))
+
+
+def encoded_success_response(data: EncodedData[Any], meta: dict[str, Any] | None = None) -> Response:
+    # Byte-compatible with `success_response` rendered through `SuccessEnvelope[...]`.
+    body = b'{"success":true,"data":' + data.json
+    if meta is not None:
+        meta_json = json.dumps(
+            jsonable_encoder(meta, exclude_none=True),
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+        )
+        body += b',"meta":' + meta_json.encode("utf-8")
+    else:
+        body += b',"meta":null'
+    return Response(content=body + b"}", media_type="application/json")
+
+
 def error_response(
     *,
     code: str,
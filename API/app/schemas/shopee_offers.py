@@ -2,16 +2,41 @@ from __future__ import annotations
 
 from typing import Literal
 
-from pydantic import AnyHttpUrl, BaseModel, Field, field_validator, model_validator
+from pydantic import AnyHttpUrl, BaseModel, ConfigDict, Field, field_validator, model_validator
 
+from app.constants.graphql_queries import PRODUCT_OFFER_V2_NODE_FIELDS, SHOP_OFFER_V2_NODE_FIELDS
+from app.schemas.common import ErrorBody
 
+PRODUCT_SEARCH_BATCH_MAX_REQUESTS = 20
+PRODUCT_FROM_URL_BATCH_MAX_URLS = 50
+
+
+def _normalize_fields(value: list[str] | None, allowed: tuple[str, ...]) -> list[str] | None:
+    if value is None:
+        return None
+    requested = {item.strip() for item in value}
+    unknown = sorted(requested.difference(allowed))
+    if unknown:
+        raise ValueError("unknown fields: " + ", ".join(unknown))
+    if not requested:
+        raise ValueError("fields must not be empty")
+    # Canonical order keeps selection sets and cache keys stable; all fields means "default".
+    normalized = [field for field in allowed if field in requested]
+    return None if len(normalized) == len(allowed) else normalized
+
+
+# Search results are cached and shared between requests, so they are immutable.
 class PageInfo(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     limit: int | None = None
     hasNextPage: bool | None = None
     scrollId: str | None = None
 
 
 class ProductOfferV2Node(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     itemId: int | None = None
     commissionRate: str | None = None
     sellerCommissionRate: str | None = None
@@ -35,7 +60,9 @@ class ProductOfferV2Node(BaseModel):
 
 
 class ProductOfferSearchData(BaseModel):
-    nodes: list[ProductOfferV2Node]
+    model_config = ConfigDict(frozen=True)
+
+    nodes: tuple[ProductOfferV2Node, ...]
     pageInfo: PageInfo
 
 
@@ -44,6 +71,8 @@ class ProductFromUrlRequest(BaseModel):
 
 
 class ProductFromUrlData(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     shopId: int
     itemId: int
     productName: str | None = None
@@ -57,7 +86,26 @@ class ProductFromUrlData(BaseModel):
     commissionRate: str | None = None
 
 
+class ProductFromUrlBatchRequest(BaseModel):
+    urls: list[AnyHttpUrl] = Field(..., min_length=1, max_length=PRODUCT_FROM_URL_BATCH_MAX_URLS)
+
+
+class ProductFromUrlBatchItem(BaseModel):
+    index: int
+    url: str
+    success: bool
+    cached: bool = False
+    data: ProductFromUrlData | None = None
+    error: ErrorBody | None = None
+
+
+class ProductFromUrlBatchData(BaseModel):
+    items: list[ProductFromUrlBatchItem]
+
+
 class ShopOfferV2Node(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     commissionRate: str | None = None
     imageUrl: str | None = None
     offerLink: str | None = None
@@ -73,7 +121,9 @@ class ShopOfferV2Node(BaseModel):
 
 
 class ShopOfferSearchData(BaseModel):
-    nodes: list[ShopOfferV2Node]
+    model_config = ConfigDict(frozen=True)
+
+    nodes: tuple[ShopOfferV2Node, ...]
     pageInfo: PageInfo
 
 
@@ -89,6 +139,7 @@ class ProductOffersSearchRequest(BaseModel):
     limit: int = Field(default=20, ge=1, le=100)
     isAMSOffer: bool | None = None
     isKeySeller: bool | None = None
+    fields: list[str] | None = None
 
     @field_validator("keyword")
     @classmethod
@@ -98,6 +149,11 @@ class ProductOffersSearchRequest(BaseModel):
         trimmed = value.strip()
         return trimmed or None
 
+    @field_validator("fields")
+    @classmethod
+    def validate_fields(cls, value: list[str] | None) -> list[str] | None:
+        return _normalize_fields(value, PRODUCT_OFFER_V2_NODE_FIELDS)
+
     @model_validator(mode="after")
     def validate_filter_combinations(self) -> "ProductOffersSearchRequest":
         has_list_mode = self.listType is not None or self.matchId is not None
@@ -123,6 +179,30 @@ class ProductOffersSearchRequest(BaseModel):
         return self
 
 
+class ProductOffersStreamRequest(ProductOffersSearchRequest):
+    maxItems: int = Field(default=500, ge=1, le=5000)
+
+    def search_request(self) -> ProductOffersSearchRequest:
+        return ProductOffersSearchRequest.model_validate(self.model_dump(exclude={"maxItems"}, exclude_none=True))
+
+
+class ProductOffersSearchBatchRequest(BaseModel):
+    requests: list[ProductOffersSearchRequest] = Field(..., min_length=1, max_length=PRODUCT_SEARCH_BATCH_MAX_REQUESTS)
+
+
+class ProductOfferSearchBatchItem(BaseModel):
+    index: int
+    success: bool
+    cached: bool = False
+    stale: bool | None = None
+    data: ProductOfferSearchData | None = None
+    error: ErrorBody | None = None
+
+
+class ProductOfferSearchBatchData(BaseModel):
+    items: list[ProductOfferSearchBatchItem]
+
+
 class ShopOffersSearchRequest(BaseModel):
     shopId: int | None = None
     keyword: str | None = None
@@ -132,6 +212,7 @@ class ShopOffersSearchRequest(BaseModel):
     sellerCommCoveRatio: str | None = None
     page: int = Field(default=1, ge=1)
     limit: int = Field(default=20, ge=1, le=100)
+    fields: list[str] | None = None
 
     @field_validator("keyword")
     @classmethod
@@ -141,6 +222,11 @@ class ShopOffersSearchRequest(BaseModel):
         trimmed = value.strip()
         return trimmed or None
 
+    @field_validator("fields")
+    @classmethod
+    def validate_fields(cls, value: list[str] | None) -> list[str] | None:
+        return _normalize_fields(value, SHOP_OFFER_V2_NODE_FIELDS)
+
     @field_validator("shopType")
     @classmethod
     def validate_shop_type(cls, value: list[int] | None) -> list[int] | None:
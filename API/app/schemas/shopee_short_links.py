@@ -2,6 +2,10 @@ from __future__ import annotations
 
 from pydantic import AnyHttpUrl, BaseModel, Field, field_validator
 
+from app.schemas.common import ErrorBody
+
+SHORT_LINK_BATCH_MAX_ITEMS = 50
+
 
 class ShortLinkCreateRequest(BaseModel):
     originUrl: AnyHttpUrl
@@ -26,3 +30,19 @@ class ShortLinkCreateRequest(BaseModel):
 class ShortLinkData(BaseModel):
     shortLink: str = Field(..., min_length=1)
 
+
+class ShortLinkBatchRequest(BaseModel):
+    items: list[ShortLinkCreateRequest] = Field(..., min_length=1, max_length=SHORT_LINK_BATCH_MAX_ITEMS)
+
+
+class ShortLinkBatchItemResult(BaseModel):
+    index: int
+    originUrl: str
+    success: bool
+    shortLink: str | None = None
+    cached: bool = False
+    error: ErrorBody | None = None
+
+
+class ShortLinkBatchData(BaseModel):
+    items: list[ShortLinkBatchItemResult]
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from app.core.cache import get_cache_manager
+from app.core.circuit_breaker import get_circuit_breaker
+from app.core.credentials import get_credential_pool
+from app.core.metrics import get_metrics, render_samples
+from app.core.rate_limiter import rate_limiter_snapshots
+from app.core.singleflight import get_single_flight
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_CIRCUIT_STATES = ("closed", "open", "half_open")
+
+
+def _cache_lines() -> Iterable[str]:
+    stats = get_cache_manager().stats()
+    for field, name, metric_type, documentation in (
+        ("entries", "promoshare_cache_entries", "gauge", "Entries held by each cache store."),
+        ("bytes", "promoshare_cache_bytes", "gauge", "Approximate bytes held by each cache store."),
+        ("evictions", "promoshare_cache_evictions_total", "counter", "Entries evicted to respect size budgets."),
+    ):
+        yield from render_samples(
+            name, documentation, metric_type, ("cache",), (((cache,), store[field]) for cache, store in stats.items())
+        )
+
+
+def _credential_indexes() -> dict[str, str]:
+    """Label credentials by their position in the pool, so app ids never leave the process."""
+    return {state["appId"]: str(index) for index, state in enumerate(get_credential_pool().snapshot())}
+
+
+def _rate_limiter_lines() -> Iterable[str]:
+    indexes = _credential_indexes()
+    snapshots = sorted(
+        (indexes[app_id], snapshot) for app_id, snapshot in rate_limiter_snapshots().items() if app_id in indexes
+    )
+    for field, name, metric_type, documentation in (
+        ("rate", "promoshare_shopee_rate_limit_rps", "gauge", "Learned Shopee request rate per credential."),
+        ("queueDepth", "promoshare_shopee_rate_limit_queue_depth", "gauge", "Calls waiting for a rate limiter token."),
+        (
+            "queueTimeouts",
+            "promoshare_shopee_rate_limit_queue_timeouts_total",
+            "counter",
+            "Calls rejected after waiting too long for a token.",
+        ),
+    ):
+        yield from render_samples(
+            name,
+            documentation,
+            metric_type,
+            ("credential",),
+            (((credential,), snap[field]) for credential, snap in snapshots),
+        )
+
+
+def _circuit_breaker_lines() -> Iterable[str]:
+    breaker = get_circuit_breaker()
+    if breaker is None:
+        return
+    snapshot = breaker.snapshot()
+    yield from render_samples(
+        "promoshare_shopee_circuit_state",
+        "1 for the current circuit breaker state.",
+        "gauge",
+        ("state",),
+        (((state,), 1 if snapshot["state"] == state else 0) for state in _CIRCUIT_STATES),
+    )
+    yield from render_samples(
+        "promoshare_shopee_circuit_opened_total",
+        "Times the circuit breaker opened.",
+        "counter",
+        (),
+        [((), snapshot["timesOpened"])],
+    )
+
+
+def _credential_lines() -> Iterable[str]:
+    snapshot = get_credential_pool().snapshot()
+    yield from render_samples(
+        "promoshare_shopee_credential_cooling_down",
+        "1 while a credential is cooling down after a 10030 answer.",
+        "gauge",
+        ("credential",),
+        (((str(index),), 1 if state["coolingDown"] else 0) for index, state in enumerate(snapshot)),
+    )
+    for field, name, documentation in (
+        ("requests", "promoshare_shopee_credential_requests_total", "Shopee calls sent with each credential."),
+        ("successes", "promoshare_shopee_credential_successes_total", "Calls answered successfully with each credential."),
+        ("rateLimited", "promoshare_shopee_credential_rate_limited_total", "Calls answered with a 10030 rate limit error."),
+        ("failures", "promoshare_shopee_credential_failures_total", "Calls that failed with a transient error."),
+    ):
+        yield from render_samples(
+            name,
+            documentation,
+            "counter",
+            ("credential",),
+            (((str(index),), state[field]) for index, state in enumerate(snapshot)),
+        )
+
+
+def _single_flight_lines() -> Iterable[str]:
+    snapshot = get_single_flight().snapshot()
+    yield from render_samples(
+        "promoshare_singleflight_inflight",
+        "Upstream calls currently shared by coalesced callers.",
+        "gauge",
+        (),
+        [((), snapshot["inflight"])],
+    )
+    yield from render_samples(
+        "promoshare_singleflight_leaders_total",
+        "Upstream calls made on behalf of a coalescing key.",
+        "counter",
+        (),
+        [((), snapshot["leaders"])],
+    )
+    yield from render_samples(
+        "promoshare_singleflight_waiters_served_total",
+        "Callers answered by another caller's upstream call.",
+        "counter",
+        (),
+        [((), snapshot["waitersServed"])],
+    )
+    yield from render_samples(
+        "promoshare_singleflight_max_waiters",
+        "Most callers that ever waited on a single upstream call.",
+        "gauge",
+        (),
+        [((), snapshot["maxWaiters"])],
+    )
+
+
+def render_metrics() -> str:
+    lines: list[str] = []
+    for instrument in get_metrics().instruments():
+        lines.extend(instrument.render())
+    for collect in (_cache_lines, _rate_limiter_lines, _circuit_breaker_lines, _credential_lines, _single_flight_lines):
+        lines.extend(collect())
+    return "\n".join(lines) + "\n"
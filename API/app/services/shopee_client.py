@@ -1,39 +1,265 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+import random
+import time
 from typing import Any
 
 import httpx
 
+from app.core.circuit_breaker import BreakerCall, get_circuit_breaker
 from app.core.config import get_settings
-from app.core.exceptions import UpstreamShopeeException
+from app.core.credentials import ShopeeCredential, get_credential_pool
+from app.core.exceptions import ApiException, UpstreamShopeeException
+from app.core.http_client import get_http_client
+from app.core.metrics import get_metrics
+from app.core.rate_limiter import current_priority, get_rate_limiter
+from app.core.timing import record_stage
 from app.services.shopee_graphql_builder import compact_json
 from app.services.shopee_signing import build_shopee_signature
 
 
+logger = logging.getLogger(__name__)
+
+_GLOBAL_ERROR_CODES = frozenset({10020, 10030})
+
+
+def _map_graphql_error(error: Any, *, operation: str) -> UpstreamShopeeException:
+    message = error.get("message", "Shopee GraphQL error") if isinstance(error, dict) else str(error)
+    extensions = error.get("extensions", {}) if isinstance(error, dict) else {}
+    upstream_code = extensions.get("code") if isinstance(extensions, dict) else None
+    upstream_message = extensions.get("message") if isinstance(extensions, dict) else None
+
+    if upstream_code == 10030:
+        return UpstreamShopeeException(
+            status_code=429,
+            code="shopee_rate_limited",
+            message="Shopee API rate limit exceeded",
+            upstream={"operation": operation, "code": upstream_code, "message": upstream_message or message},
+        )
+    if upstream_code == 10020:
+        return UpstreamShopeeException(
+            status_code=502,
+            code="shopee_auth_error",
+            message="Shopee API authentication failed",
+            upstream={"operation": operation, "code": upstream_code, "message": upstream_message or message},
+        )
+
+    return UpstreamShopeeException(
+        status_code=502,
+        code="shopee_upstream_error",
+        message="Shopee API returned an error",
+        upstream={"operation": operation, "code": upstream_code, "message": upstream_message or message},
+    )
+
+
+def _is_rate_limit_error(error: Any) -> bool:
+    extensions = error.get("extensions") if isinstance(error, dict) else None
+    return isinstance(extensions, dict) and extensions.get("code") == 10030
+
+
+def _has_rate_limit_error(body: dict[str, Any]) -> bool:
+    errors = body.get("errors")
+    return isinstance(errors, list) and any(_is_rate_limit_error(error) for error in errors)
+
+
+def _is_transient(exc: UpstreamShopeeException) -> bool:
+    """Network failures and 5xx answers are worth retrying; other errors are not."""
+    if exc.code == "shopee_network_error":
+        return True
+    http_status = (exc.upstream or {}).get("httpStatus")
+    return isinstance(http_status, int) and http_status >= 500
+
+
+def _body_outcome(body: dict[str, Any]) -> str:
+    """Metrics outcome label for a parsed response: ok, rate_limited, auth_error or graphql_error."""
+    errors = body.get("errors")
+    if not errors:
+        return "ok"
+    codes = {
+        error.get("extensions", {}).get("code")
+        for error in (errors if isinstance(errors, list) else [errors])
+        if isinstance(error, dict) and isinstance(error.get("extensions"), dict)
+    }
+    if 10030 in codes:
+        return "rate_limited"
+    if 10020 in codes:
+        return "auth_error"
+    return "graphql_error"
+
+
+def _error_alias(error: Any) -> str | None:
+    if not isinstance(error, dict):
+        return None
+    extensions = error.get("extensions")
+    if isinstance(extensions, dict) and extensions.get("code") in _GLOBAL_ERROR_CODES:
+        return None
+    path = error.get("path")
+    if isinstance(path, list) and path and isinstance(path[0], str):
+        return path[0]
+    return None
+
+
 class ShopeeClient:
     def __init__(self) -> None:
         self.settings = get_settings()
+        # App id of the credential that answered the last call made by this client.
+        self.last_app_id: str | None = None
+
+    def _retry_delay(self, attempt: int) -> float:
+        # Full jitter: uniform over [0, base * 2^(attempt-1)], capped.
+        ceiling = min(
+            self.settings.shopee_retry_backoff_max_seconds,
+            self.settings.shopee_retry_backoff_base_seconds * (2 ** (attempt - 1)),
+        )
+        return random.uniform(0, ceiling)
+
+    async def _post(
+        self,
+        *,
+        query: str,
+        operation: str,
+        idempotent: bool,
+        credential: ShopeeCredential | None = None,
+    ) -> dict[str, Any]:
+        """POST a document, retrying transient failures within the request deadline.
+
+        Non-idempotent documents (mutations, unless `SHOPEE_RETRY_MUTATIONS`) are
+        sent once. A credential answered with 10030 is cooled down and the call moves
+        to another credential of the pool, since a rate-limited call was not executed.
+        `credential`, when given, is used until it is rate limited. The circuit
+        breaker is consulted before every attempt.
+        """
+        preferred = credential
+        breaker = get_circuit_breaker()
+        pool = get_credential_pool()
+        max_attempts = max(1, self.settings.shopee_retry_max_attempts) if idempotent else 1
+        deadline = time.monotonic() + self.settings.shopee_request_deadline_seconds
+        attempt = 0
+        throttled: set[str] = set()
+        while True:
+            call: BreakerCall | None = None
+            if breaker is not None:
+                try:
+                    call = breaker.before_call(operation=operation)
+                except UpstreamShopeeException:
+                    get_metrics().upstream_requests.inc(operation, "circuit_open")
+                    raise
+            if preferred is not None and preferred.app_id not in throttled:
+                credential = preferred
+            else:
+                credential = pool.select(exclude=throttled)
+            settled = False
+            try:
+                body = await self._post_once(credential=credential, query=query, operation=operation, deadline=deadline)
+                settled = True
+            except UpstreamShopeeException as exc:
+                settled = True
+                if not _is_transient(exc):
+                    # Shopee answered (4xx, GraphQL or auth error): it is up as far as the breaker cares.
+                    if call is not None:
+                        breaker.record_success(call)
+                    raise
+                pool.record_failure(credential.app_id)
+                if call is not None:
+                    breaker.record_failure(call)
+                attempt += 1
+                delay = self._retry_delay(attempt)
+                if attempt >= max_attempts or time.monotonic() + delay >= deadline:
+                    raise
+                logger.info("Retrying Shopee %s after %s (attempt %d)", operation, exc.code, attempt)
+                await asyncio.sleep(delay)
+                continue
+            finally:
+                # Limiter timeouts and cancellations end the attempt without an upstream answer.
+                if call is not None and not settled:
+                    breaker.release_probe(call)
+            if call is not None:
+                breaker.record_success(call)
 
-    async def execute(self, *, query: str, operation: str) -> dict[str, Any]:
+            self.last_app_id = credential.app_id
+            if not _has_rate_limit_error(body):
+                pool.record_success(credential.app_id)
+                return body
+            pool.record_rate_limited(credential.app_id)
+            throttled.add(credential.app_id)
+            if pool.available_count(exclude=throttled) == 0:
+                return body
+            logger.info(
+                "Shopee credential %s rate limited; moving %s to another credential", credential.app_id, operation
+            )
+
+    async def _post_once(
+        self,
+        *,
+        credential: ShopeeCredential,
+        query: str,
+        operation: str,
+        deadline: float,
+    ) -> dict[str, Any]:
+        limiter = get_rate_limiter(credential.app_id)
+        if limiter is not None:
+            try:
+                # Queue time counts against the request deadline.
+                await limiter.acquire(current_priority(), max_wait=max(0.0, deadline - time.monotonic()))
+            except ApiException:
+                get_metrics().upstream_requests.inc(operation, "limiter_timeout")
+                raise
+
+        # Signed after the queue wait, so the signature timestamp is current when sent.
         payload = {"query": query}
         payload_json = compact_json(payload)
         signature = build_shopee_signature(
-            app_id=self.settings.shopee_app_id,
-            app_secret=self.settings.shopee_app_secret,
+            app_id=credential.app_id,
+            app_secret=credential.app_secret,
             payload_json=payload_json,
         )
         headers = {
             "Content-Type": "application/json",
             "Authorization": signature.authorization_header,
         }
+        timeout = min(self.settings.shopee_timeout_seconds, max(0.0, deadline - time.monotonic()))
+
+        metrics = get_metrics()
+        started = time.perf_counter()
+        try:
+            body = await self._send(payload_json=payload_json, headers=headers, operation=operation, timeout=timeout)
+        except UpstreamShopeeException as exc:
+            elapsed = time.perf_counter() - started
+            outcome = exc.code.removeprefix("shopee_")
+            metrics.upstream_requests.inc(operation, outcome)
+            metrics.upstream_duration.observe(elapsed, operation, outcome)
+            record_stage("upstream", elapsed)
+            raise
+        elapsed = time.perf_counter() - started
+        outcome = _body_outcome(body)
+        metrics.upstream_requests.inc(operation, outcome)
+        metrics.upstream_duration.observe(elapsed, operation, outcome)
+        record_stage("upstream", elapsed)
+
+        if limiter is not None:
+            if outcome == "rate_limited":
+                limiter.on_rate_limited()
+            else:
+                limiter.on_success()
+        return body
 
+    async def _send(
+        self,
+        *,
+        payload_json: str,
+        headers: dict[str, str],
+        operation: str,
+        timeout: float,
+    ) -> dict[str, Any]:
         try:
-            async with httpx.AsyncClient(timeout=self.settings.shopee_timeout_seconds) as client:
-                response = await client.post(
-                    self.settings.shopee_graphql_url,
-                    content=payload_json.encode("utf-8"),
-                    headers=headers,
-                )
+            response = await get_http_client().post(
+                self.settings.shopee_graphql_url,
+                content=payload_json.encode("utf-8"),
+                headers=headers,
+                timeout=timeout,
+            )
         except httpx.HTTPError as exc:
             raise UpstreamShopeeException(
                 status_code=502,
@@ -71,38 +297,75 @@ class ShopeeClient:
                 message="Shopee API returned unexpected payload type",
                 upstream={"operation": operation},
             )
+        return body
+
+    def _is_idempotent(self, query: str, idempotent: bool | None) -> bool:
+        if idempotent is not None:
+            return idempotent
+        return not query.lstrip().startswith("mutation") or self.settings.shopee_retry_mutations
+
+    async def execute(
+        self,
+        *,
+        query: str,
+        operation: str,
+        idempotent: bool | None = None,
+        credential: ShopeeCredential | None = None,
+    ) -> dict[str, Any]:
+        body = await self._post(
+            query=query,
+            operation=operation,
+            idempotent=self._is_idempotent(query, idempotent),
+            credential=credential,
+        )
 
         errors = body.get("errors")
         if errors:
             first_error = errors[0] if isinstance(errors, list) and errors else {}
-            message = first_error.get("message", "Shopee GraphQL error") if isinstance(first_error, dict) else str(first_error)
-            extensions = first_error.get("extensions", {}) if isinstance(first_error, dict) else {}
-            upstream_code = extensions.get("code") if isinstance(extensions, dict) else None
-            upstream_message = extensions.get("message") if isinstance(extensions, dict) else None
-
-            if upstream_code == 10030:
-                raise UpstreamShopeeException(
-                    status_code=429,
-                    code="shopee_rate_limited",
-                    message="Shopee API rate limit exceeded",
-                    upstream={"operation": operation, "code": upstream_code, "message": upstream_message or message},
-                )
-            if upstream_code == 10020:
-                raise UpstreamShopeeException(
-                    status_code=502,
-                    code="shopee_auth_error",
-                    message="Shopee API authentication failed",
-                    upstream={"operation": operation, "code": upstream_code, "message": upstream_message or message},
-                )
+            raise _map_graphql_error(first_error, operation=operation)
 
+        data = body.get("data")
+        if not isinstance(data, dict):
             raise UpstreamShopeeException(
                 status_code=502,
-                code="shopee_upstream_error",
-                message="Shopee API returned an error",
-                upstream={"operation": operation, "code": upstream_code, "message": upstream_message or message},
+                code="shopee_missing_data",
+                message="Shopee API response missing data field",
+                upstream={"operation": operation},
             )
 
+        return data
+
+    async def execute_aliased(
+        self,
+        *,
+        query: str,
+        operation: str,
+        idempotent: bool | None = None,
+        credential: ShopeeCredential | None = None,
+    ) -> tuple[dict[str, Any], dict[str, UpstreamShopeeException]]:
+        """Execute a document made of aliased fields, tolerating per-alias errors.
+
+        Returns the `data` object plus errors keyed by alias. Errors that are not tied
+        to one alias (rate limit, auth, document-level) still raise.
+        """
+        body = await self._post(
+            query=query,
+            operation=operation,
+            idempotent=self._is_idempotent(query, idempotent),
+            credential=credential,
+        )
+
+        alias_errors: dict[str, UpstreamShopeeException] = {}
+        errors = body.get("errors") or []
+        for error in errors if isinstance(errors, list) else [errors]:
+            alias = _error_alias(error)
+            if alias is None:
+                raise _map_graphql_error(error, operation=operation)
+            alias_errors.setdefault(alias, _map_graphql_error(error, operation=operation))
+
         data = body.get("data")
+        if data is None and alias_errors:
+            data = {}
         if not isinstance(data, dict):
             raise UpstreamShopeeException(
                 status_code=502,
@@ -111,5 +374,4 @@ class ShopeeClient:
                 upstream={"operation": operation},
             )
 
-        return data
-
+        return data, alias_errors
@@ -5,11 +5,14 @@ from decimal import Decimal
 from typing import Any
 
 from app.constants.graphql_queries import (
+    PAGE_INFO_SELECTION_SET,
     PRODUCT_OFFER_V2_SELECTION_SET,
     SHOP_OFFER_V2_SELECTION_SET,
     SHORT_LINK_SELECTION_SET,
 )
 
+DEFAULT_SELECTION_SET_VERSION = "default-v1"
+
 
 def compact_json(payload: dict[str, Any], *, sort_keys: bool = False) -> str:
     return json.dumps(payload, separators=(",", ":"), ensure_ascii=False, sort_keys=sort_keys)
@@ -44,19 +47,35 @@ def _args_literal(values: dict[str, Any]) -> str:
     return "(" + ",".join(f"{key}:{graphql_literal(value)}" for key, value in normalized.items()) + ")"
 
 
+def selection_set_version(fields: tuple[str, ...] | None) -> str:
+    """Cache-key component identifying which node fields a cached connection holds."""
+    if fields is None:
+        return DEFAULT_SELECTION_SET_VERSION
+    return "fields-v1:" + ",".join(fields)
+
+
+def _connection_selection_set(default: str, fields: tuple[str, ...] | None) -> str:
+    if fields is None:
+        return default
+    return "nodes{\n" + "\n".join(fields) + "\n}\n" + PAGE_INFO_SELECTION_SET
+
+
 def _compact_graphql(document: str) -> str:
     # Keep inner string contents untouched; only remove indentation/newlines we add in templates.
     return document.strip().replace("\n", " ").replace("\r", "").replace("\t", " ")
 
 
-def build_generate_short_link_mutation(*, origin_url: str, sub_ids: list[str] | None) -> str:
+def _short_link_input_literal(origin_url: str, sub_ids: list[str] | None) -> str:
     input_payload: dict[str, Any] = {"originUrl": origin_url}
     if sub_ids is not None:
         input_payload["subIds"] = sub_ids
+    return graphql_literal(input_payload)
 
+
+def build_generate_short_link_mutation(*, origin_url: str, sub_ids: list[str] | None) -> str:
     query = f"""
     mutation {{
-      generateShortLink(input:{graphql_literal(input_payload)}) {{
+      generateShortLink(input:{_short_link_input_literal(origin_url, sub_ids)}) {{
         {SHORT_LINK_SELECTION_SET}
       }}
     }}
@@ -64,24 +83,47 @@ def build_generate_short_link_mutation(*, origin_url: str, sub_ids: list[str] |
     return _compact_graphql(query)
 
 
-def build_product_offer_v2_query(filters: dict[str, Any]) -> str:
+def build_generate_short_link_batch_mutation(items: dict[str, tuple[str, list[str] | None]]) -> str:
+    """Build one mutation with an aliased `generateShortLink` field per `alias -> (originUrl, subIds)`."""
+    fields = "\n".join(
+        f"{alias}: generateShortLink(input:{_short_link_input_literal(origin_url, sub_ids)}) {{ {SHORT_LINK_SELECTION_SET} }}"
+        for alias, (origin_url, sub_ids) in items.items()
+    )
+    return _compact_graphql(f"mutation {{\n{fields}\n}}")
+
+
+def build_product_offer_v2_query(filters: dict[str, Any], *, fields: tuple[str, ...] | None = None) -> str:
     args = _args_literal(filters)
     query = f"""
     {{
       productOfferV2{args} {{
-        {PRODUCT_OFFER_V2_SELECTION_SET}
+        {_connection_selection_set(PRODUCT_OFFER_V2_SELECTION_SET, fields)}
       }}
     }}
     """
     return _compact_graphql(query)
 
 
-def build_shop_offer_v2_query(filters: dict[str, Any]) -> str:
+def build_product_offer_v2_batch_query(
+    filters_by_alias: dict[str, dict[str, Any]],
+    *,
+    fields_by_alias: dict[str, tuple[str, ...] | None] | None = None,
+) -> str:
+    """Build one query with an aliased `productOfferV2` selection per `alias -> filters`."""
+    fields_by_alias = fields_by_alias or {}
+    selections = []
+    for alias, filters in filters_by_alias.items():
+        selection_set = _connection_selection_set(PRODUCT_OFFER_V2_SELECTION_SET, fields_by_alias.get(alias))
+        selections.append(f"{alias}: productOfferV2{_args_literal(filters)} {{ {selection_set} }}")
+    return _compact_graphql("{\n" + "\n".join(selections) + "\n}")
+
+
+def build_shop_offer_v2_query(filters: dict[str, Any], *, fields: tuple[str, ...] | None = None) -> str:
     args = _args_literal(filters)
     query = f"""
     {{
       shopOfferV2{args} {{
-        {SHOP_OFFER_V2_SELECTION_SET}
+        {_connection_selection_set(SHOP_OFFER_V2_SELECTION_SET, fields)}
       }}
     }}
     """
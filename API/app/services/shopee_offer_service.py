@@ -1,27 +1,57 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 import re
-from urllib.parse import urlparse
-from typing import Any
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass, replace
+from urllib.parse import urljoin, urlparse
+from typing import Any, Generic, TypeVar
 
 import httpx
+from pydantic import BaseModel
 
+from app.core.cache import CacheEntry, get_cache_manager
 from app.core.config import get_settings
-from app.constants.graphql_queries import SELECTION_SET_VERSION
-from app.core.cache import get_cache_manager
 from app.core.exceptions import ApiException, UpstreamShopeeException
+from app.core.http_client import get_http_client
+from app.core.rate_limiter import Priority, with_priority
+from app.core.short_link_store import normalize_origin_url
+from app.core.singleflight import get_single_flight
+from app.core.timing import stage
+from app.schemas.common import EncodedData, ErrorBody
 from app.schemas.shopee_offers import (
+    PRODUCT_SEARCH_BATCH_MAX_REQUESTS,
+    PageInfo,
+    ProductFromUrlBatchData,
+    ProductFromUrlBatchItem,
+    ProductFromUrlBatchRequest,
     ProductFromUrlData,
     ProductFromUrlRequest,
+    ProductOfferSearchBatchData,
+    ProductOfferSearchBatchItem,
     ProductOfferSearchData,
+    ProductOffersSearchBatchRequest,
     ProductOffersSearchRequest,
+    ProductOfferV2Node,
     ShopOfferSearchData,
     ShopOffersSearchRequest,
 )
-from app.schemas.shopee_short_links import ShortLinkCreateRequest
+from app.schemas.shopee_short_links import ShortLinkBatchRequest, ShortLinkCreateRequest
 from app.services.shopee_client import ShopeeClient
-from app.services.shopee_graphql_builder import build_product_offer_v2_query, build_shop_offer_v2_query
-from app.services.shopee_short_link_service import generate_short_link
+from app.services.shopee_graphql_builder import (
+    build_product_offer_v2_batch_query,
+    build_product_offer_v2_query,
+    build_shop_offer_v2_query,
+    selection_set_version,
+)
+from app.services.shopee_short_link_service import generate_short_link, generate_short_links_batch
+
+logger = logging.getLogger(__name__)
+
+ConnectionT = TypeVar("ConnectionT", bound=BaseModel)
+T = TypeVar("T")
 
 
 def _validate_connection_payload(payload: Any, *, operation: str) -> dict[str, Any]:
@@ -74,14 +104,43 @@ def _should_try_shopee_short_link_resolution(url: str) -> bool:
     return host.startswith("s.shopee.") or host.startswith("l.shopee.")
 
 
-async def resolve_shopee_product_url(url: str) -> str:
-    if not _should_try_shopee_short_link_resolution(url):
-        return url
+_MAX_REDIRECT_HOPS = 10
+
+
+async def _resolve_product_ids(url: str) -> tuple[tuple[int, int], bool | None]:
+    """Return `(shopId, itemId)` and whether share-link resolution was a cache hit
+    (None when the URL carried the ids and nothing had to be resolved).
+
+    Share-link redirects are followed hop by hop without reading any response body,
+    stopping at the first Location that carries the ids; resolved links are memoized.
+    """
+    try:
+        return parse_shopee_product_url_ids(url), None
+    except ApiException:
+        if not _should_try_shopee_short_link_resolution(url):
+            raise
+
+    cache = get_cache_manager()
+    cached_ids = cache.get("resolved_links", url)
+    if cached_ids is not None:
+        return cached_ids, True
 
-    settings = get_settings()
+    client = get_http_client()
+    current_url = url
     try:
-        async with httpx.AsyncClient(timeout=settings.shopee_timeout_seconds, follow_redirects=True) as client:
-            response = await client.get(url)
+        for _ in range(_MAX_REDIRECT_HOPS):
+            response = await client.send(client.build_request("GET", current_url), stream=True, follow_redirects=False)
+            await response.aclose()
+            location = response.headers.get("location")
+            if not response.is_redirect or not location:
+                break
+            current_url = urljoin(current_url, location)
+            try:
+                ids = parse_shopee_product_url_ids(current_url)
+            except ApiException:
+                continue
+            cache.set("resolved_links", url, ids)
+            return ids, False
     except httpx.HTTPError as exc:
         raise ApiException(
             status_code=502,
@@ -90,59 +149,508 @@ async def resolve_shopee_product_url(url: str) -> str:
             details={"url": url, "reason": str(exc)},
         ) from exc
 
-    return str(response.url)
+    return parse_shopee_product_url_ids(current_url), False
+
+
+_background_refreshes: set[asyncio.Task[Any]] = set()
+
+
+def _schedule_refresh(flight_key: str, fetch: Callable[[], Awaitable[Any]]) -> None:
+    flight = get_single_flight()
+    if flight.is_inflight(flight_key):
+        return
+
+    async def refresh() -> None:
+        try:
+            await flight.run(flight_key, fetch)
+        except Exception:
+            logger.warning("Background cache refresh failed for key=%s", flight_key, exc_info=True)
+
+    task = asyncio.create_task(refresh())
+    _background_refreshes.add(task)
+    task.add_done_callback(_background_refreshes.discard)
+
+
+async def _cancel_task(task: asyncio.Task[Any]) -> None:
+    """Cancel `task` and wait for it, swallowing only its own outcome.
+
+    A cancellation of the calling task while it waits still propagates.
+    """
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+@dataclass(frozen=True)
+class _SearchPlan(Generic[ConnectionT]):
+    cache_name: str
+    operation: str
+    filters: dict[str, Any]
+    fields: tuple[str, ...] | None
+    cache_key: str
+    # Key of the all-fields entry, which can answer a sparse `fields` request.
+    superset_key: str | None
+    # Page-1 entries are keyed without `limit`; any cached page 1 with enough nodes
+    # answers a smaller limit (see `_fit_page_window`).
+    window_limit: int | None
+    build_query: Callable[..., str]
+    model: type[ConnectionT]
+
+    @property
+    def flight_key(self) -> str:
+        # Requests sharing a page-1 key but asking for different limits must not coalesce.
+        return self.cache_key if self.window_limit is None else f"{self.cache_key}:limit={self.window_limit}"
+
+
+def _canonical_key_filters(filters: dict[str, Any]) -> tuple[dict[str, Any], int | None]:
+    key_filters = dict(filters)
+    keyword = key_filters.get("keyword")
+    if isinstance(keyword, str):
+        key_filters["keyword"] = " ".join(keyword.split()).casefold()
+    window_limit = None
+    if key_filters.get("page") == 1 and "limit" in key_filters:
+        window_limit = key_filters.pop("limit")
+    return key_filters, window_limit
+
+
+def _plan_search(
+    *,
+    cache_name: str,
+    operation: str,
+    payload: BaseModel,
+    build_query: Callable[..., str],
+    model: type[ConnectionT],
+) -> _SearchPlan[ConnectionT]:
+    cache = get_cache_manager()
+    # model_dump fills defaults (page/limit), so omitted and explicit defaults share a key.
+    filters = payload.model_dump(exclude_none=True)
+    requested_fields = filters.pop("fields", None)
+    fields = tuple(requested_fields) if requested_fields else None
+    key_filters, window_limit = _canonical_key_filters(filters)
+    return _SearchPlan(
+        cache_name=cache_name,
+        operation=operation,
+        filters=filters,
+        fields=fields,
+        cache_key=cache.build_key(operation, key_filters, selection_set_version(fields)),
+        superset_key=None if fields is None else cache.build_key(operation, key_filters, selection_set_version(None)),
+        window_limit=window_limit,
+        build_query=build_query,
+        model=model,
+    )
+
+
+def _validated_connection(plan: _SearchPlan[ConnectionT], payload: Any) -> ConnectionT:
+    with stage("validation"):
+        return plan.model.model_validate(_validate_connection_payload(payload, operation=plan.operation))
+
+
+def _store_connection(plan: _SearchPlan[ConnectionT], payload: Any, *, compute_seconds: float) -> EncodedData[ConnectionT]:
+    result = EncodedData.encode(_validated_connection(plan, payload))
+    get_cache_manager().set(plan.cache_name, plan.cache_key, result, compute_seconds=compute_seconds)
+    if plan.cache_name == "product_offers" and plan.fields is None:
+        _index_product_nodes(result.value.nodes)
+    return result
 
 
-async def search_product_offers(payload: ProductOffersSearchRequest) -> tuple[ProductOfferSearchData, bool]:
+def _index_product_nodes(nodes: tuple[ProductOfferV2Node, ...]) -> None:
     cache = get_cache_manager()
-    request_data = payload.model_dump(exclude_none=True)
-    cache_key = cache.build_key("productOfferV2", request_data, SELECTION_SET_VERSION)
+    for node in nodes:
+        if node.itemId is not None:
+            cache.set("product_items", str(node.itemId), node)
+
+
+def _indexed_item_search(
+    plan: _SearchPlan[ProductOfferSearchData],
+) -> tuple[EncodedData[ProductOfferSearchData], dict[str, Any]] | None:
+    """Answer a page-1 search filtered only by itemId from the itemId index."""
+    filters = plan.filters
+    if "itemId" not in filters or filters.get("page") != 1 or set(filters) - {"itemId", "page", "limit"}:
+        return None
+    node = get_cache_manager().get("product_items", str(filters["itemId"]))
+    if node is None:
+        return None
+    data = ProductOfferSearchData(nodes=(node,), pageInfo=PageInfo(limit=filters["limit"], hasNextPage=False))
+    encoded = EncodedData.encode(data)
+    if plan.fields is not None:
+        encoded = _project_connection(encoded, plan)
+    return encoded, {"cached": True}
+
+
+def _fit_page_window(
+    connection: EncodedData[ConnectionT],
+    plan: _SearchPlan[ConnectionT],
+) -> EncodedData[ConnectionT] | None:
+    """Answer a page-1 request from a cached page 1, or None if it holds too few nodes."""
+    limit = plan.window_limit
+    if limit is None:
+        return connection
+    value = connection.value
+    nodes = value.nodes
+    # pageInfo.limit echoes the limit the entry was fetched with; a short page fetched
+    # with a smaller limit cannot tell whether more nodes exist.
+    if len(nodes) < limit and value.pageInfo.hasNextPage and (value.pageInfo.limit or 0) < limit:
+        return None
+    if len(nodes) <= limit and value.pageInfo.limit == limit:
+        return connection
+    page_info = value.pageInfo.model_copy(
+        update={"limit": limit, "hasNextPage": True if len(nodes) > limit else value.pageInfo.hasNextPage}
+    )
+    return EncodedData.encode(value.model_copy(update={"nodes": nodes[:limit], "pageInfo": page_info}))
+
+
+def _project_connection(
+    connection: EncodedData[ConnectionT],
+    plan: _SearchPlan[ConnectionT],
+) -> EncodedData[ConnectionT]:
+    include = {"nodes": {"__all__": set(plan.fields or ())}, "pageInfo": True}
+    with stage("validation"):
+        projected = plan.model.model_validate(connection.value.model_dump(include=include))
+    return EncodedData.encode(projected)
+
+
+def _hit_meta(entry: CacheEntry) -> dict[str, Any]:
+    cache_meta: dict[str, Any] = {"cached": True}
+    if entry.stale:
+        cache_meta["stale"] = True
+    return cache_meta
+
+
+def _plan_fetcher(plan: _SearchPlan[ConnectionT]) -> Callable[[], Awaitable[EncodedData[ConnectionT]]]:
+    async def fetch() -> EncodedData[ConnectionT]:
+        started = time.perf_counter()
+        client = ShopeeClient()
+        query = plan.build_query(plan.filters, fields=plan.fields)
+        data = await client.execute(query=query, operation=plan.operation)
+        return _store_connection(plan, data.get(plan.operation), compute_seconds=time.perf_counter() - started)
+
+    return fetch
 
-    cached = cache.get("product_offers", cache_key)
+
+def _refresh_plan(plan: _SearchPlan[ConnectionT], entry: CacheEntry) -> _SearchPlan[ConnectionT]:
+    """Refetch a page-1 entry at its own limit, so a smaller-limit hit does not shrink the shared page."""
+    if plan.window_limit is None:
+        return plan
+    limit = max(entry.value.value.pageInfo.limit or 0, plan.window_limit)
+    return replace(plan, filters={**plan.filters, "limit": limit}, window_limit=limit)
+
+
+def _cached_connection(plan: _SearchPlan[ConnectionT]) -> tuple[EncodedData[ConnectionT], dict[str, Any]] | None:
+    cache = get_cache_manager()
+    entry = cache.lookup(plan.cache_name, plan.cache_key)
+    if entry is not None:
+        fitted = _fit_page_window(entry.value, plan)
+        if fitted is not None:
+            if entry.refresh:
+                refresh_plan = _refresh_plan(plan, entry)
+                _schedule_refresh(refresh_plan.flight_key, _plan_fetcher(refresh_plan))
+            return fitted, _hit_meta(entry)
+
+    if plan.superset_key is None:
+        return None
+    entry = cache.lookup(plan.cache_name, plan.superset_key)
+    if entry is None:
+        return None
+    fitted = _fit_page_window(entry.value, plan)
+    if fitted is None:
+        return None
+    if entry.refresh:
+        full_plan = _refresh_plan(replace(plan, fields=None, cache_key=plan.superset_key, superset_key=None), entry)
+        _schedule_refresh(full_plan.flight_key, _plan_fetcher(full_plan))
+    return _project_connection(fitted, plan), _hit_meta(entry)
+
+
+async def _search_connection(plan: _SearchPlan[ConnectionT]) -> tuple[EncodedData[ConnectionT], dict[str, Any]]:
+    cached = _cached_connection(plan)
     if cached is not None:
-        return ProductOfferSearchData.model_validate(cached), True
+        return cached
+
+    try:
+        result, _ = await get_single_flight().run(plan.flight_key, _plan_fetcher(plan))
+    except UpstreamShopeeException as exc:
+        fallback = _stale_if_error(plan, exc)
+        if fallback is None:
+            raise
+        return fallback
+    return result, {"cached": False}
 
-    client = ShopeeClient()
-    query = build_product_offer_v2_query(request_data)
-    data = await client.execute(query=query, operation="productOfferV2")
 
-    connection = _validate_connection_payload(data.get("productOfferV2"), operation="productOfferV2")
-    cache.set("product_offers", cache_key, connection)
-    return ProductOfferSearchData.model_validate(connection), False
+# Upstream outages (as opposed to bad requests) during which an expired entry beats an error.
+_STALE_IF_ERROR_CODES = frozenset({"shopee_circuit_open", "shopee_network_error", "shopee_http_error"})
 
 
-async def search_shop_offers(payload: ShopOffersSearchRequest) -> tuple[ShopOfferSearchData, bool]:
+def _stale_if_error(
+    plan: _SearchPlan[ConnectionT],
+    exc: UpstreamShopeeException,
+) -> tuple[EncodedData[ConnectionT], dict[str, Any]] | None:
+    if exc.code not in _STALE_IF_ERROR_CODES:
+        return None
     cache = get_cache_manager()
-    request_data = payload.model_dump(exclude_none=True)
-    cache_key = cache.build_key("shopOfferV2", request_data, SELECTION_SET_VERSION)
+    for key in (plan.cache_key, plan.superset_key):
+        entry = None if key is None else cache.lookup_if_error(plan.cache_name, key)
+        fitted = None if entry is None else _fit_page_window(entry.value, plan)
+        if fitted is None:
+            continue
+        if key == plan.superset_key:
+            fitted = _project_connection(fitted, plan)
+        logger.warning("Serving stale %s entry after upstream error %s", plan.operation, exc.code)
+        return fitted, {"cached": True, "stale": True}
+    return None
+
+
+def _product_offers_plan(payload: ProductOffersSearchRequest) -> _SearchPlan[ProductOfferSearchData]:
+    return _plan_search(
+        cache_name="product_offers",
+        operation="productOfferV2",
+        payload=payload,
+        build_query=build_product_offer_v2_query,
+        model=ProductOfferSearchData,
+    )
 
-    cached = cache.get("shop_offers", cache_key)
-    if cached is not None:
-        return ShopOfferSearchData.model_validate(cached), True
 
+async def search_product_offers_encoded(
+    payload: ProductOffersSearchRequest,
+) -> tuple[EncodedData[ProductOfferSearchData], dict[str, Any]]:
+    plan = _product_offers_plan(payload)
+    indexed = _indexed_item_search(plan)
+    if indexed is not None:
+        return indexed
+    return await _search_connection(plan)
+
+
+async def search_product_offers(
+    payload: ProductOffersSearchRequest,
+) -> tuple[ProductOfferSearchData, dict[str, Any]]:
+    encoded, cache_meta = await search_product_offers_encoded(payload)
+    return encoded.value, cache_meta
+
+
+@with_priority(Priority.BULK)
+async def search_product_offers_batch(payload: ProductOffersSearchBatchRequest) -> ProductOfferSearchBatchData:
+    plans = [_product_offers_plan(request) for request in payload.requests]
+
+    results: dict[str, EncodedData[ProductOfferSearchData]] = {}
+    hit_meta: dict[str, dict[str, Any]] = {}
+    for plan in plans:
+        if plan.flight_key in hit_meta:
+            continue
+        cached = _indexed_item_search(plan) or _cached_connection(plan)
+        if cached is not None:
+            results[plan.flight_key], hit_meta[plan.flight_key] = cached
+
+    # One aliased productOfferV2 selection per distinct request still missing.
+    aliases: dict[str, str] = {}
+    pending: dict[str, _SearchPlan[ProductOfferSearchData]] = {}
+    for plan in plans:
+        if plan.flight_key in results or plan.flight_key in aliases:
+            continue
+        alias = f"q{len(aliases)}"
+        aliases[plan.flight_key] = alias
+        pending[alias] = plan
+
+    errors: dict[str, ApiException] = {}
+    if pending:
+        started = time.perf_counter()
+        client = ShopeeClient()
+        query = build_product_offer_v2_batch_query(
+            {alias: plan.filters for alias, plan in pending.items()},
+            fields_by_alias={alias: plan.fields for alias, plan in pending.items()},
+        )
+        try:
+            data, alias_errors = await client.execute_aliased(query=query, operation="productOfferV2")
+        except ApiException as exc:
+            # A whole-document failure (10030, circuit open, network) fails only the requests that missed the cache.
+            data, alias_errors = {}, {alias: exc for alias in pending}
+            if isinstance(exc, UpstreamShopeeException):
+                for alias, plan in pending.items():
+                    fallback = _stale_if_error(plan, exc)
+                    if fallback is not None:
+                        results[plan.flight_key], hit_meta[plan.flight_key] = fallback
+                        del alias_errors[alias]
+        compute_seconds = time.perf_counter() - started
+        for alias, plan in pending.items():
+            if plan.flight_key in results:
+                continue
+            if alias in alias_errors:
+                errors[plan.flight_key] = alias_errors[alias]
+                continue
+            try:
+                results[plan.flight_key] = _store_connection(plan, data.get(alias), compute_seconds=compute_seconds)
+            except ApiException as exc:
+                errors[plan.flight_key] = exc
+
+    items: list[ProductOfferSearchBatchItem] = []
+    for index, plan in enumerate(plans):
+        if plan.flight_key in results:
+            meta = hit_meta.get(plan.flight_key, {"cached": False})
+            items.append(
+                ProductOfferSearchBatchItem(
+                    index=index,
+                    success=True,
+                    cached=meta["cached"],
+                    stale=meta.get("stale"),
+                    data=results[plan.flight_key].value,
+                )
+            )
+        else:
+            error = errors[plan.flight_key].to_error_body()
+            items.append(ProductOfferSearchBatchItem(index=index, success=False, error=error))
+    return ProductOfferSearchBatchData(items=items)
+
+
+async def _stream_page(payload: ProductOffersSearchRequest) -> ProductOfferSearchData:
+    """One stream page: answered from the cache when present, but never stored.
+
+    Stream pages (up to `maxItems` nodes each) would otherwise push the interactive
+    working set out of the byte-budgeted cache and the itemId index.
+    """
+    plan = _product_offers_plan(payload)
+    cached = _cached_connection(plan)
+    if cached is not None:
+        return cached[0].value
     client = ShopeeClient()
-    query = build_shop_offer_v2_query(request_data)
-    data = await client.execute(query=query, operation="shopOfferV2")
+    data = await client.execute(query=plan.build_query(plan.filters, fields=plan.fields), operation=plan.operation)
+    return _validated_connection(plan, data.get(plan.operation))
+
+
+@with_priority(Priority.BULK)
+async def stream_product_offer_nodes(
+    payload: ProductOffersSearchRequest,
+    *,
+    max_items: int,
+) -> AsyncIterator[ProductOfferV2Node]:
+    """Fetch the first page eagerly (so its errors surface as a normal response) and
+    return an iterator that walks the following pages with one page of prefetch."""
+    first_page = await _stream_page(payload)
+    return _walk_product_offer_pages(payload, first_page, max_items=max_items)
+
+
+async def _walk_product_offer_pages(
+    payload: ProductOffersSearchRequest,
+    page_data: ProductOfferSearchData,
+    *,
+    max_items: int,
+) -> AsyncIterator[ProductOfferV2Node]:
+    page = payload.page
+    emitted = 0
+    next_page: asyncio.Task[ProductOfferSearchData] | None = None
+    try:
+        while True:
+            if page_data.pageInfo.hasNextPage and page_data.nodes and emitted + len(page_data.nodes) < max_items:
+                next_payload = payload.model_copy(update={"page": page + 1})
+                # Prefetch tasks start from the streaming context, so re-tag them as bulk.
+                next_page = asyncio.create_task(with_priority(Priority.BULK)(_stream_page)(next_payload))
+
+            for node in page_data.nodes:
+                if emitted >= max_items:
+                    return
+                emitted += 1
+                yield node
+
+            if next_page is None:
+                return
+            page_data = await next_page
+            next_page = None
+            page += 1
+    finally:
+        if next_page is not None:
+            await _cancel_task(next_page)
+
+
+async def search_shop_offers_encoded(
+    payload: ShopOffersSearchRequest,
+) -> tuple[EncodedData[ShopOfferSearchData], dict[str, Any]]:
+    plan = _plan_search(
+        cache_name="shop_offers",
+        operation="shopOfferV2",
+        payload=payload,
+        build_query=build_shop_offer_v2_query,
+        model=ShopOfferSearchData,
+    )
+    return await _search_connection(plan)
+
+
+# Failures worth remembering briefly: retrying them cannot succeed until the listing changes.
+_NEGATIVE_CACHE_CODES = frozenset({"product_not_found", "invalid_product_url"})
 
-    connection = _validate_connection_payload(data.get("shopOfferV2"), operation="shopOfferV2")
-    cache.set("shop_offers", cache_key, connection)
-    return ShopOfferSearchData.model_validate(connection), False
 
+def _remember_failure(key: str, exc: ApiException) -> None:
+    if exc.code in _NEGATIVE_CACHE_CODES:
+        failure = {"status_code": exc.status_code, "code": exc.code, "message": exc.message, "details": exc.details}
+        get_cache_manager().set("product_from_url_failures", key, failure)
 
-async def get_product_post_data_from_url(payload: ProductFromUrlRequest) -> tuple[ProductFromUrlData, bool]:
-    raw_url = str(payload.url)
-    resolved_url = await resolve_shopee_product_url(raw_url)
 
+def _raise_remembered_failure(key: str) -> None:
+    failure = get_cache_manager().get("product_from_url_failures", key)
+    if failure is not None:
+        raise ApiException(**failure)
+
+
+async def _resolve_url_with_failure_cache(raw_url: str) -> tuple[tuple[int, int], bool | None]:
+    url_key = f"url:{raw_url}"
+    _raise_remembered_failure(url_key)
     try:
-        shop_id, item_id = parse_shopee_product_url_ids(raw_url)
+        return await _resolve_product_ids(raw_url)
     except ApiException as exc:
-        if exc.code != "invalid_product_url":
-            raise
-        shop_id, item_id = parse_shopee_product_url_ids(resolved_url)
+        _remember_failure(url_key, exc)
+        raise
+
 
-    search_payload = ProductOffersSearchRequest(itemId=item_id, page=1, limit=1)
-    data, cached = await search_product_offers(search_payload)
+def _cached_product_post_data(shop_id: int, item_id: int) -> ProductFromUrlData | None:
+    product_key = f"{shop_id}:{item_id}"
+    _raise_remembered_failure(f"item:{product_key}")
+    return get_cache_manager().get("product_from_url", product_key)
 
+
+@with_priority(Priority.INTERACTIVE)
+async def get_product_post_data_from_url(payload: ProductFromUrlRequest) -> tuple[ProductFromUrlData, dict[str, Any]]:
+    """Return post-ready product data plus cache meta with a per-stage hit map."""
+    (shop_id, item_id), resolution_cached = await _resolve_url_with_failure_cache(str(payload.url))
+    stages: dict[str, bool] = {} if resolution_cached is None else {"urlResolution": resolution_cached}
+
+    cached_data = _cached_product_post_data(shop_id, item_id)
+    if cached_data is not None:
+        stages["result"] = True
+        return cached_data, {"cached": True, "cacheStages": stages}
+
+    product_key = f"{shop_id}:{item_id}"
+    try:
+        data, search_cached, short_link_cached = await _build_product_post_data(shop_id, item_id)
+    except ApiException as exc:
+        _remember_failure(f"item:{product_key}", exc)
+        raise
+    get_cache_manager().set("product_from_url", product_key, data)
+    stages.update(result=False, productSearch=search_cached, shortLink=short_link_cached)
+    return data, {"cached": search_cached and short_link_cached, "cacheStages": stages}
+
+
+async def _build_product_post_data(shop_id: int, item_id: int) -> tuple[ProductFromUrlData, bool, bool]:
+    # The short link for the canonical URL built from the parsed ids is generated while
+    # productOfferV2 runs; it is only redone if Shopee reports a different productLink.
+    speculative_url = _canonical_product_url(shop_id, item_id)
+    short_link_task = asyncio.create_task(generate_short_link(ShortLinkCreateRequest(originUrl=speculative_url)))
+    try:
+        search_payload = ProductOffersSearchRequest(itemId=item_id, page=1, limit=1)
+        search_data, cache_meta = await search_product_offers(search_payload)
+        node = _matching_product_node(search_data, shop_id, item_id)
+    except BaseException:
+        await _cancel_task(short_link_task)
+        raise
+
+    resolved_shop_id, product_url = _product_link(node, shop_id, item_id)
+    if normalize_origin_url(product_url) == normalize_origin_url(speculative_url):
+        short_link, short_link_cached = await short_link_task
+    else:
+        await _cancel_task(short_link_task)
+        short_link, short_link_cached = await generate_short_link(ShortLinkCreateRequest(originUrl=product_url))
+    data = _product_post_data(node, resolved_shop_id, item_id, product_url, short_link.shortLink)
+    return data, cache_meta["cached"], short_link_cached
+
+
+def _canonical_product_url(shop_id: int, item_id: int) -> str:
+    return f"https://shopee.com.br/product/{shop_id}/{item_id}"
+
+
+def _matching_product_node(data: ProductOfferSearchData, shop_id: int, item_id: int) -> ProductOfferV2Node:
     if not data.nodes:
         raise ApiException(
             status_code=404,
@@ -159,24 +667,148 @@ async def get_product_post_data_from_url(payload: ProductFromUrlRequest) -> tupl
             message="Shopee returned a different product than requested",
             details={"expectedItemId": item_id, "returnedItemId": node.itemId},
         )
+    return node
+
 
+def _product_link(node: ProductOfferV2Node, shop_id: int, item_id: int) -> tuple[int, str]:
     # If shopId is present in response, keep it authoritative; otherwise fall back to parsed URL.
     resolved_shop_id = node.shopId if node.shopId is not None else shop_id
-    canonical_product_url = node.productLink or f"https://shopee.com.br/product/{resolved_shop_id}/{item_id}"
-    short_link = await generate_short_link(ShortLinkCreateRequest(originUrl=canonical_product_url))
-    return (
-        ProductFromUrlData(
-            shopId=resolved_shop_id,
-            itemId=item_id,
-            productName=node.productName,
-            imageUrl=node.imageUrl,
-            priceMin=node.priceMin,
-            priceMax=node.priceMax,
-            shortLink=short_link.shortLink,
-            offerLink=node.offerLink,
-            productLink=canonical_product_url,
-            shopName=node.shopName,
-            commissionRate=node.commissionRate,
+    return resolved_shop_id, node.productLink or _canonical_product_url(resolved_shop_id, item_id)
+
+
+def _product_post_data(
+    node: ProductOfferV2Node,
+    shop_id: int,
+    item_id: int,
+    product_url: str,
+    short_link: str | None,
+) -> ProductFromUrlData:
+    return ProductFromUrlData(
+        shopId=shop_id,
+        itemId=item_id,
+        productName=node.productName,
+        imageUrl=node.imageUrl,
+        priceMin=node.priceMin,
+        priceMax=node.priceMax,
+        shortLink=short_link,
+        offerLink=node.offerLink,
+        productLink=product_url,
+        shopName=node.shopName,
+        commissionRate=node.commissionRate,
+    )
+
+
+@with_priority(Priority.BULK)
+async def get_product_post_data_from_urls_batch(payload: ProductFromUrlBatchRequest) -> ProductFromUrlBatchData:
+    """Resolve many product URLs with deduplicated, batched upstream calls.
+
+    Share-link resolution and productOfferV2 batches run concurrently under
+    `PRODUCT_FROM_URL_BATCH_CONCURRENCY`; every short link still missing is generated
+    in one aliased mutation.
+    """
+    semaphore = asyncio.Semaphore(get_settings().product_from_url_batch_concurrency)
+
+    async def bounded(call: Awaitable[T]) -> T:
+        async with semaphore:
+            return await call
+
+    urls = [str(url) for url in payload.urls]
+    distinct_urls = list(dict.fromkeys(urls))
+    resolutions = await asyncio.gather(
+        *(bounded(_resolve_url_with_failure_cache(url)) for url in distinct_urls),
+        return_exceptions=True,
+    )
+    ids_by_url: dict[str, tuple[int, int]] = {}
+    errors: dict[str, ErrorBody] = {}
+    for url, resolution in zip(distinct_urls, resolutions):
+        if isinstance(resolution, ApiException):
+            errors[f"url:{url}"] = resolution.to_error_body()
+        elif isinstance(resolution, BaseException):
+            raise resolution
+        else:
+            ids_by_url[url] = resolution[0]
+
+    results: dict[tuple[int, int], tuple[ProductFromUrlData, bool]] = {}
+    pending: list[tuple[int, int]] = []
+    for ids in dict.fromkeys(ids_by_url.values()):
+        try:
+            cached_data = _cached_product_post_data(*ids)
+        except ApiException as exc:
+            errors[f"item:{ids[0]}:{ids[1]}"] = exc.to_error_body()
+            continue
+        if cached_data is not None:
+            results[ids] = (cached_data, True)
+        else:
+            pending.append(ids)
+
+    # Products found upstream, waiting for their short links: ids -> (node, shopId, productLink, search cached).
+    found: dict[tuple[int, int], tuple[ProductOfferV2Node, int, str, bool]] = {}
+    chunks = [
+        pending[start : start + PRODUCT_SEARCH_BATCH_MAX_REQUESTS]
+        for start in range(0, len(pending), PRODUCT_SEARCH_BATCH_MAX_REQUESTS)
+    ]
+    searches = await asyncio.gather(
+        *(
+            bounded(
+                search_product_offers_batch(
+                    ProductOffersSearchBatchRequest(
+                        requests=[ProductOffersSearchRequest(itemId=item_id, page=1, limit=1) for _, item_id in chunk]
+                    )
+                )
+            )
+            for chunk in chunks
         ),
-        cached,
+        return_exceptions=True,
     )
+    for chunk, batch in zip(chunks, searches):
+        if isinstance(batch, ApiException):
+            for shop_id, item_id in chunk:
+                errors[f"item:{shop_id}:{item_id}"] = batch.to_error_body()
+            continue
+        if isinstance(batch, BaseException):
+            raise batch
+        for (shop_id, item_id), item in zip(chunk, batch.items):
+            product_key = f"{shop_id}:{item_id}"
+            if not item.success:
+                errors[f"item:{product_key}"] = item.error
+                continue
+            try:
+                node = _matching_product_node(item.data, shop_id, item_id)
+            except ApiException as exc:
+                _remember_failure(f"item:{product_key}", exc)
+                errors[f"item:{product_key}"] = exc.to_error_body()
+                continue
+            resolved_shop_id, product_url = _product_link(node, shop_id, item_id)
+            found[(shop_id, item_id)] = (node, resolved_shop_id, product_url, item.cached)
+
+    if found:
+        try:
+            short_links = await generate_short_links_batch(
+                ShortLinkBatchRequest(
+                    items=[ShortLinkCreateRequest(originUrl=product_url) for _, _, product_url, _ in found.values()]
+                )
+            )
+        except ApiException as exc:
+            for shop_id, item_id in found:
+                errors[f"item:{shop_id}:{item_id}"] = exc.to_error_body()
+        else:
+            for ((shop_id, item_id), (node, resolved_shop_id, product_url, search_cached)), link in zip(
+                found.items(), short_links.items
+            ):
+                if not link.success:
+                    errors[f"item:{shop_id}:{item_id}"] = link.error
+                    continue
+                data = _product_post_data(node, resolved_shop_id, item_id, product_url, link.shortLink)
+                get_cache_manager().set("product_from_url", f"{shop_id}:{item_id}", data)
+                results[(shop_id, item_id)] = (data, search_cached and link.cached)
+
+    items: list[ProductFromUrlBatchItem] = []
+    for index, url in enumerate(urls):
+        ids = ids_by_url.get(url)
+        if ids is not None and ids in results:
+            data, cached = results[ids]
+            items.append(ProductFromUrlBatchItem(index=index, url=url, success=True, cached=cached, data=data))
+            continue
+        error_key = f"url:{url}" if ids is None else f"item:{ids[0]}:{ids[1]}"
+        items.append(ProductFromUrlBatchItem(index=index, url=url, success=False, error=errors[error_key]))
+    return ProductFromUrlBatchData(items=items)
@@ -1,23 +1,128 @@
 from __future__ import annotations
 
-from app.core.exceptions import UpstreamShopeeException
-from app.schemas.shopee_short_links import ShortLinkCreateRequest, ShortLinkData
+from typing import Any
+
+from app.core.credentials import get_credential_pool
+from app.core.exceptions import ApiException, UpstreamShopeeException
+from app.core.rate_limiter import Priority, with_priority
+from app.core.short_link_store import get_short_link_store, short_link_key
+from app.core.timing import stage
+from app.schemas.shopee_short_links import (
+    ShortLinkBatchData,
+    ShortLinkBatchItemResult,
+    ShortLinkBatchRequest,
+    ShortLinkCreateRequest,
+    ShortLinkData,
+)
 from app.services.shopee_client import ShopeeClient
-from app.services.shopee_graphql_builder import build_generate_short_link_mutation
+from app.services.shopee_graphql_builder import (
+    build_generate_short_link_batch_mutation,
+    build_generate_short_link_mutation,
+)
+
+
+def _invalid_short_link_payload() -> UpstreamShopeeException:
+    return UpstreamShopeeException(
+        status_code=502,
+        code="shopee_invalid_response",
+        message="Shopee generateShortLink returned invalid payload",
+        upstream={"operation": "generateShortLink"},
+    )
 
 
-async def generate_short_link(payload: ShortLinkCreateRequest) -> ShortLinkData:
+@with_priority(Priority.INTERACTIVE)
+async def generate_short_link(payload: ShortLinkCreateRequest) -> tuple[ShortLinkData, bool]:
+    origin_url = str(payload.originUrl)
+    store = get_short_link_store()
+    # The call is pinned to one credential so a memoized link is only reused for its own affiliate account.
+    credential = get_credential_pool().select()
+    key = short_link_key(credential.app_id, origin_url, payload.subIds)
+    if store is not None:
+        cached_link = await store.get(key)
+        if cached_link is not None:
+            return ShortLinkData(shortLink=cached_link), True
+
     client = ShopeeClient()
-    query = build_generate_short_link_mutation(origin_url=str(payload.originUrl), sub_ids=payload.subIds)
-    data = await client.execute(query=query, operation="generateShortLink")
+    query = build_generate_short_link_mutation(origin_url=origin_url, sub_ids=payload.subIds)
+    data = await client.execute(query=query, operation="generateShortLink", credential=credential)
 
     result = data.get("generateShortLink")
     if not isinstance(result, dict) or not result.get("shortLink"):
-        raise UpstreamShopeeException(
-            status_code=502,
-            code="shopee_invalid_response",
-            message="Shopee generateShortLink returned invalid payload",
-            upstream={"operation": "generateShortLink"},
+        raise _invalid_short_link_payload()
+    with stage("validation"):
+        short_link = ShortLinkData.model_validate(result)
+    if store is not None:
+        app_id = client.last_app_id or credential.app_id
+        await store.set(short_link_key(app_id, origin_url, payload.subIds), short_link.shortLink)
+    return short_link, False
+
+
+@with_priority(Priority.INTERACTIVE)
+async def generate_short_links_batch(payload: ShortLinkBatchRequest) -> ShortLinkBatchData:
+    store = get_short_link_store()
+    credential = get_credential_pool().select()
+    keys = [short_link_key(credential.app_id, str(item.originUrl), item.subIds) for item in payload.items]
+
+    links: dict[str, str] = {}
+    cached_keys: set[str] = set()
+    if store is not None:
+        for key in dict.fromkeys(keys):
+            cached_link = await store.get(key)
+            if cached_link is not None:
+                links[key] = cached_link
+                cached_keys.add(key)
+
+    # One aliased field per distinct (originUrl, subIds) still missing.
+    aliases: dict[str, str] = {}
+    pending_inputs: dict[str, tuple[str, list[str] | None]] = {}
+    for key, item in zip(keys, payload.items):
+        if key in links or key in aliases:
+            continue
+        alias = f"link{len(aliases)}"
+        aliases[key] = alias
+        pending_inputs[alias] = (str(item.originUrl), item.subIds)
+
+    errors: dict[str, ApiException] = {}
+    if aliases:
+        client = ShopeeClient()
+        query = build_generate_short_link_batch_mutation(pending_inputs)
+        data, alias_errors = await client.execute_aliased(
+            query=query, operation="generateShortLink", credential=credential
         )
-    return ShortLinkData.model_validate(result)
+        # A 10030 on the pinned credential moves the call to another one.
+        app_id = client.last_app_id or credential.app_id
+        for key, alias in aliases.items():
+            if alias in alias_errors:
+                errors[key] = alias_errors[alias]
+                continue
+            result: Any = data.get(alias)
+            if not isinstance(result, dict) or not result.get("shortLink"):
+                errors[key] = _invalid_short_link_payload()
+                continue
+            with stage("validation"):
+                links[key] = ShortLinkData.model_validate(result).shortLink
+            if store is not None:
+                await store.set(short_link_key(app_id, *pending_inputs[alias]), links[key])
 
+    items: list[ShortLinkBatchItemResult] = []
+    for index, (key, item) in enumerate(zip(keys, payload.items)):
+        if key in links:
+            items.append(
+                ShortLinkBatchItemResult(
+                    index=index,
+                    originUrl=str(item.originUrl),
+                    success=True,
+                    shortLink=links[key],
+                    cached=key in cached_keys,
+                )
+            )
+        else:
+            items.append(
+                ShortLinkBatchItemResult(
+                    index=index,
+                    originUrl=str(item.originUrl),
+                    success=False,
+                    error=errors[key].to_error_body(),
+                )
+            )
+    return ShortLinkBatchData(items=items)
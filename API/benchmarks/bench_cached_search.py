@@ -0,0 +1,95 @@
+"""Cached `/shopee/offers/products/search` throughput, encoded fast path vs full encode.
+
+Runs the app in-process (no network) with the Shopee endpoint mocked, warms the
+cache with one request and then measures req/s of cache hits with
+`CACHE_SERVE_ENCODED_RESPONSES` on and off.
+
+    cd API
+    python -m benchmarks.bench_cached_search --requests 2000 --concurrency 16 --nodes 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+os.environ.setdefault("JWT_SECRET", "benchmark-secret-0123456789abcdefghij")
+os.environ.setdefault("ADMIN_USERNAME", "admin")
+os.environ.setdefault("ADMIN_PASSWORD", "adminpass")
+os.environ.setdefault("SHOPEE_APP_ID", "123456")
+os.environ.setdefault("SHOPEE_APP_SECRET", "demo-secret")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import httpx  # noqa: E402
+import respx  # noqa: E402
+
+from app.core.cache import reset_cache_manager  # noqa: E402
+from app.core.config import reset_settings_cache  # noqa: E402
+from app.main import create_app  # noqa: E402
+from benchmarks.mock_shopee import product_node  # noqa: E402
+
+SEARCH_PATH = "/api/v1/shopee/offers/products/search"
+
+
+async def _measure(*, encoded: bool, requests: int, concurrency: int, nodes: int) -> float:
+    os.environ["CACHE_SERVE_ENCODED_RESPONSES"] = "true" if encoded else "false"
+    reset_settings_cache()
+    reset_cache_manager()
+    app = create_app()
+    upstream = {
+        "data": {
+            "productOfferV2": {
+                "nodes": [product_node(i) for i in range(nodes)],
+                "pageInfo": {"limit": nodes, "hasNextPage": True, "scrollId": "bench"},
+            }
+        }
+    }
+    body = {"keyword": "fone bluetooth", "page": 1, "limit": nodes}
+
+    with respx.mock(assert_all_called=False) as mock:
+        mock.post("https://open-api.affiliate.shopee.com.br/graphql").mock(return_value=httpx.Response(200, json=upstream))
+        transport = httpx.ASGITransport(app=app)
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                login = await client.post("/api/v1/auth/login", json={"username": "admin", "password": "adminpass"})
+                headers = {"Authorization": f"Bearer {login.json()['data']['accessToken']}"}
+                warm = await client.post(SEARCH_PATH, headers=headers, json=body)
+                warm.raise_for_status()
+
+                remaining = requests
+
+                async def worker() -> None:
+                    nonlocal remaining
+                    while remaining > 0:
+                        remaining -= 1
+                        response = await client.post(SEARCH_PATH, headers=headers, json=body)
+                        assert response.json()["meta"]["cached"] is True
+
+                started = time.perf_counter()
+                await asyncio.gather(*(worker() for _ in range(concurrency)))
+                elapsed = time.perf_counter() - started
+    return requests / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--nodes", type=int, default=100)
+    args = parser.parse_args()
+
+    results = {}
+    for label, encoded in (("full_encode", False), ("encoded_fast_path", True)):
+        results[label] = round(
+            asyncio.run(_measure(encoded=encoded, requests=args.requests, concurrency=args.concurrency, nodes=args.nodes)),
+            1,
+        )
+    results["speedup"] = round(results["encoded_fast_path"] / results["full_encode"], 2)
+    print(json.dumps({"benchmark": "cached_product_search", "unit": "req/s", **vars(args), **results}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""End-to-end load benchmark: req/s and latency percentiles per scenario and concurrency.
+
+By default the app runs in-process with Shopee replaced by `benchmarks.mock_shopee`
+(signature checks, configurable latency and error/10030 injection). With
+`--base-url` the same scenarios are sent over HTTP to a running instance, which
+should itself point `SHOPEE_GRAPHQL_URL` at a mock server.
+
+    cd API
+    python -m benchmarks.load --concurrency 1,8,32 --requests 500 --latency-ms 80 --output load.json
+    python -m benchmarks.load --compare load.json --max-regression 0.15
+
+Scenarios:
+- `search_cached`: one keyword, warmed before measuring (cache hits)
+- `search_uncached`: a new keyword per request (cache misses, one upstream call each)
+- `from_url`: a new product URL per request (productOfferV2 + generateShortLink)
+- `short_link`: a new originUrl per request
+
+The in-process run disables the client-side rate limiter by default (the mock
+enforces no quota); set `SHOPEE_RATE_LIMIT_ENABLED=true` to include it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+import uuid
+from collections import Counter
+from collections.abc import Callable
+from contextlib import AsyncExitStack
+from datetime import UTC, datetime
+from typing import Any
+
+os.environ.setdefault("JWT_SECRET", "benchmark-secret-0123456789abcdefghij")
+os.environ.setdefault("ADMIN_USERNAME", "admin")
+os.environ.setdefault("ADMIN_PASSWORD", "adminpass")
+os.environ.setdefault("SHOPEE_APP_ID", "123456")
+os.environ.setdefault("SHOPEE_APP_SECRET", "demo-secret")
+os.environ.setdefault("SHOPEE_RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import httpx  # noqa: E402
+import respx  # noqa: E402
+
+from app.core.cache import reset_cache_manager  # noqa: E402
+from app.core.circuit_breaker import reset_circuit_breaker  # noqa: E402
+from app.core.config import get_settings, reset_settings_cache  # noqa: E402
+from app.core.credentials import configured_credentials, reset_credential_pool  # noqa: E402
+from app.core.metrics import reset_metrics  # noqa: E402
+from app.core.rate_limiter import reset_rate_limiters  # noqa: E402
+from app.core.short_link_store import reset_short_link_store  # noqa: E402
+from app.core.singleflight import reset_single_flight  # noqa: E402
+from app.main import create_app  # noqa: E402
+from benchmarks.mock_shopee import MockShopee, add_mock_arguments, config_from_args, shop_id_for  # noqa: E402
+from benchmarks.stats import latency_summary  # noqa: E402
+
+SCENARIOS = ("search_cached", "search_uncached", "from_url", "short_link")
+KEYWORDS = ("fone bluetooth", "air fryer", "tenis corrida", "smartwatch", "kit maquiagem", "cadeira gamer")
+
+# (method, path, body) for the n-th request of a run; `run_id` keeps remote runs from hitting old cache entries.
+RequestFactory = Callable[[int], tuple[str, str, dict[str, Any]]]
+
+
+def _request_factory(scenario: str, run_id: str) -> RequestFactory:
+    if scenario == "search_cached":
+        return lambda _: ("POST", "/api/v1/shopee/offers/products/search", {"keyword": KEYWORDS[0], "limit": 20})
+    if scenario == "search_uncached":
+        return lambda n: (
+            "POST",
+            "/api/v1/shopee/offers/products/search",
+            {"keyword": f"{KEYWORDS[n % len(KEYWORDS)]} {run_id} {n}", "limit": 20},
+        )
+    if scenario == "from_url":
+        offset = int(run_id, 16) % 1_000_000 * 1000
+
+        def from_url(n: int) -> tuple[str, str, dict[str, Any]]:
+            item_id = 20000000000 + offset + n
+            url = f"https://shopee.com.br/product/{shop_id_for(item_id)}/{item_id}"
+            return "POST", "/api/v1/shopee/products/from-url", {"url": url}
+
+        return from_url
+    if scenario == "short_link":
+        return lambda n: (
+            "POST",
+            "/api/v1/shopee/short-links",
+            {"originUrl": f"https://shopee.com.br/product/300000001/{n}?run={run_id}"},
+        )
+    raise ValueError(f"unknown scenario {scenario!r}")
+
+
+async def _drive(
+    client: httpx.AsyncClient,
+    headers: dict[str, str],
+    factory: RequestFactory,
+    *,
+    requests: int,
+    concurrency: int,
+) -> dict[str, Any]:
+    counter = itertools.count()
+    latencies: list[float] = []
+    statuses: Counter[int] = Counter()
+
+    async def worker() -> None:
+        while (n := next(counter)) < requests:
+            method, path, body = factory(n)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, headers=headers, json=body)
+                statuses[response.status_code] += 1
+            except httpx.HTTPError:
+                statuses[0] += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    errors = sum(count for status, count in statuses.items() if not 200 <= status < 300)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "rps": round(requests / elapsed, 1),
+        **latency_summary(latencies),
+    }
+
+
+def _reset_app_state() -> None:
+    reset_settings_cache()
+    reset_cache_manager()
+    reset_single_flight()
+    reset_short_link_store()
+    reset_rate_limiters()
+    reset_circuit_breaker()
+    reset_credential_pool()
+    reset_metrics()
+
+
+async def _run_scenario(args: argparse.Namespace, scenario: str, concurrency: int) -> dict[str, Any]:
+    run_id = uuid.uuid4().hex[:8]
+    factory = _request_factory(scenario, run_id)
+    async with AsyncExitStack() as stack:
+        mock: MockShopee | None = None
+        if args.base_url:
+            client = await stack.enter_async_context(httpx.AsyncClient(base_url=args.base_url, timeout=60))
+        else:
+            # Fresh caches and breaker state per run, so every measurement starts cold.
+            _reset_app_state()
+            settings = get_settings()
+            secrets = {credential.app_id: credential.app_secret for credential in configured_credentials(settings)}
+            mock = MockShopee(config_from_args(args, secrets))
+            router = stack.enter_context(respx.mock(assert_all_called=False))
+            router.post(settings.shopee_graphql_url).mock(side_effect=mock.httpx_handler)
+            app = create_app()
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            transport = httpx.ASGITransport(app=app)
+            client = await stack.enter_async_context(httpx.AsyncClient(transport=transport, base_url="http://bench"))
+
+        login = await client.post("/api/v1/auth/login", json={"username": args.username, "password": args.password})
+        login.raise_for_status()
+        headers = {"Authorization": f"Bearer {login.json()['data']['accessToken']}"}
+        if scenario == "search_cached":
+            method, path, body = factory(0)
+            (await client.request(method, path, headers=headers, json=body)).raise_for_status()
+
+        result = await _drive(client, headers, factory, requests=args.requests, concurrency=concurrency)
+    if mock is not None:
+        result["upstream"] = dict(mock.outcomes)
+    return {"scenario": scenario, "concurrency": concurrency, **result}
+
+
+def _compare(results: list[dict[str, Any]], baseline_path: str, max_regression: float) -> bool:
+    """Print rps/p99 changes against a previous `--output` file; False if any exceeds `max_regression`."""
+    with open(baseline_path, encoding="utf-8") as baseline_file:
+        baseline = {(row["scenario"], row["concurrency"]): row for row in json.load(baseline_file)["results"]}
+    ok = True
+    for row in results:
+        previous = baseline.get((row["scenario"], row["concurrency"]))
+        if previous is None:
+            continue
+        rps_change = row["rps"] / previous["rps"] - 1 if previous["rps"] else 0.0
+        p99_change = row["p99_ms"] / previous["p99_ms"] - 1 if previous["p99_ms"] else 0.0
+        regressed = rps_change < -max_regression or p99_change > max_regression
+        ok = ok and not regressed
+        print(
+            f"{row['scenario']:<16} c={row['concurrency']:<4} rps {rps_change:+.1%}  p99 {p99_change:+.1%}"
+            + ("  REGRESSION" if regressed else ""),
+            file=sys.stderr,
+        )
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario and concurrency level")
+    parser.add_argument("--base-url", default="", help="target a running instance instead of the in-process app")
+    parser.add_argument("--username", default=os.environ["ADMIN_USERNAME"])
+    parser.add_argument("--password", default=os.environ["ADMIN_PASSWORD"])
+    parser.add_argument("--output", default="", help="write the JSON report to this file")
+    parser.add_argument("--compare", default="", help="previous JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed rps drop / p99 rise (0.2 = 20%%)")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    results = [
+        asyncio.run(_run_scenario(args, scenario, concurrency)) for scenario in scenarios for concurrency in levels
+    ]
+    report = {
+        "benchmark": "load",
+        "createdAt": datetime.now(UTC).isoformat(timespec="seconds"),
+        "target": args.base_url or "in-process",
+        "mock": {
+            "latencyMs": args.latency_ms,
+            "jitterMs": args.jitter_ms,
+            "errorRate": args.error_rate,
+            "rateLimitRate": args.rate_limit_rate,
+        },
+        "results": results,
+    }
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(rendered + "\n")
+    print(rendered)
+    if args.compare and not _compare(results, args.compare, args.max_regression):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Micro-benchmarks of hot pure functions (pytest-benchmark)."""
@@ -0,0 +1,84 @@
+"""Functions run on every search / short-link request, with production-sized inputs."""
+
+from __future__ import annotations
+
+import os
+
+os.environ.setdefault("JWT_SECRET", "benchmark-secret-0123456789abcdefghij")
+os.environ.setdefault("ADMIN_USERNAME", "admin")
+os.environ.setdefault("ADMIN_PASSWORD", "adminpass")
+os.environ.setdefault("SHOPEE_APP_ID", "123456")
+os.environ.setdefault("SHOPEE_APP_SECRET", "demo-secret")
+
+from app.core.cache import CacheManager, _normalized_json  # noqa: E402
+from app.services.shopee_graphql_builder import (  # noqa: E402
+    build_product_offer_v2_batch_query,
+    build_product_offer_v2_query,
+    compact_json,
+    graphql_literal,
+    selection_set_version,
+)
+from app.services.shopee_offer_service import parse_shopee_product_url_ids  # noqa: E402
+from app.services.shopee_signing import build_shopee_signature  # noqa: E402
+from benchmarks.mock_shopee import product_node  # noqa: E402
+
+KEYWORDS = [
+    f"{word} {index}"
+    for index in range(40)
+    for word in ("fone bluetooth sem fio", "air fryer 4l", "tênis corrida", "smartwatch à prova d'água", "kit \"skin care\"")
+]
+SEARCH_FILTERS = {"keyword": "fone de ouvido bluetooth sem fio", "sortType": 2, "page": 3, "limit": 50}
+PRODUCT_PAYLOAD = {"nodes": [product_node(index) for index in range(100)], "pageInfo": {"limit": 100, "hasNextPage": True}}
+PRODUCT_URLS = [
+    "https://shopee.com.br/product/300012345/20000012345",
+    "https://shopee.com.br/Fone-de-Ouvido-Bluetooth-TWS-i.300012345.20000012345?sp_atk=4f1c&xptdk=4f1c",
+    "https://shopee.com.br/opaanlp/300012345/20000012345?utm_source=an_18302190000",
+    "https://shopee.com.br/Kit-Skin-Care-Completo-Hidratante-Serum-Vitamina-C-i.300099999.20000099999",
+]
+
+
+def bench_graphql_literal_keyword_list(benchmark) -> None:
+    literal = benchmark(graphql_literal, {"keywords": KEYWORDS, "subIds": ["s1", "s2", "s3", "s4", "s5"]})
+    assert literal.startswith("{keywords:[")
+
+
+def bench_build_product_offer_v2_query(benchmark) -> None:
+    query = benchmark(build_product_offer_v2_query, SEARCH_FILTERS)
+    assert "productOfferV2(" in query
+
+
+def bench_build_product_offer_v2_batch_query(benchmark) -> None:
+    filters = {f"q{index}": {**SEARCH_FILTERS, "keyword": KEYWORDS[index]} for index in range(20)}
+    query = benchmark(build_product_offer_v2_batch_query, filters)
+    assert "q19: productOfferV2" in query
+
+
+def bench_build_shopee_signature(benchmark) -> None:
+    payload_json = compact_json({"query": build_product_offer_v2_query(SEARCH_FILTERS)})
+    signature = benchmark(
+        build_shopee_signature,
+        app_id="18302190000",
+        app_secret="0123456789abcdef0123456789abcdef",
+        payload_json=payload_json,
+        timestamp=1760000000,
+    )
+    assert len(signature.signature) == 64
+
+
+def bench_cache_build_key(benchmark) -> None:
+    cache = CacheManager()
+    key = benchmark(cache.build_key, "productOfferV2", SEARCH_FILTERS, selection_set_version(None))
+    assert key.startswith("productOfferV2:")
+
+
+def bench_normalized_json_100_nodes(benchmark) -> None:
+    encoded = benchmark(_normalized_json, PRODUCT_PAYLOAD)
+    assert encoded.startswith('{"nodes":[')
+
+
+def bench_parse_shopee_product_url_ids(benchmark) -> None:
+    def parse_all() -> list[tuple[int, int]]:
+        return [parse_shopee_product_url_ids(url) for url in PRODUCT_URLS]
+
+    ids = benchmark(parse_all)
+    assert ids[0] == (300012345, 20000012345)
@@ -0,0 +1,326 @@
+"""Local stand-in for the Shopee affiliate GraphQL endpoint (benchmarks only).
+
+Checks request signatures like Shopee does (10020 when they do not match),
+answers `productOfferV2`, `shopOfferV2` and `generateShortLink` fields (aliased
+batches included) with realistic payloads that honour `limit`, `page`, `itemId`
+and the requested node fields, and can add latency, HTTP 500 answers and 10030
+rate-limit errors.
+
+Used in-process by `benchmarks.load`, or as a server the API is pointed at:
+
+    cd API
+    python -m benchmarks.mock_shopee --port 9100 --latency-ms 80 --jitter-ms 40 --rate-limit-rate 0.01
+    SHOPEE_GRAPHQL_URL=http://127.0.0.1:9100/graphql uvicorn app.main:app --port 8000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+import uvicorn
+
+from app.constants.graphql_queries import PRODUCT_OFFER_V2_NODE_FIELDS, SHOP_OFFER_V2_NODE_FIELDS
+from app.core.config import get_settings
+from app.core.credentials import configured_credentials
+
+# Result pages available for any keyword; later pages report hasNextPage=false.
+TOTAL_PAGES = 10
+
+_FIELD_RE = re.compile(r"(?:(\w+)\s*:\s*)?\b(productOfferV2|shopOfferV2|generateShortLink)\b")
+_ARG_RE = re.compile(r'(\w+)\s*:\s*("(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?|true|false)')
+_NODES_RE = re.compile(r"nodes\s*\{([^}]*)\}")
+_AUTH_RE = re.compile(r"SHA256 Credential=([^,]+), Timestamp=(\d+), Signature=([0-9a-f]+)")
+
+
+def shop_id_for(item_id: int) -> int:
+    """Shop owning a mock item; load scenarios build product URLs with it."""
+    return 300000000 + item_id % 100000
+
+
+def product_node(index: int, *, keyword: str = "Fone de Ouvido Bluetooth") -> dict[str, Any]:
+    item_id = 20000000000 + index
+    shop_id = shop_id_for(item_id)
+    return {
+        "itemId": item_id,
+        "commissionRate": "0.08",
+        "sellerCommissionRate": "0.05",
+        "shopeeCommissionRate": "0.03",
+        "commission": "3.2",
+        "sales": 1500 + index % 5000,
+        "priceMax": "129.9",
+        "priceMin": "39.9",
+        "productCatIds": [100630, 100631, 100640],
+        "ratingStar": "4.8",
+        "priceDiscountRate": 25,
+        "imageUrl": f"https://cf.shopee.com.br/file/br-11134207-demo-{index}",
+        "productName": f"{keyword} Sem Fio TWS Modelo {index} com Cancelamento de Ruído",
+        "shopId": shop_id,
+        "shopName": f"Loja Oficial {shop_id % 1000}",
+        "shopType": [1, 4],
+        "productLink": f"https://shopee.com.br/product/{shop_id}/{item_id}",
+        "offerLink": f"https://s.shopee.com.br/demo{index}",
+        "periodStartTime": 1735700000,
+        "periodEndTime": 1767236399,
+    }
+
+
+def shop_node(index: int) -> dict[str, Any]:
+    shop_id = 300000000 + index
+    return {
+        "commissionRate": "0.1",
+        "imageUrl": f"https://cf.shopee.com.br/file/br-shop-logo-{index}",
+        "offerLink": f"https://s.shopee.com.br/shop{index}",
+        "originalLink": f"https://shopee.com.br/shop/{shop_id}",
+        "shopId": shop_id,
+        "shopName": f"Loja Oficial {index}",
+        "ratingStar": "4.9",
+        "shopType": [1],
+        "remainingBudget": 3,
+        "periodStartTime": 1735700000,
+        "periodEndTime": 1767236399,
+        "sellerCommCoveRatio": "0.5",
+    }
+
+
+@dataclass
+class MockShopeeConfig:
+    # appId -> secret accepted by the signature check.
+    secrets: dict[str, str]
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    verify_signatures: bool = True
+    max_clock_skew_seconds: int = 300
+    seed: int | None = None
+
+
+@dataclass
+class MockShopee:
+    config: MockShopeeConfig
+    outcomes: Counter[str] = field(default_factory=Counter)
+
+    def __post_init__(self) -> None:
+        self._random = random.Random(self.config.seed)
+
+    async def respond(self, body: bytes, authorization: str | None) -> tuple[int, dict[str, Any]]:
+        config = self.config
+        if config.latency_ms or config.jitter_ms:
+            delay = config.latency_ms + self._random.uniform(-config.jitter_ms, config.jitter_ms)
+            await asyncio.sleep(max(0.0, delay) / 1000)
+
+        if config.verify_signatures and not self._signature_ok(body, authorization):
+            self.outcomes["auth_error"] += 1
+            return 200, _error(10020, "Invalid Signature")
+        roll = self._random.random()
+        if roll < config.error_rate:
+            self.outcomes["http_error"] += 1
+            return 500, {"message": "mock upstream failure"}
+        if roll < config.error_rate + config.rate_limit_rate:
+            self.outcomes["rate_limited"] += 1
+            return 200, _error(10030, "Rate limit exceeded")
+
+        try:
+            query = json.loads(body)["query"]
+        except (ValueError, KeyError, TypeError):
+            self.outcomes["bad_request"] += 1
+            return 200, _error(10000, "Invalid request body")
+        data = _execute(query)
+        if not data:
+            self.outcomes["bad_request"] += 1
+            return 200, _error(10000, "Unsupported query")
+        self.outcomes["ok"] += 1
+        return 200, {"data": data}
+
+    def _signature_ok(self, body: bytes, authorization: str | None) -> bool:
+        match = _AUTH_RE.fullmatch(authorization or "")
+        if match is None:
+            return False
+        app_id, timestamp, signature = match.groups()
+        secret = self.config.secrets.get(app_id)
+        if secret is None or abs(time.time() - int(timestamp)) > self.config.max_clock_skew_seconds:
+            return False
+        factor = f"{app_id}{timestamp}{body.decode('utf-8')}{secret}"
+        return hashlib.sha256(factor.encode("utf-8")).hexdigest() == signature
+
+    async def httpx_handler(self, request: httpx.Request) -> httpx.Response:
+        """`respx` side effect serving the mock in-process."""
+        status, payload = await self.respond(request.content, request.headers.get("Authorization"))
+        return httpx.Response(status, json=payload)
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        """Minimal ASGI app: `POST /graphql` and `GET /stats`."""
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["method"] == "GET" and scope["path"] == "/stats":
+            await _send_json(send, 200, dict(self.outcomes))
+            return
+        if scope["method"] != "POST" or scope["path"] != "/graphql":
+            await _send_json(send, 404, {"message": "not found"})
+            return
+
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope["headers"]}
+        status, payload = await self.respond(body, headers.get("authorization"))
+        await _send_json(send, status, payload)
+
+
+def _error(code: int, message: str) -> dict[str, Any]:
+    return {"errors": [{"message": message, "extensions": {"code": code, "message": message}}]}
+
+
+async def _send_json(send: Any, status: int, payload: Any) -> None:
+    content = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(content)).encode())],
+        }
+    )
+    await send({"type": "http.response.body", "body": content})
+
+
+def _balanced(text: str, start: int, opening: str, closing: str) -> int:
+    """Index just past the bracket group opening at `start`, skipping string contents."""
+    depth = 0
+    in_string = False
+    index = start
+    while index < len(text):
+        char = text[index]
+        if in_string:
+            if char == "\\":
+                index += 1
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == opening:
+            depth += 1
+        elif char == closing:
+            depth -= 1
+            if depth == 0:
+                return index + 1
+        index += 1
+    return len(text)
+
+
+def _skip_spaces(text: str, index: int) -> int:
+    while index < len(text) and text[index].isspace():
+        index += 1
+    return index
+
+
+def _execute(query: str) -> dict[str, Any]:
+    data: dict[str, Any] = {}
+    position = 0
+    while (match := _FIELD_RE.search(query, position)) is not None:
+        alias, name = match.group(1), match.group(2)
+        index = _skip_spaces(query, match.end())
+        args_text = ""
+        if index < len(query) and query[index] == "(":
+            end = _balanced(query, index, "(", ")")
+            args_text, index = query[index + 1 : end - 1], _skip_spaces(query, end)
+        selection = ""
+        if index < len(query) and query[index] == "{":
+            end = _balanced(query, index, "{", "}")
+            selection, index = query[index + 1 : end - 1], end
+        position = max(index, match.end())
+
+        args = {key: json.loads(value) for key, value in _ARG_RE.findall(args_text)}
+        nodes_match = _NODES_RE.search(selection)
+        fields = nodes_match.group(1).split() if nodes_match else []
+        if name == "productOfferV2":
+            data[alias or name] = _product_connection(args, fields or list(PRODUCT_OFFER_V2_NODE_FIELDS))
+        elif name == "shopOfferV2":
+            data[alias or name] = _shop_connection(args, fields or list(SHOP_OFFER_V2_NODE_FIELDS))
+        else:
+            digest = hashlib.sha1(str(args.get("originUrl", "")).encode("utf-8")).hexdigest()[:10]
+            data[alias or name] = {"shortLink": f"https://s.shopee.com.br/{digest}"}
+    return data
+
+
+def _page_info(limit: int, page: int) -> dict[str, Any]:
+    return {"limit": limit, "hasNextPage": page < TOTAL_PAGES, "scrollId": f"mock-{page}"}
+
+
+def _product_connection(args: dict[str, Any], fields: list[str]) -> dict[str, Any]:
+    limit = int(args.get("limit", 20))
+    page = int(args.get("page", 1))
+    if "itemId" in args:
+        node = product_node(int(args["itemId"]) - 20000000000)
+        return {"nodes": [{key: node[key] for key in fields}], "pageInfo": _page_info(limit, TOTAL_PAGES)}
+    keyword = str(args.get("keyword", "Oferta"))
+    base = zlib.crc32(keyword.encode("utf-8")) % 100000 * 1000 + (page - 1) * limit
+    nodes = [product_node(base + offset, keyword=keyword) for offset in range(limit)]
+    return {"nodes": [{key: node[key] for key in fields} for node in nodes], "pageInfo": _page_info(limit, page)}
+
+
+def _shop_connection(args: dict[str, Any], fields: list[str]) -> dict[str, Any]:
+    limit = int(args.get("limit", 20))
+    page = int(args.get("page", 1))
+    if "shopId" in args:
+        node = shop_node(int(args["shopId"]) - 300000000)
+        return {"nodes": [{key: node[key] for key in fields}], "pageInfo": _page_info(limit, TOTAL_PAGES)}
+    base = zlib.crc32(str(args.get("keyword", "")).encode("utf-8")) % 100000 + (page - 1) * limit
+    nodes = [shop_node(base + offset) for offset in range(limit)]
+    return {"nodes": [{key: node[key] for key in fields} for node in nodes], "pageInfo": _page_info(limit, page)}
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="mean upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="uniform +/- jitter around the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of calls answered with HTTP 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of calls answered with 10030")
+    parser.add_argument("--no-verify-signatures", action="store_true")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def config_from_args(args: argparse.Namespace, secrets: dict[str, str]) -> MockShopeeConfig:
+    return MockShopeeConfig(
+        secrets=secrets,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        verify_signatures=not args.no_verify_signatures,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    # Accepts the same credentials the API signs with (SHOPEE_CREDENTIALS or SHOPEE_APP_ID/SECRET).
+    secrets = {credential.app_id: credential.app_secret for credential in configured_credentials(get_settings())}
+    uvicorn.run(MockShopee(config_from_args(args, secrets)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
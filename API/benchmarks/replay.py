@@ -0,0 +1,170 @@
+"""Replay captured traffic against a running instance.
+
+Reads the JSON lines written with `REQUEST_CAPTURE_PATH` (rotated files
+included), re-issues each request at its original offset divided by `--speed`
+and reports the latency distribution, status codes and cache hit rate
+(`meta.cached` of the replayed responses), overall and per route.
+
+    cd API
+    python -m benchmarks.replay captures/requests.jsonl* --base-url http://127.0.0.1:8000 --speed 2 --output replay.json
+
+`--speed 1` keeps the original pacing, `--speed 4` sends four times faster and
+`--speed 0` ignores pacing and sends with `--concurrency` workers.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+
+from benchmarks.stats import latency_summary
+
+
+@dataclass
+class _RouteStats:
+    latencies: list[float] = field(default_factory=list)
+    statuses: Counter[int] = field(default_factory=Counter)
+    cache_hits: int = 0
+    cache_misses: int = 0
+    status_changed: int = 0
+
+    def report(self) -> dict[str, Any]:
+        cache_answers = self.cache_hits + self.cache_misses
+        return {
+            "requests": len(self.latencies),
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "statusChanged": self.status_changed,
+            "cacheHitRate": round(self.cache_hits / cache_answers, 4) if cache_answers else None,
+            **latency_summary(self.latencies),
+        }
+
+
+def load_records(paths: list[str], *, route_filter: set[str], limit: int) -> list[dict[str, Any]]:
+    records = []
+    for path in paths:
+        with open(path, encoding="utf-8") as capture_file:
+            for line in capture_file:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if route_filter and record["path"] not in route_filter:
+                    continue
+                records.append(record)
+    records.sort(key=lambda record: record["ts"])
+    return records[:limit] if limit else records
+
+
+def _cached_flag(response: httpx.Response) -> bool | None:
+    if not response.headers.get("content-type", "").startswith("application/json"):
+        return None
+    try:
+        meta = response.json().get("meta")
+    except ValueError:
+        return None
+    cached = meta.get("cached") if isinstance(meta, dict) else None
+    return cached if isinstance(cached, bool) else None
+
+
+async def replay(args: argparse.Namespace, records: list[dict[str, Any]]) -> dict[str, Any]:
+    stats: defaultdict[str, _RouteStats] = defaultdict(_RouteStats)
+    lags: list[float] = []
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+        login = await client.post("/api/v1/auth/login", json={"username": args.username, "password": args.password})
+        login.raise_for_status()
+        headers = {"Authorization": f"Bearer {login.json()['data']['accessToken']}"}
+        inflight = asyncio.Semaphore(args.concurrency)
+
+        async def send(record: dict[str, Any]) -> None:
+            route = stats[record["path"]]
+            async with inflight:
+                started = time.perf_counter()
+                try:
+                    response = await client.request(
+                        record["method"], record["path"], headers=headers, json=record.get("body")
+                    )
+                except httpx.HTTPError:
+                    route.statuses[0] += 1
+                    route.latencies.append(time.perf_counter() - started)
+                    return
+                route.latencies.append(time.perf_counter() - started)
+            route.statuses[response.status_code] += 1
+            if response.status_code != record.get("status"):
+                route.status_changed += 1
+            cached = _cached_flag(response)
+            if cached is True:
+                route.cache_hits += 1
+            elif cached is False:
+                route.cache_misses += 1
+
+        started = time.perf_counter()
+        first_ts = records[0]["ts"] if records else 0.0
+        tasks = []
+        for record in records:
+            if args.speed > 0:
+                due = (record["ts"] - first_ts) / args.speed
+                delay = due - (time.perf_counter() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                lags.append(max(0.0, -delay))
+            tasks.append(asyncio.create_task(send(record)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    overall = _RouteStats()
+    for route in stats.values():
+        overall.latencies.extend(route.latencies)
+        overall.statuses.update(route.statuses)
+        overall.cache_hits += route.cache_hits
+        overall.cache_misses += route.cache_misses
+        overall.status_changed += route.status_changed
+    return {
+        "benchmark": "replay",
+        "target": args.base_url,
+        "speed": args.speed,
+        "durationSeconds": round(elapsed, 3),
+        "rps": round(len(records) / elapsed, 1) if elapsed else 0.0,
+        # How late requests left compared with the scaled capture schedule.
+        "sendLagP99Ms": latency_summary(lags)["p99_ms"],
+        "overall": overall.report(),
+        "routes": {path: route.report() for path, route in sorted(stats.items())},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("captures", nargs="+", help="capture files (JSON lines)")
+    parser.add_argument("--base-url", required=True)
+    parser.add_argument("--username", default=os.environ.get("ADMIN_USERNAME", "admin"))
+    parser.add_argument("--password", default=os.environ.get("ADMIN_PASSWORD", ""))
+    parser.add_argument("--speed", type=float, default=1.0, help="pacing multiplier; 0 = as fast as possible")
+    parser.add_argument("--concurrency", type=int, default=256, help="maximum requests in flight")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--routes", default="", help="comma-separated paths to replay (default: all)")
+    parser.add_argument("--limit", type=int, default=0, help="replay only the first N requests")
+    parser.add_argument("--output", default="", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    route_filter = {route.strip() for route in args.routes.split(",") if route.strip()}
+    records = load_records(args.captures, route_filter=route_filter, limit=args.limit)
+    if not records:
+        sys.exit("no captured requests to replay")
+    report = asyncio.run(replay(args, records))
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(rendered + "\n")
+    print(rendered)
+
+
+if __name__ == "__main__":
+    main()
@@ -22,7 +22,14 @@ os.environ.setdefault("CACHE_MAXSIZE", "256")
 os.environ.setdefault("ENABLE_DOCS", "true")
 
 from app.core.cache import reset_cache_manager  # noqa: E402
+from app.core.circuit_breaker import reset_circuit_breaker  # noqa: E402
 from app.core.config import reset_settings_cache  # noqa: E402
+from app.core.credentials import reset_credential_pool  # noqa: E402
+from app.core.metrics import reset_metrics  # noqa: E402
+from app.core.rate_limiter import reset_rate_limiters  # noqa: E402
+from app.core.request_capture import reset_request_capture  # noqa: E402
+from app.core.short_link_store import reset_short_link_store  # noqa: E402
+from app.core.singleflight import reset_single_flight  # noqa: E402
 from app.main import create_app  # noqa: E402
 
 
@@ -30,8 +37,37 @@ from app.main import create_app  # noqa: E402
 def _reset_singletons() -> None:
     reset_settings_cache()
     reset_cache_manager()
+    reset_single_flight()
+    reset_short_link_store()
+    reset_rate_limiters()
+    reset_circuit_breaker()
+    reset_credential_pool()
+    reset_metrics()
+    reset_request_capture()
     yield
     reset_cache_manager()
+    reset_single_flight()
+    reset_short_link_store()
+    reset_rate_limiters()
+    reset_circuit_breaker()
+    reset_credential_pool()
+    reset_metrics()
+    reset_request_capture()
+
+
+class FakeClock:
+    """Manually advanced replacement for `time.monotonic` in timer-injectable components."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def fake_clock() -> FakeClock:
+    return FakeClock()
 
 
 @pytest.fixture
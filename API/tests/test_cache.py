@@ -1,9 +1,20 @@
 from __future__ import annotations
 
-from app.core.cache import get_cache_manager
+import re
+import time
 
+import httpx
+import pytest
+import respx
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
 
-def test_cache_key_deterministic_and_returns_deep_copy() -> None:
+from app.core.cache import _TTLStore, get_cache_manager
+from app.schemas.shopee_offers import ProductOfferSearchData
+from conftest import FakeClock
+
+
+def test_cache_key_deterministic_and_shares_immutable_entries() -> None:
     cache = get_cache_manager()
 
     request_a = {"limit": 10, "keyword": "abc"}
@@ -12,11 +23,147 @@ def test_cache_key_deterministic_and_returns_deep_copy() -> None:
     key_b = cache.build_key("productOfferV2", request_b, "v1")
     assert key_a == key_b
 
-    cache.set("product_offers", key_a, {"nodes": [{"itemId": 1}], "pageInfo": {"limit": 10}})
+    data = ProductOfferSearchData.model_validate({"nodes": [{"itemId": 1}], "pageInfo": {"limit": 10}})
+    cache.set("product_offers", key_a, data)
     cached_1 = cache.get("product_offers", key_a)
-    assert cached_1 is not None
-    cached_1["nodes"].append({"itemId": 2})
+    assert cached_1 is data
+
+    with pytest.raises(ValidationError):
+        cached_1.nodes[0].itemId = 2
+    with pytest.raises(AttributeError):
+        cached_1.nodes.append(cached_1.nodes[0])
 
     cached_2 = cache.get("product_offers", key_a)
-    assert cached_2 == {"nodes": [{"itemId": 1}], "pageInfo": {"limit": 10}}
+    assert cached_2.model_dump(mode="json", exclude_none=True) == {"nodes": [{"itemId": 1}], "pageInfo": {"limit": 10}}
+
+
+def test_ttl_store_serves_stale_between_soft_and_hard_ttl(fake_clock: FakeClock) -> None:
+    store = _TTLStore(maxsize=8, ttl_seconds=10, stale_ttl_seconds=20, timer=fake_clock)
+    store.set("k", {"nodes": []})
+
+    fresh = store.lookup("k")
+    assert fresh is not None and not fresh.stale and not fresh.refresh
+
+    fake_clock.now += 15
+    stale = store.lookup("k")
+    assert stale is not None and stale.stale and stale.refresh
+    assert stale.value == {"nodes": []}
+
+    fake_clock.now += 20
+    assert store.lookup("k") is None
+
+
+def test_ttl_store_early_refresh_flags_fresh_entries(monkeypatch: pytest.MonkeyPatch, fake_clock: FakeClock) -> None:
+    store = _TTLStore(maxsize=8, ttl_seconds=10, early_refresh_beta=1.0, timer=fake_clock)
+    store.set("k", "value", compute_seconds=2.0)
+    monkeypatch.setattr("app.core.cache.random.random", lambda: 0.5)
+
+    # -2.0 * log(0.5) ~= 1.39s of jitter: refresh only triggers near expiry.
+    assert store.lookup("k").refresh is False
+    fake_clock.now += 9
+    entry = store.lookup("k")
+    assert entry.refresh is True and entry.stale is False
+
+
+@respx.mock
+def test_stale_entry_served_with_meta_and_refreshed_in_background(
+    client: TestClient,
+    auth_headers: dict[str, str],
+    fake_clock: FakeClock,
+) -> None:
+    cache = get_cache_manager()
+    cache.product_offers = _TTLStore(maxsize=8, ttl_seconds=10, stale_ttl_seconds=60, timer=fake_clock)
+    names = iter(["Primeiro", "Atualizado"])
+
+    def handler(_: httpx.Request) -> httpx.Response:
+        node = {"itemId": 1, "productName": next(names)}
+        return httpx.Response(
+            200,
+            json={"data": {"productOfferV2": {"nodes": [node], "pageInfo": {"limit": 20, "hasNextPage": False}}}},
+        )
+
+    route = respx.post("https://open-api.affiliate.shopee.com.br/graphql").mock(side_effect=handler)
+    request_json = {"keyword": "fone"}
+
+    first = client.post("/api/v1/shopee/offers/products/search", headers=auth_headers, json=request_json)
+    assert first.json()["meta"] == {"operation": "productOfferV2", "cached": False}
+
+    fake_clock.now += 30
+    stale = client.post("/api/v1/shopee/offers/products/search", headers=auth_headers, json=request_json)
+    assert stale.json()["meta"] == {"operation": "productOfferV2", "cached": True, "stale": True}
+    assert stale.json()["data"]["nodes"][0]["productName"] == "Primeiro"
+
+    deadline = time.monotonic() + 2
+    while route.call_count < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    refreshed = client.post("/api/v1/shopee/offers/products/search", headers=auth_headers, json=request_json)
+    assert route.call_count == 2
+    assert refreshed.json()["meta"] == {"operation": "productOfferV2", "cached": True}
+    assert refreshed.json()["data"]["nodes"][0]["productName"] == "Atualizado"
+
+
+@respx.mock
+def test_small_limit_stale_hit_refreshes_at_the_cached_page_limit(
+    client: TestClient,
+    auth_headers: dict[str, str],
+    fake_clock: FakeClock,
+) -> None:
+    cache = get_cache_manager()
+    cache.product_offers = _TTLStore(maxsize=8, ttl_seconds=10, stale_ttl_seconds=60, timer=fake_clock)
+    requested_limits: list[int] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        limit = int(re.search(r"limit:(\d+)", request.content.decode("utf-8")).group(1))
+        requested_limits.append(limit)
+        nodes = [{"itemId": item_id} for item_id in range(limit)]
+        return httpx.Response(
+            200,
+            json={"data": {"productOfferV2": {"nodes": nodes, "pageInfo": {"limit": limit, "hasNextPage": True}}}},
+        )
+
+    route = respx.post("https://open-api.affiliate.shopee.com.br/graphql").mock(side_effect=handler)
+    search = "/api/v1/shopee/offers/products/search"
+
+    assert client.post(search, headers=auth_headers, json={"keyword": "fone", "limit": 50}).status_code == 200
+    fake_clock.now += 30
+    small = client.post(search, headers=auth_headers, json={"keyword": "fone", "limit": 2})
+    assert small.json()["meta"]["stale"] is True
+
+    deadline = time.monotonic() + 2
+    while route.call_count < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    large = client.post(search, headers=auth_headers, json={"keyword": "fone", "limit": 50})
+
+    assert requested_limits == [50, 50]
+    assert large.json()["meta"] == {"operation": "productOfferV2", "cached": True}
+    assert len(large.json()["data"]["nodes"]) == 50
+
+
+def test_ttl_store_evicts_lru_within_byte_budget() -> None:
+    store = _TTLStore(maxsize=100, ttl_seconds=60, max_bytes=2000)
+    store.set("a", b"x" * 500)
+    store.set("b", b"x" * 500)
+    store.get("a")
+    store.set("c", b"x" * 500)
+
+    assert store.get("b") is None
+    assert store.get("a") is not None and store.get("c") is not None
+    stats = store.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+    assert 1000 < stats["bytes"] <= 2000
+
+    store.set("huge", b"x" * 5000)
+    assert store.get("huge") is None
+    assert store.stats()["entries"] == 2
+
+
+def test_ttl_store_reclaims_expired_bytes(fake_clock: FakeClock) -> None:
+    store = _TTLStore(maxsize=100, ttl_seconds=10, max_bytes=10_000, timer=fake_clock)
+    store.set("old", b"x" * 1000)
+    fake_clock.now += 11
+    store.set("new", b"x" * 100)
 
+    assert store.stats()["entries"] == 1
+    assert store.stats()["evictions"] == 0
+    assert store.get("old") is None
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+import respx
+from fastapi.testclient import TestClient
+
+from app.core.cache import _TTLStore, get_cache_manager
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.exceptions import ApiException, UpstreamShopeeException
+from app.core.http_client import close_http_client
+from app.services.shopee_client import ShopeeClient
+from conftest import FakeClock
+
+GRAPHQL_URL = "https://open-api.affiliate.shopee.com.br/graphql"
+
+
+def _search_response(name: str) -> httpx.Response:
+    node = {"itemId": 1, "productName": name}
+    return httpx.Response(
+        200,
+        json={"data": {"productOfferV2": {"nodes": [node], "pageInfo": {"limit": 20, "hasNextPage": False}}}},
+    )
+
+
+@pytest.fixture(autouse=True)
+def _no_backoff(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("app.services.shopee_client.random.uniform", lambda _low, _high: 0.0)
+
+
+def test_circuit_breaker_opens_on_failure_ratio_and_probes_after_cooldown(fake_clock: FakeClock) -> None:
+    breaker = CircuitBreaker(failure_ratio=0.5, min_calls=4, window_seconds=30, open_seconds=10, timer=fake_clock)
+
+    for _ in range(2):
+        breaker.record_success(breaker.before_call(operation="productOfferV2"))
+    breaker.record_failure(breaker.before_call(operation="productOfferV2"))
+    assert breaker.state == "closed"
+    breaker.record_failure(breaker.before_call(operation="productOfferV2"))
+    assert breaker.state == "open"
+
+    with pytest.raises(UpstreamShopeeException) as exc_info:
+        breaker.before_call(operation="productOfferV2")
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.code == "shopee_circuit_open"
+
+    fake_clock.now += 10
+    probe = breaker.before_call(operation="productOfferV2")  # the single half-open probe
+    assert probe.probe is True
+    with pytest.raises(UpstreamShopeeException):
+        breaker.before_call(operation="productOfferV2")
+    breaker.record_success(probe)
+    assert breaker.state == "closed"
+    assert breaker.snapshot() == {"state": "closed", "timesOpened": 1, "rejected": 2}
+
+
+def test_stragglers_from_before_the_circuit_opened_are_ignored(fake_clock: FakeClock) -> None:
+    breaker = CircuitBreaker(failure_ratio=0.5, min_calls=2, window_seconds=30, open_seconds=10, timer=fake_clock)
+    calls = [breaker.before_call(operation="productOfferV2") for _ in range(4)]
+
+    breaker.record_failure(calls[0])
+    breaker.record_failure(calls[1])
+    assert breaker.state == "open"
+
+    # Calls that started while the circuit was still closed settle afterwards.
+    breaker.record_success(calls[2])
+    assert breaker.state == "open"
+
+    fake_clock.now += 10
+    probe = breaker.before_call(operation="productOfferV2")
+    breaker.record_failure(calls[3])
+    assert breaker.state == "half_open"
+    breaker.record_success(probe)
+    assert breaker.state == "closed"
+    assert breaker.snapshot() == {"state": "closed", "timesOpened": 1, "rejected": 0}
+
+
+@respx.mock
+def test_queries_retry_transient_failures(client: TestClient, auth_headers: dict[str, str]) -> None:
+    route = respx.post(GRAPHQL_URL).mock(
+        side_effect=[
+            httpx.ConnectError("connection reset"),
+            httpx.Response(503, json={"message": "busy"}),
+            _search_response("Fone"),
+        ]
+    )
+
+    response = client.post("/api/v1/shopee/offers/products/search", headers=auth_headers, json={"keyword": "fone"})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["data"]["nodes"][0]["productName"] == "Fone"
+    assert route.call_count == 3
+
+
+@respx.mock
+def test_short_link_mutation_is_not_retried_by_default(client: TestClient, auth_headers: dict[str, str]) -> None:
+    route = respx.post(GRAPHQL_URL).mock(side_effect=httpx.ConnectError("connection reset"))
+
+    response = client.post(
+        "/api/v1/shopee/short-links",
+        headers=auth_headers,
+        json={"originUrl": "https://shopee.com.br/product/1/2"},
+    )
+
+    assert response.status_code == 502
+    assert response.json()["error"]["code"] == "shopee_network_error"
+    assert route.call_count == 1
+
+
+@respx.mock
+def test_open_circuit_serves_stale_entry_or_fails_fast(
+    client: TestClient,
+    auth_headers: dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+    fake_clock: FakeClock,
+) -> None:
+    get_cache_manager().product_offers = _TTLStore(maxsize=8, ttl_seconds=10, stale_if_error_seconds=600, timer=fake_clock)
+    breaker = CircuitBreaker(failure_ratio=0.5, min_calls=3, window_seconds=30, open_seconds=60)
+    monkeypatch.setattr("app.core.circuit_breaker._circuit_breaker", breaker)
+    route = respx.post(GRAPHQL_URL).mock(return_value=_search_response("Fone"))
+
+    fresh = client.post("/api/v1/shopee/offers/products/search", headers=auth_headers, json={"keyword": "fone"})
+    assert fresh.json()["meta"] == {"operation": "productOfferV2", "cached": False}
+
+    fake_clock.now += 30
+    route.mock(side_effect=httpx.ConnectError("connection refused"))
+    stale = client.post("/api/v1/shopee/offers/products/search", headers=auth_headers, json={"keyword": "fone"})
+    assert stale.status_code == 200, stale.text
+    assert stale.json()["meta"] == {"operation": "productOfferV2", "cached": True, "stale": True}
+    assert stale.json()["data"]["nodes"][0]["productName"] == "Fone"
+    # 1 success + 2 failed attempts trip the breaker, so the third attempt never leaves.
+    assert route.call_count == 3
+    assert breaker.state == "open"
+
+    uncached = client.post("/api/v1/shopee/offers/products/search", headers=auth_headers, json={"keyword": "tv"})
+    assert uncached.status_code == 503
+    assert uncached.json()["error"]["code"] == "shopee_circuit_open"
+    assert route.call_count == 3
+
+
+def _half_open_breaker(monkeypatch: pytest.MonkeyPatch, clock: FakeClock) -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_ratio=0.5, min_calls=1, window_seconds=30, open_seconds=10, timer=clock)
+    monkeypatch.setattr("app.core.circuit_breaker._circuit_breaker", breaker)
+    breaker.record_failure(breaker.before_call(operation="productOfferV2"))
+    clock.now += 10
+    assert breaker.state == "half_open"
+    return breaker
+
+
+@pytest.mark.parametrize(
+    ("upstream_response", "error_code"),
+    [
+        (httpx.Response(400, json={"message": "bad request"}), "shopee_http_error"),
+        (
+            httpx.Response(200, json={"errors": [{"message": "auth", "extensions": {"code": 10020}}]}),
+            "shopee_auth_error",
+        ),
+    ],
+)
+@respx.mock
+def test_probe_answered_with_non_transient_error_closes_the_circuit(
+    client: TestClient,
+    auth_headers: dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+    fake_clock: FakeClock,
+    upstream_response: httpx.Response,
+    error_code: str,
+) -> None:
+    breaker = _half_open_breaker(monkeypatch, fake_clock)
+    respx.post(GRAPHQL_URL).mock(side_effect=[upstream_response, _search_response("Fone")])
+
+    probe = client.post("/api/v1/shopee/offers/products/search", headers=auth_headers, json={"keyword": "fone"})
+    assert probe.json()["error"]["code"] == error_code
+    assert breaker.state == "closed"
+
+    after = client.post("/api/v1/shopee/offers/products/search", headers=auth_headers, json={"keyword": "fone"})
+    assert after.status_code == 200, after.text
+
+
+def test_probe_rejected_by_the_limiter_frees_the_probe_slot(
+    monkeypatch: pytest.MonkeyPatch, fake_clock: FakeClock
+) -> None:
+    breaker = _half_open_breaker(monkeypatch, fake_clock)
+
+    class _FullLimiter:
+        async def acquire(self, *_args: object, **_kwargs: object) -> None:
+            raise ApiException(status_code=429, code="shopee_rate_limited", message="queue timeout")
+
+    monkeypatch.setattr("app.services.shopee_client.get_rate_limiter", lambda _app_id: _FullLimiter())
+
+    with pytest.raises(ApiException) as exc_info:
+        asyncio.run(ShopeeClient().execute(query="{ ping }", operation="productOfferV2"))
+
+    assert exc_info.value.code == "shopee_rate_limited"
+    assert breaker.state == "half_open"
+    assert breaker.before_call(operation="productOfferV2").probe is True
+
+
+@respx.mock
+def test_cancelled_probe_frees_the_probe_slot(monkeypatch: pytest.MonkeyPatch, fake_clock: FakeClock) -> None:
+    breaker = _half_open_breaker(monkeypatch, fake_clock)
+
+    async def hang(_: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(10)
+        return _search_response("Fone")
+
+    respx.post(GRAPHQL_URL).mock(side_effect=hang)
+
+    async def scenario() -> None:
+        task = asyncio.create_task(ShopeeClient().execute(query="{ ping }", operation="productOfferV2"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        finally:
+            await close_http_client()
+
+    asyncio.run(scenario())
+
+    assert breaker.state == "half_open"
+    assert breaker.before_call(operation="productOfferV2").probe is True
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import httpx
+import pytest
+import respx
+from fastapi.testclient import TestClient
+
+from app.core.config import reset_settings_cache
+from app.core.credentials import CredentialPool, ShopeeCredential, get_credential_pool, parse_credentials
+from conftest import FakeClock
+
+
+def test_parse_credentials_reads_optional_weights() -> None:
+    assert parse_credentials(" a:sa:3, b:sb ,") == [
+        ShopeeCredential(app_id="a", app_secret="sa", weight=3),
+        ShopeeCredential(app_id="b", app_secret="sb", weight=1),
+    ]
+    with pytest.raises(ValueError):
+        parse_credentials("only-an-id")
+
+
+def test_credential_pool_weighted_round_robin_and_cooldown(fake_clock: FakeClock) -> None:
+    pool = CredentialPool(
+        [ShopeeCredential("a", "sa", weight=2), ShopeeCredential("b", "sb")],
+        cooldown_seconds=30,
+        timer=fake_clock,
+    )
+
+    picks = [pool.select().app_id for _ in range(6)]
+    assert picks.count("a") == 4 and picks.count("b") == 2
+    assert picks[:3] == ["a", "b", "a"]
+
+    pool.record_rate_limited("a")
+    assert {pool.select().app_id for _ in range(3)} == {"b"}
+
+    fake_clock.now += 1
+    pool.record_rate_limited("b")
+    assert pool.available_count() == 0
+    assert pool.select().app_id == "a"  # least recently throttled while all cool down
+
+    fake_clock.now += 29
+    assert pool.available_count() == 1
+    assert pool.select().app_id == "a"
+
+
+@respx.mock
+def test_rate_limited_credential_is_cooled_down_and_call_moves_to_the_next(
+    client: TestClient,
+    auth_headers: dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("SHOPEE_CREDENTIALS", "111:secret-a,222:secret-b")
+    reset_settings_cache()
+    used: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        authorization = request.headers["Authorization"]
+        used.append(authorization.split("Credential=")[1].split(",")[0])
+        if "Credential=111," in authorization:
+            return httpx.Response(200, json={"errors": [{"message": "limit", "extensions": {"code": 10030}}]})
+        node = {"itemId": 1, "productName": "Fone"}
+        return httpx.Response(
+            200,
+            json={"data": {"productOfferV2": {"nodes": [node], "pageInfo": {"limit": 20, "hasNextPage": False}}}},
+        )
+
+    respx.post("https://open-api.affiliate.shopee.com.br/graphql").mock(side_effect=handler)
+
+    response = client.post("/api/v1/shopee/offers/products/search", headers=auth_headers, json={"keyword": "fone"})
+
+    assert response.status_code == 200, response.text
+    assert used == ["111", "222"]
+    stats = {entry["appId"]: entry for entry in get_credential_pool().snapshot()}
+    assert stats["111"]["rateLimited"] == 1 and stats["111"]["coolingDown"] is True
+    assert stats["222"]["successes"] == 1
+
+
+@respx.mock
+def test_memoized_short_link_is_only_reused_for_the_credential_that_generated_it(
+    client: TestClient,
+    auth_headers: dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("SHOPEE_CREDENTIALS", "111:secret-a,222:secret-b")
+    reset_settings_cache()
+    used: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        app_id = request.headers["Authorization"].split("Credential=")[1].split(",")[0]
+        used.append(app_id)
+        return httpx.Response(
+            200, json={"data": {"generateShortLink": {"shortLink": f"https://s.shopee.com.br/{app_id}"}}}
+        )
+
+    respx.post("https://open-api.affiliate.shopee.com.br/graphql").mock(side_effect=handler)
+
+    responses = [
+        client.post("/api/v1/shopee/short-links", headers=auth_headers, json={"originUrl": "https://shopee.com.br/x"})
+        for _ in range(4)
+    ]
+
+    assert used == ["111", "222"]
+    assert [response.json()["data"]["shortLink"] for response in responses] == [
+        "https://s.shopee.com.br/111",
+        "https://s.shopee.com.br/222",
+        "https://s.shopee.com.br/111",
+        "https://s.shopee.com.br/222",
+    ]
+    assert [response.json()["meta"]["cached"] for response in responses] == [False, False, True, True]
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import httpx
+import pytest
+import respx
+from fastapi.testclient import TestClient
+
+from app.core import http_client
+from app.main import create_app
+
+
+def test_lifespan_opens_and_closes_shared_client() -> None:
+    with TestClient(create_app()):
+        client = http_client.get_http_client()
+        assert not client.is_closed
+        assert http_client.get_http_client() is client
+    assert client.is_closed
+
+
+@respx.mock
+def test_upstream_calls_reuse_shared_client(
+    client: TestClient,
+    auth_headers: dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    shared = http_client.get_http_client()
+    seen_clients: set[int] = set()
+    original_send = httpx.AsyncClient.send
+
+    async def tracking_send(self: httpx.AsyncClient, *args, **kwargs):
+        seen_clients.add(id(self))
+        return await original_send(self, *args, **kwargs)
+
+    respx.post("https://open-api.affiliate.shopee.com.br/graphql").mock(
+        return_value=httpx.Response(200, json={"data": {"generateShortLink": {"shortLink": "https://shope.ee/x"}}})
+    )
+
+    monkeypatch.setattr(httpx.AsyncClient, "send", tracking_send)
+    for _ in range(2):
+        response = client.post(
+            "/api/v1/shopee/short-links",
+            headers=auth_headers,
+            json={"originUrl": "https://shopee.com.br/produto"},
+        )
+        assert response.status_code == 200, response.text
+
+    assert seen_clients == {id(shared)}
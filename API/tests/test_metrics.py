@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import httpx
+import pytest
+import respx
+from fastapi.testclient import TestClient
+
+from app.core.config import reset_settings_cache
+from app.core.metrics import Histogram, get_metrics
+from app.main import create_app
+
+GRAPHQL_URL = "https://open-api.affiliate.shopee.com.br/graphql"
+
+
+@pytest.fixture(autouse=True)
+def _metrics_enabled(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("METRICS_ENABLED", "true")
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(3.0, "/a")
+
+    lines = list(histogram.render())
+
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1"} 2' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'latency_seconds_sum{route="/a"} 3.55' in lines
+    assert 'latency_seconds_count{route="/a"} 3' in lines
+
+
+@respx.mock
+def test_metrics_endpoint_exports_upstream_cache_and_route_series(
+    client: TestClient,
+    auth_headers: dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("SHOPEE_RATE_LIMIT_ENABLED", "true")
+    reset_settings_cache()
+    respx.post(GRAPHQL_URL).mock(
+        side_effect=[
+            httpx.Response(
+                200,
+                json={"data": {"productOfferV2": {"nodes": [], "pageInfo": {"limit": 20, "hasNextPage": False}}}},
+            ),
+            httpx.Response(
+                200,
+                json={"errors": [{"message": "limit", "extensions": {"code": 10030, "message": "rate limit"}}]},
+            ),
+        ]
+    )
+
+    for keyword in ("fone", "fone", "tv"):
+        client.post("/api/v1/shopee/offers/products/search", headers=auth_headers, json={"keyword": keyword})
+
+    metrics = get_metrics()
+    assert metrics.upstream_requests.value("productOfferV2", "ok") == 1
+    assert metrics.upstream_requests.value("productOfferV2", "rate_limited") == 1
+    assert metrics.cache_lookups.value("product_offers", "hit") == 1
+
+    response = client.get("/api/v1/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'promoshare_shopee_requests_total{operation="productOfferV2",outcome="rate_limited"} 1' in body
+    assert 'promoshare_shopee_request_duration_seconds_count{operation="productOfferV2",outcome="ok"} 1' in body
+    assert 'promoshare_cache_sets_total{cache="product_offers"} 1' in body
+    assert (
+        'promoshare_http_requests_total{method="POST",route="/api/v1/shopee/offers/products/search",status="429"} 1'
+        in body
+    )
+    assert 'promoshare_shopee_rate_limit_rps{credential="0"}' in body
+    assert 'promoshare_shopee_credential_requests_total{credential="0"} 2' in body
+    assert 'promoshare_shopee_credential_successes_total{credential="0"} 1' in body
+    assert 'promoshare_shopee_credential_rate_limited_total{credential="0"} 1' in body
+    assert 'promoshare_shopee_credential_failures_total{credential="0"} 0' in body
+    assert "123456" not in body
+    assert 'promoshare_shopee_circuit_state{state="closed"} 1' in body
+    assert "promoshare_singleflight_leaders_total 2" in body
+    assert "promoshare_singleflight_max_waiters 0" in body
+
+
+def test_metrics_endpoint_is_off_by_default(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("METRICS_ENABLED")
+    reset_settings_cache()
+
+    with TestClient(create_app()) as client:
+        assert client.get("/api/v1/metrics").status_code == 404
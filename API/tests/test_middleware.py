@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import logging
+
+import httpx
+import pytest
+import respx
+from fastapi.testclient import TestClient
+
+GRAPHQL_URL = "https://open-api.affiliate.shopee.com.br/graphql"
+
+
+def _timings(header: str) -> dict[str, float]:
+    entries = (entry.strip().split(";dur=") for entry in header.split(","))
+    return {name: float(duration) for name, duration in entries}
+
+
+def test_request_id_is_echoed_or_generated(client: TestClient) -> None:
+    echoed = client.get("/api/v1/health", headers={"X-Request-ID": "abc-123"})
+    generated = client.get("/api/v1/health")
+
+    assert echoed.headers["X-Request-ID"] == "abc-123"
+    assert len(generated.headers["X-Request-ID"]) == 32
+    assert set(_timings(generated.headers["Server-Timing"])) == {"serialization", "total"}
+
+
+@respx.mock
+def test_server_timing_breaks_request_into_stages(
+    client: TestClient,
+    auth_headers: dict[str, str],
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    respx.post(GRAPHQL_URL).mock(
+        return_value=httpx.Response(
+            200,
+            json={"data": {"productOfferV2": {"nodes": [], "pageInfo": {"limit": 20, "hasNextPage": False}}}},
+        )
+    )
+
+    with caplog.at_level(logging.INFO, logger="app.request"):
+        response = client.post("/api/v1/shopee/offers/products/search", headers=auth_headers, json={"keyword": "tv"})
+
+    assert response.status_code == 200, response.text
+    timings = _timings(response.headers["Server-Timing"])
+    assert {"auth", "cache", "upstream", "validation", "serialization", "total"} <= set(timings)
+    assert timings["upstream"] <= timings["total"]
+    log_line = caplog.records[-1].getMessage()
+    assert "path=/api/v1/shopee/offers/products/search status=200" in log_line
+    assert "upstream_ms=" in log_line
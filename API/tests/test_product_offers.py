@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+import asyncio
+import json
+import re
+
 import httpx
 import respx
 from fastapi.testclient import TestClient
 
-from app.services.shopee_offer_service import parse_shopee_product_url_ids
+from app.core.cache import get_cache_manager
+from app.services.shopee_offer_service import _cancel_task, parse_shopee_product_url_ids
 
 
 def test_parse_shopee_product_url_ids_supports_slug_pattern() -> None:
@@ -170,10 +175,10 @@ def test_product_from_short_share_url_resolves_redirect_and_generates_short_link
     short_url = "https://s.shopee.com.br/1Vty9Ij1Sa?share_channel_code=1"
     final_url = "https://shopee.com.br/opaanlp/578878861/23297695767?__mobile__=1"
 
-    respx.get(short_url).mock(
+    short_route = respx.get(short_url).mock(
         return_value=httpx.Response(301, headers={"Location": final_url})
     )
-    respx.get(final_url).mock(return_value=httpx.Response(200, text="ok"))
+    final_route = respx.get(final_url).mock(return_value=httpx.Response(200, text="<html>product page</html>"))
 
     def graphql_handler(request: httpx.Request) -> httpx.Response:
         body = request.content.decode("utf-8")
@@ -214,6 +219,13 @@ def test_product_from_short_share_url_resolves_redirect_and_generates_short_link
     assert payload["data"]["itemId"] == 23297695767
     assert payload["data"]["shortLink"] == "https://s.shopee.com.br/final-short"
     assert payload["data"]["productLink"] == "https://shopee.com.br/product/578878861/23297695767"
+    assert final_route.call_count == 0
+    assert payload["meta"]["cacheStages"]["urlResolution"] is False
+
+    again = client.post("/api/v1/shopee/products/from-url", headers=auth_headers, json={"url": short_url})
+    assert again.status_code == 200, again.text
+    assert again.json()["meta"]["cacheStages"] == {"urlResolution": True, "result": True}
+    assert short_route.call_count == 1
 
 
 @respx.mock
@@ -239,3 +251,634 @@ def test_product_offer_maps_rate_limit_to_429(client: TestClient, auth_headers:
     )
     assert response.status_code == 429
     assert response.json()["error"]["code"] == "shopee_rate_limited"
+
+
+@respx.mock
+def test_cached_search_hit_is_byte_compatible_with_encoded_envelope(
+    client: TestClient,
+    auth_headers: dict[str, str],
+) -> None:
+    respx.post("https://open-api.affiliate.shopee.com.br/graphql").mock(
+        return_value=httpx.Response(
+            200,
+            json={
+                "data": {
+                    "productOfferV2": {
+                        "nodes": [
+                            {
+                                "itemId": 17979995178,
+                                "productName": 'Sabão "Ação" 1L',
+                                "productCatIds": [100630, 100631],
+                                "priceMin": "19.9",
+                                "commissionRate": "0.07",
+                            }
+                        ],
+                        "pageInfo": {"limit": 20, "hasNextPage": True, "scrollId": "abc"},
+                    }
+                }
+            },
+        )
+    )
+    request_json = {"keyword": "sabao"}
+
+    miss = client.post("/api/v1/shopee/offers/products/search", headers=auth_headers, json=request_json)
+    hit = client.post("/api/v1/shopee/offers/products/search", headers=auth_headers, json=request_json)
+
+    assert miss.json()["meta"]["cached"] is False
+    assert hit.json()["meta"]["cached"] is True
+    assert hit.headers["content-type"] == miss.headers["content-type"]
+    assert hit.content == miss.content.replace(b'"cached":false', b'"cached":true')
+
+
+@respx.mock
+def test_product_offer_batch_serves_hits_and_merges_misses_into_one_query(
+    client: TestClient,
+    auth_headers: dict[str, str],
+) -> None:
+    captured_queries: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = request.content.decode("utf-8")
+        captured_queries.append(body)
+        if "q0:" not in body:
+            node = {"itemId": 1, "productName": "Fone"}
+            return httpx.Response(
+                200,
+                json={"data": {"productOfferV2": {"nodes": [node], "pageInfo": {"limit": 20, "hasNextPage": False}}}},
+            )
+        return httpx.Response(
+            200,
+            json={
+                "data": {
+                    "q0": {"nodes": [{"itemId": 2, "productName": "SSD"}], "pageInfo": {"limit": 20, "hasNextPage": True}},
+                    "q1": None,
+                },
+                "errors": [{"message": "invalid keyword", "path": ["q1"], "extensions": {"code": 11000}}],
+            },
+        )
+
+    route = respx.post("https://open-api.affiliate.shopee.com.br/graphql").mock(side_effect=handler)
+
+    warm = client.post("/api/v1/shopee/offers/products/search", headers=auth_headers, json={"keyword": "fone"})
+    assert warm.status_code == 200, warm.text
+
+    response = client.post(
+        "/api/v1/shopee/offers/products/search/batch",
+        headers=auth_headers,
+        json={"requests": [{"keyword": "fone"}, {"keyword": "ssd"}, {"keyword": "???"}, {"keyword": "ssd"}]},
+    )
+
+    assert response.status_code == 200, response.text
+    items = response.json()["data"]["items"]
+    assert route.call_count == 2
+    assert captured_queries[1].count("productOfferV2") == 2
+    assert [item["success"] for item in items] == [True, True, False, True]
+    assert [item["cached"] for item in items] == [True, False, False, False]
+    assert items[1]["data"]["nodes"][0]["productName"] == "SSD"
+    assert items[2]["error"]["code"] == "shopee_upstream_error"
+
+    single = client.post("/api/v1/shopee/offers/products/search", headers=auth_headers, json={"keyword": "ssd"})
+    assert single.json()["meta"]["cached"] is True
+    assert route.call_count == 2
+
+
+@respx.mock
+def test_product_offer_stream_walks_pages_as_ndjson_up_to_max_items(
+    client: TestClient,
+    auth_headers: dict[str, str],
+) -> None:
+    requested_pages: list[int] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        page = int(re.search(r"page:(\d+)", request.content.decode("utf-8")).group(1))
+        requested_pages.append(page)
+        nodes = [{"itemId": page * 10 + offset} for offset in range(2)]
+        return httpx.Response(
+            200,
+            json={"data": {"productOfferV2": {"nodes": nodes, "pageInfo": {"limit": 2, "hasNextPage": page < 5}}}},
+        )
+
+    respx.post("https://open-api.affiliate.shopee.com.br/graphql").mock(side_effect=handler)
+
+    response = client.post(
+        "/api/v1/shopee/offers/products/stream",
+        headers=auth_headers,
+        json={"keyword": "fone", "limit": 2, "maxItems": 5},
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["itemId"] for line in lines] == [10, 11, 20, 21, 30]
+    assert sorted(requested_pages) == [1, 2, 3]
+    stats = get_cache_manager().stats()
+    assert stats["product_offers"]["entries"] == 0
+    assert stats["product_items"]["entries"] == 0
+
+
+@respx.mock
+def test_product_offer_stream_reports_mid_stream_error_as_last_line(
+    client: TestClient,
+    auth_headers: dict[str, str],
+) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if "page:2" in request.content.decode("utf-8"):
+            return httpx.Response(200, json={"errors": [{"message": "too many", "extensions": {"code": 10030}}]})
+        return httpx.Response(
+            200,
+            json={"data": {"productOfferV2": {"nodes": [{"itemId": 1}], "pageInfo": {"limit": 1, "hasNextPage": True}}}},
+        )
+
+    respx.post("https://open-api.affiliate.shopee.com.br/graphql").mock(side_effect=handler)
+
+    response = client.post(
+        "/api/v1/shopee/offers/products/stream",
+        headers=auth_headers,
+        json={"keyword": "fone", "limit": 1},
+    )
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0]["itemId"] == 1
+    assert lines[-1]["error"]["code"] == "shopee_rate_limited"
+
+
+@respx.mock
+def test_product_offer_sparse_fields_selection_and_superset_cache_hit(
+    client: TestClient,
+    auth_headers: dict[str, str],
+) -> None:
+    captured_queries: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        captured_queries.append(json.loads(request.content)["query"])
+        node = {"itemId": 7, "productName": "Fone", "priceMin": "10", "shopName": "Loja"}
+        return httpx.Response(
+            200,
+            json={"data": {"productOfferV2": {"nodes": [node], "pageInfo": {"limit": 20, "hasNextPage": False}}}},
+        )
+
+    route = respx.post("https://open-api.affiliate.shopee.com.br/graphql").mock(side_effect=handler)
+
+    sparse = client.post(
+        "/api/v1/shopee/offers/products/search",
+        headers=auth_headers,
+        json={"keyword": "fone", "fields": ["productName", "itemId", "productName"]},
+    )
+    assert sparse.status_code == 200, sparse.text
+    assert "nodes{ itemId productName }" in captured_queries[0]
+    assert "shopName" not in captured_queries[0]
+
+    full = client.post("/api/v1/shopee/offers/products/search", headers=auth_headers, json={"keyword": "fone"})
+    assert full.json()["meta"]["cached"] is False
+    assert route.call_count == 2
+
+    other_subset = client.post(
+        "/api/v1/shopee/offers/products/search",
+        headers=auth_headers,
+        json={"keyword": "fone", "fields": ["itemId", "priceMin"]},
+    )
+    assert route.call_count == 2
+    assert other_subset.json()["meta"]["cached"] is True
+    node = other_subset.json()["data"]["nodes"][0]
+    assert node["itemId"] == 7 and node["priceMin"] == "10"
+    assert node["productName"] is None and node["shopName"] is None
+
+
+def test_product_offer_fields_rejects_unknown_names(client: TestClient, auth_headers: dict[str, str]) -> None:
+    response = client.post(
+        "/api/v1/shopee/offers/products/search",
+        headers=auth_headers,
+        json={"keyword": "fone", "fields": ["itemId", "secretField"]},
+    )
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == "validation_error"
+
+
+@respx.mock
+def test_product_offer_cache_key_canonicalizes_keyword_and_serves_smaller_page_one_limit(
+    client: TestClient,
+    auth_headers: dict[str, str],
+) -> None:
+    sent_variables: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent_variables.append(json.loads(request.content)["query"])
+        nodes = [{"itemId": item_id} for item_id in range(1, 6)]
+        return httpx.Response(
+            200,
+            json={"data": {"productOfferV2": {"nodes": nodes, "pageInfo": {"limit": 5, "hasNextPage": True}}}},
+        )
+
+    route = respx.post("https://open-api.affiliate.shopee.com.br/graphql").mock(side_effect=handler)
+
+    wide = client.post(
+        "/api/v1/shopee/offers/products/search",
+        headers=auth_headers,
+        json={"keyword": "  iPhone   15 ", "limit": 5},
+    )
+    assert wide.json()["meta"]["cached"] is False
+    assert 'keyword:"iPhone   15"' in sent_variables[0]
+
+    narrow = client.post(
+        "/api/v1/shopee/offers/products/search",
+        headers=auth_headers,
+        json={"keyword": "iphone 15", "limit": 2},
+    )
+    assert route.call_count == 1
+    assert narrow.json()["meta"]["cached"] is True
+    data = narrow.json()["data"]
+    assert [node["itemId"] for node in data["nodes"]] == [1, 2]
+    assert data["pageInfo"]["limit"] == 2 and data["pageInfo"]["hasNextPage"] is True
+
+    larger = client.post(
+        "/api/v1/shopee/offers/products/search",
+        headers=auth_headers,
+        json={"keyword": "iphone 15", "limit": 10},
+    )
+    assert larger.json()["meta"]["cached"] is False
+    assert route.call_count == 2
+
+    second_page = client.post(
+        "/api/v1/shopee/offers/products/search",
+        headers=auth_headers,
+        json={"keyword": "iphone 15", "page": 2, "limit": 2},
+    )
+    assert second_page.json()["meta"]["cached"] is False
+    assert route.call_count == 3
+
+
+@respx.mock
+def test_product_from_url_uses_item_index_fed_by_earlier_search(
+    client: TestClient,
+    auth_headers: dict[str, str],
+) -> None:
+    captured_queries: list[str] = []
+    node = {
+        "itemId": 58250067538,
+        "shopId": 560537952,
+        "productName": "Apple Mac Mini M4",
+        "priceMin": "4429",
+        "productLink": "https://shopee.com.br/product/560537952/58250067538",
+    }
+
+    def graphql_handler(request: httpx.Request) -> httpx.Response:
+        body = request.content.decode("utf-8")
+        captured_queries.append(body)
+        if "generateShortLink" in body:
+            return httpx.Response(200, json={"data": {"generateShortLink": {"shortLink": "https://s.shopee.com.br/mac"}}})
+        return httpx.Response(
+            200,
+            json={"data": {"productOfferV2": {"nodes": [node], "pageInfo": {"limit": 20, "hasNextPage": False}}}},
+        )
+
+    respx.post("https://open-api.affiliate.shopee.com.br/graphql").mock(side_effect=graphql_handler)
+
+    search = client.post("/api/v1/shopee/offers/products/search", headers=auth_headers, json={"keyword": "mac mini"})
+    assert search.status_code == 200, search.text
+
+    response = client.post(
+        "/api/v1/shopee/products/from-url",
+        headers=auth_headers,
+        json={"url": "https://shopee.com.br/Apple-Mac-Mini-M4-i.560537952.58250067538"},
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["data"]["productName"] == "Apple Mac Mini M4"
+    assert response.json()["data"]["shortLink"] == "https://s.shopee.com.br/mac"
+    assert sum("productOfferV2" in query for query in captured_queries) == 1
+
+    by_item = client.post(
+        "/api/v1/shopee/offers/products/search",
+        headers=auth_headers,
+        json={"itemId": 58250067538, "fields": ["itemId", "priceMin"]},
+    )
+    assert by_item.json()["meta"]["cached"] is True
+    indexed_node = by_item.json()["data"]["nodes"][0]
+    assert indexed_node["priceMin"] == "4429" and indexed_node["productName"] is None
+    assert sum("productOfferV2" in query for query in captured_queries) == 1
+
+
+@respx.mock
+def test_product_from_url_follows_relative_share_link_hops_until_ids_appear(
+    client: TestClient,
+    auth_headers: dict[str, str],
+) -> None:
+    def graphql_handler(request: httpx.Request) -> httpx.Response:
+        if "generateShortLink" in request.content.decode("utf-8"):
+            return httpx.Response(200, json={"data": {"generateShortLink": {"shortLink": "https://s.shopee.com.br/p"}}})
+        node = {"itemId": 22, "shopId": 11, "productName": "Caneca"}
+        return httpx.Response(
+            200,
+            json={"data": {"productOfferV2": {"nodes": [node], "pageInfo": {"limit": 1, "hasNextPage": False}}}},
+        )
+
+    respx.post("https://open-api.affiliate.shopee.com.br/graphql").mock(side_effect=graphql_handler)
+    respx.get("https://s.shopee.com.br/abc").mock(
+        return_value=httpx.Response(302, headers={"Location": "https://l.shopee.com.br/share?id=1"})
+    )
+    respx.get("https://l.shopee.com.br/share?id=1").mock(
+        return_value=httpx.Response(302, headers={"Location": "/product/11/22?utm=x"})
+    )
+    product_route = respx.get("https://l.shopee.com.br/product/11/22?utm=x").mock(return_value=httpx.Response(200))
+
+    response = client.post(
+        "/api/v1/shopee/products/from-url",
+        headers=auth_headers,
+        json={"url": "https://s.shopee.com.br/abc"},
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json()["data"]["productName"] == "Caneca"
+    assert product_route.call_count == 0
+
+
+@respx.mock
+def test_legacy_offers_from_url_route_reports_cached_as_bool(
+    client: TestClient,
+    auth_headers: dict[str, str],
+) -> None:
+    def graphql_handler(request: httpx.Request) -> httpx.Response:
+        if "generateShortLink" in request.content.decode("utf-8"):
+            return httpx.Response(200, json={"data": {"generateShortLink": {"shortLink": "https://s.shopee.com.br/p"}}})
+        node = {"itemId": 22, "shopId": 11, "productName": "Caneca"}
+        return httpx.Response(
+            200,
+            json={"data": {"productOfferV2": {"nodes": [node], "pageInfo": {"limit": 1, "hasNextPage": False}}}},
+        )
+
+    respx.post("https://open-api.affiliate.shopee.com.br/graphql").mock(side_effect=graphql_handler)
+
+    metas = [
+        client.post(
+            "/api/v1/shopee/offers/products/from-url",
+            headers=auth_headers,
+            json={"url": "https://shopee.com.br/product/11/22"},
+        ).json()["meta"]
+        for _ in range(2)
+    ]
+
+    assert [meta["cached"] for meta in metas] == [False, True]
+    assert metas[1] == {"operation": "productFromUrl", "cached": True, "cacheStages": {"result": True}}
+
+
+@respx.mock
+def test_product_from_url_caches_final_result_and_not_found(
+    client: TestClient,
+    auth_headers: dict[str, str],
+) -> None:
+    def graphql_handler(request: httpx.Request) -> httpx.Response:
+        body = request.content.decode("utf-8")
+        if "generateShortLink" in body:
+            return httpx.Response(200, json={"data": {"generateShortLink": {"shortLink": "https://s.shopee.com.br/p"}}})
+        nodes = [{"itemId": 22, "shopId": 11, "productName": "Caneca"}] if "itemId:22" in body else []
+        return httpx.Response(
+            200,
+            json={"data": {"productOfferV2": {"nodes": nodes, "pageInfo": {"limit": 1, "hasNextPage": False}}}},
+        )
+
+    route = respx.post("https://open-api.affiliate.shopee.com.br/graphql").mock(side_effect=graphql_handler)
+
+    first = client.post(
+        "/api/v1/shopee/products/from-url",
+        headers=auth_headers,
+        json={"url": "https://shopee.com.br/product/11/22"},
+    )
+    assert first.status_code == 200, first.text
+    assert first.json()["meta"]["cached"] is False
+    assert first.json()["meta"]["cacheStages"] == {
+        "result": False,
+        "productSearch": False,
+        "shortLink": False,
+    }
+    assert route.call_count == 2
+
+    again = client.post(
+        "/api/v1/shopee/products/from-url",
+        headers=auth_headers,
+        json={"url": "https://shopee.com.br/Caneca-i.11.22?utm_source=bot"},
+    )
+    assert again.json()["data"] == first.json()["data"]
+    assert again.json()["meta"]["cached"] is True
+    assert again.json()["meta"]["cacheStages"] == {"result": True}
+    assert route.call_count == 2
+
+    for _ in range(2):
+        missing = client.post(
+            "/api/v1/shopee/products/from-url",
+            headers=auth_headers,
+            json={"url": "https://shopee.com.br/product/11/99"},
+        )
+        assert missing.status_code == 404
+        assert missing.json()["error"]["code"] == "product_not_found"
+    assert route.call_count == 3
+
+
+@respx.mock
+def test_product_from_url_generates_short_link_while_search_runs(
+    client: TestClient,
+    auth_headers: dict[str, str],
+) -> None:
+    events: list[str] = []
+
+    async def graphql_handler(request: httpx.Request) -> httpx.Response:
+        body = request.content.decode("utf-8")
+        if "generateShortLink" in body:
+            events.append("shortLink")
+            return httpx.Response(200, json={"data": {"generateShortLink": {"shortLink": "https://s.shopee.com.br/x"}}})
+        await asyncio.sleep(0.05)
+        events.append("search")
+        node = {"itemId": 22, "shopId": 11, "productLink": "https://shopee.com.br/product/11/22"}
+        return httpx.Response(
+            200,
+            json={"data": {"productOfferV2": {"nodes": [node], "pageInfo": {"limit": 1, "hasNextPage": False}}}},
+        )
+
+    route = respx.post("https://open-api.affiliate.shopee.com.br/graphql").mock(side_effect=graphql_handler)
+
+    response = client.post(
+        "/api/v1/shopee/products/from-url",
+        headers=auth_headers,
+        json={"url": "https://shopee.com.br/Caneca-i.11.22"},
+    )
+    assert response.status_code == 200, response.text
+    assert events == ["shortLink", "search"]
+    assert route.call_count == 2
+
+
+@respx.mock
+def test_product_from_url_reshortens_when_product_link_differs(
+    client: TestClient,
+    auth_headers: dict[str, str],
+) -> None:
+    shortened: list[str] = []
+
+    def graphql_handler(request: httpx.Request) -> httpx.Response:
+        body = request.content.decode("utf-8")
+        if "generateShortLink" in body:
+            shortened.append(body)
+            return httpx.Response(
+                200,
+                json={"data": {"generateShortLink": {"shortLink": f"https://s.shopee.com.br/{len(shortened)}"}}},
+            )
+        node = {"itemId": 22, "shopId": 33, "productLink": "https://shopee.com.br/product/33/22"}
+        return httpx.Response(
+            200,
+            json={"data": {"productOfferV2": {"nodes": [node], "pageInfo": {"limit": 1, "hasNextPage": False}}}},
+        )
+
+    respx.post("https://open-api.affiliate.shopee.com.br/graphql").mock(side_effect=graphql_handler)
+
+    response = client.post(
+        "/api/v1/shopee/products/from-url",
+        headers=auth_headers,
+        json={"url": "https://shopee.com.br/product/11/22"},
+    )
+    assert response.status_code == 200, response.text
+    data = response.json()["data"]
+    assert data["shopId"] == 33
+    assert data["productLink"] == "https://shopee.com.br/product/33/22"
+    # The speculative mutation for product/11/22 may be cancelled before it is sent.
+    assert "product/33/22" in shortened[-1]
+    assert data["shortLink"] == f"https://s.shopee.com.br/{len(shortened)}"
+
+
+@respx.mock
+def test_product_from_url_batch_dedupes_and_uses_one_search_and_one_mutation(
+    client: TestClient,
+    auth_headers: dict[str, str],
+) -> None:
+    captured_queries: list[str] = []
+
+    def graphql_handler(request: httpx.Request) -> httpx.Response:
+        query = json.loads(request.content)["query"]
+        captured_queries.append(query)
+        if "generateShortLink" in query:
+            return httpx.Response(200, json={"data": {"link0": {"shortLink": "https://s.shopee.com.br/caneca"}}})
+        found = {"nodes": [{"itemId": 22, "shopId": 11, "productName": "Caneca"}], "pageInfo": {"limit": 1}}
+        missing = {"nodes": [], "pageInfo": {"limit": 1, "hasNextPage": False}}
+        return httpx.Response(200, json={"data": {"q0": found, "q1": missing}})
+
+    respx.post("https://open-api.affiliate.shopee.com.br/graphql").mock(side_effect=graphql_handler)
+
+    urls = [
+        "https://shopee.com.br/product/11/22",
+        "https://shopee.com.br/Caneca-i.11.22",
+        "https://shopee.com.br/product/11/99",
+        "https://shopee.com.br/sem-ids",
+    ]
+    response = client.post("/api/v1/shopee/products/from-url/batch", headers=auth_headers, json={"urls": urls})
+
+    assert response.status_code == 200, response.text
+    items = response.json()["data"]["items"]
+    assert [item["success"] for item in items] == [True, True, False, False]
+    assert items[0]["data"] == items[1]["data"]
+    assert items[0]["data"]["shortLink"] == "https://s.shopee.com.br/caneca"
+    assert items[2]["error"]["code"] == "product_not_found"
+    assert items[3]["error"]["code"] == "invalid_product_url"
+    assert response.json()["meta"] == {"operation": "productFromUrl", "batch": True, "cached": False}
+    assert len(captured_queries) == 2
+    assert captured_queries[0].count("productOfferV2") == 2
+
+    single = client.post("/api/v1/shopee/products/from-url", headers=auth_headers, json={"url": urls[0]})
+    assert single.json()["meta"]["cacheStages"]["result"] is True
+    assert len(captured_queries) == 2
+
+
+RATE_LIMITED = {"errors": [{"message": "limit", "extensions": {"code": 10030, "message": "rate limit"}}]}
+
+
+@respx.mock
+def test_product_from_url_batch_keeps_cache_hits_when_upstream_is_rate_limited(
+    client: TestClient,
+    auth_headers: dict[str, str],
+) -> None:
+    rate_limit_short_links = False
+
+    def graphql_handler(request: httpx.Request) -> httpx.Response:
+        query = json.loads(request.content)["query"]
+        if "generateShortLink" in query:
+            if rate_limit_short_links:
+                return httpx.Response(200, json=RATE_LIMITED)
+            return httpx.Response(200, json={"data": {"generateShortLink": {"shortLink": "https://s.shopee.com.br/a"}}})
+        item_id = int(re.search(r"itemId:(\d+)", query).group(1))
+        node = {"itemId": item_id, "shopId": 11, "productName": "Caneca"}
+        page = {"nodes": [node], "pageInfo": {"limit": 1, "hasNextPage": False}}
+        return httpx.Response(200, json={"data": {"productOfferV2": page, "q0": page}})
+
+    route = respx.post("https://open-api.affiliate.shopee.com.br/graphql").mock(side_effect=graphql_handler)
+    urls = ["https://shopee.com.br/product/11/22", "https://shopee.com.br/product/33/44"]
+    warm = client.post("/api/v1/shopee/products/from-url", headers=auth_headers, json={"url": urls[0]})
+    assert warm.status_code == 200, warm.text
+
+    route.mock(return_value=httpx.Response(200, json=RATE_LIMITED))
+    searched = client.post("/api/v1/shopee/products/from-url/batch", headers=auth_headers, json={"urls": urls})
+
+    assert searched.status_code == 200, searched.text
+    items = searched.json()["data"]["items"]
+    assert [item["success"] for item in items] == [True, False]
+    assert items[0]["cached"] is True and items[0]["data"]["productName"] == "Caneca"
+    assert items[1]["error"]["code"] == "shopee_rate_limited"
+
+    # The search succeeds but the short-link mutation is rate limited.
+    route.mock(side_effect=graphql_handler)
+    rate_limit_short_links = True
+    linked = client.post(
+        "/api/v1/shopee/products/from-url/batch",
+        headers=auth_headers,
+        json={"urls": [urls[0], "https://shopee.com.br/product/11/55"]},
+    )
+
+    assert linked.status_code == 200, linked.text
+    items = linked.json()["data"]["items"]
+    assert [item["success"] for item in items] == [True, False]
+    assert items[1]["error"]["code"] == "shopee_rate_limited"
+
+
+@respx.mock
+def test_product_offer_batch_keeps_cache_hits_when_upstream_is_rate_limited(
+    client: TestClient,
+    auth_headers: dict[str, str],
+) -> None:
+    page = {"nodes": [{"itemId": 1, "productName": "Fone"}], "pageInfo": {"limit": 20, "hasNextPage": False}}
+    route = respx.post("https://open-api.affiliate.shopee.com.br/graphql").mock(
+        return_value=httpx.Response(200, json={"data": {"productOfferV2": page}})
+    )
+    warm = client.post("/api/v1/shopee/offers/products/search", headers=auth_headers, json={"keyword": "fone"})
+    assert warm.status_code == 200, warm.text
+
+    route.mock(return_value=httpx.Response(200, json=RATE_LIMITED))
+    response = client.post(
+        "/api/v1/shopee/offers/products/search/batch",
+        headers=auth_headers,
+        json={"requests": [{"keyword": "fone"}, {"keyword": "ssd"}]},
+    )
+
+    assert response.status_code == 200, response.text
+    items = response.json()["data"]["items"]
+    assert [item["success"] for item in items] == [True, False]
+    assert items[0]["cached"] is True
+    assert items[1]["error"]["code"] == "shopee_rate_limited"
+
+def test_cancel_task_propagates_cancellation_of_the_caller() -> None:
+    continued: list[bool] = []
+
+    async def slow_cleanup() -> None:
+        try:
+            await asyncio.sleep(10)
+        finally:
+            await asyncio.sleep(0.05)
+
+    async def caller(child: asyncio.Task[None]) -> None:
+        await _cancel_task(child)
+        continued.append(True)
+
+    async def scenario() -> bool:
+        child = asyncio.create_task(slow_cleanup())
+        await asyncio.sleep(0)
+        outer = asyncio.create_task(caller(child))
+        await asyncio.sleep(0.01)
+        outer.cancel()
+        await asyncio.gather(outer, return_exceptions=True)
+        return outer.cancelled()
+
+    assert asyncio.run(scenario()) is True
+    assert continued == []
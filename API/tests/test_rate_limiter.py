@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+import respx
+from fastapi.testclient import TestClient
+
+from app.core.config import reset_settings_cache
+from app.core.exceptions import ApiException
+from app.core.rate_limiter import (
+    AdaptiveRateLimiter,
+    Priority,
+    current_priority,
+    get_rate_limiter,
+    upstream_priority,
+)
+from app.services import shopee_client
+from app.services.shopee_signing import build_shopee_signature
+
+
+def _limiter(**overrides: float) -> AdaptiveRateLimiter:
+    options = {
+        "rate": 20.0,
+        "min_rate": 1.0,
+        "max_rate": 40.0,
+        "burst": 1,
+        "increase_rps": 0.5,
+        "decrease_factor": 0.5,
+        "max_wait_seconds": 1.0,
+    }
+    options.update(overrides)
+    return AdaptiveRateLimiter(**options)
+
+
+def test_rate_limiter_learns_rate_with_aimd() -> None:
+    limiter = _limiter()
+
+    limiter.on_rate_limited()
+    limiter.on_rate_limited()
+    assert limiter.rate == 5.0
+
+    for _ in range(4):
+        limiter.on_success()
+    assert limiter.rate == 7.0
+
+    for _ in range(10):
+        limiter.on_rate_limited()
+    assert limiter.rate == 1.0
+    assert limiter.snapshot()["rateLimited"] == 12
+
+
+def test_rate_limiter_serves_interactive_waiters_before_bulk() -> None:
+    limiter = _limiter()
+    order: list[str] = []
+
+    async def caller(name: str, priority: Priority) -> None:
+        await limiter.acquire(priority)
+        order.append(name)
+
+    async def scenario() -> int:
+        await limiter.acquire()  # drains the single-token bucket
+        bulk = asyncio.create_task(caller("bulk", Priority.BULK))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(caller("interactive", Priority.INTERACTIVE))
+        await asyncio.sleep(0)
+        depth = limiter.queue_depth()
+        await asyncio.gather(bulk, interactive)
+        return depth
+
+    assert asyncio.run(scenario()) == 2
+    assert order == ["interactive", "bulk"]
+    assert limiter.queue_depth() == 0
+
+
+def test_rate_limiter_fails_after_max_wait() -> None:
+    limiter = _limiter(rate=1.0, max_wait_seconds=0.05)
+
+    async def scenario() -> None:
+        await limiter.acquire()
+        await limiter.acquire(Priority.BULK)
+
+    with pytest.raises(ApiException) as exc_info:
+        asyncio.run(scenario())
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.details["priority"] == "bulk"
+    assert limiter.queue_depth() == 0
+    assert limiter.snapshot()["queueTimeouts"] == 1
+
+
+def test_rate_limiter_wait_is_capped_by_the_callers_budget() -> None:
+    limiter = _limiter(rate=1.0, max_wait_seconds=10.0)
+
+    async def scenario() -> None:
+        await limiter.acquire()
+        await limiter.acquire(max_wait=0.05)
+
+    with pytest.raises(ApiException) as exc_info:
+        asyncio.run(scenario())
+    assert exc_info.value.details["maxWaitSeconds"] == 0.05
+    assert limiter.queue_depth() == 0
+
+
+@respx.mock
+def test_request_is_signed_after_waiting_for_the_limiter(
+    client: TestClient,
+    auth_headers: dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("SHOPEE_RATE_LIMIT_ENABLED", "true")
+    reset_settings_cache()
+    events: list[str] = []
+    limiter = get_rate_limiter("123456")
+    original_acquire = limiter.acquire
+
+    async def acquire(*args: object, **kwargs: object) -> None:
+        await original_acquire(*args, **kwargs)
+        events.append("acquire")
+
+    def sign(**kwargs: object) -> object:
+        events.append("sign")
+        return build_shopee_signature(**kwargs)
+
+    monkeypatch.setattr(limiter, "acquire", acquire)
+    monkeypatch.setattr(shopee_client, "build_shopee_signature", sign)
+    respx.post("https://open-api.affiliate.shopee.com.br/graphql").mock(
+        return_value=httpx.Response(
+            200,
+            json={"data": {"productOfferV2": {"nodes": [], "pageInfo": {"limit": 20, "hasNextPage": False}}}},
+        )
+    )
+
+    response = client.post("/api/v1/shopee/offers/products/search", headers=auth_headers, json={"keyword": "tv"})
+
+    assert response.status_code == 200, response.text
+    assert events == ["acquire", "sign"]
+
+
+def test_upstream_priority_keeps_the_outermost_choice() -> None:
+    assert current_priority() is Priority.NORMAL
+    with upstream_priority(Priority.INTERACTIVE):
+        with upstream_priority(Priority.BULK):
+            assert current_priority() is Priority.INTERACTIVE
+
+
+@respx.mock
+def test_product_from_url_batch_calls_upstream_as_bulk(client: TestClient, auth_headers: dict[str, str]) -> None:
+    priorities: list[Priority] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        priorities.append(current_priority())
+        if "generateShortLink" in request.content.decode("utf-8"):
+            return httpx.Response(200, json={"data": {"link0": {"shortLink": "https://s.shopee.com.br/p"}}})
+        node = {"itemId": 22, "shopId": 11, "productName": "Caneca"}
+        return httpx.Response(
+            200,
+            json={"data": {"q0": {"nodes": [node], "pageInfo": {"limit": 1, "hasNextPage": False}}}},
+        )
+
+    respx.post("https://open-api.affiliate.shopee.com.br/graphql").mock(side_effect=handler)
+
+    response = client.post(
+        "/api/v1/shopee/products/from-url/batch",
+        headers=auth_headers,
+        json={"urls": ["https://shopee.com.br/product/11/22"]},
+    )
+
+    assert response.status_code == 200, response.text
+    assert priorities == [Priority.BULK, Priority.BULK]
+
+
+@respx.mock
+def test_upstream_rate_limit_code_slows_the_limiter(
+    client: TestClient,
+    auth_headers: dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("SHOPEE_RATE_LIMIT_ENABLED", "true")
+    reset_settings_cache()
+    respx.post("https://open-api.affiliate.shopee.com.br/graphql").mock(
+        return_value=httpx.Response(
+            200,
+            json={"errors": [{"message": "limit", "extensions": {"code": 10030, "message": "rate limit"}}]},
+        )
+    )
+    initial_rate = get_rate_limiter("123456").rate
+
+    response = client.post("/api/v1/shopee/offers/products/search", headers=auth_headers, json={"keyword": "tv"})
+
+    assert response.status_code == 429
+    assert get_rate_limiter("123456").rate == initial_rate * 0.5
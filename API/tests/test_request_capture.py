@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import httpx
+import pytest
+import respx
+from fastapi.testclient import TestClient
+
+from app.core.config import reset_settings_cache
+from app.core.request_capture import reset_request_capture, sanitize_body
+from app.main import create_app
+
+
+def test_sanitize_body_redacts_credentials_and_clips_long_strings() -> None:
+    body = {"keyword": "x" * 5000, "nested": [{"apiKey": "k", "access_token": "t"}], "page": 1}
+
+    sanitized = sanitize_body(body)
+
+    assert len(sanitized["keyword"]) == 2048
+    assert sanitized["nested"] == [{"apiKey": "[redacted]", "access_token": "[redacted]"}]
+    assert sanitized["page"] == 1
+
+
+@respx.mock
+def test_capture_records_only_replayable_routes(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    capture_path = tmp_path / "captures" / "requests.jsonl"
+    monkeypatch.setenv("REQUEST_CAPTURE_PATH", str(capture_path))
+    reset_settings_cache()
+    respx.post("https://open-api.affiliate.shopee.com.br/graphql").mock(
+        return_value=httpx.Response(
+            200,
+            json={"data": {"productOfferV2": {"nodes": [], "pageInfo": {"limit": 20, "hasNextPage": False}}}},
+        )
+    )
+
+    with TestClient(create_app()) as client:
+        login = client.post("/api/v1/auth/login", json={"username": "admin", "password": "adminpass"})
+        headers = {"Authorization": f"Bearer {login.json()['data']['accessToken']}"}
+        response = client.post(
+            "/api/v1/shopee/offers/products/search",
+            headers={**headers, "X-Request-ID": "req-1"},
+            json={"keyword": "fone", "limit": 20},
+        )
+        assert response.status_code == 200
+    reset_request_capture()
+
+    lines = [json.loads(line) for line in capture_path.read_text(encoding="utf-8").splitlines()]
+    assert len(lines) == 1  # the login body is never captured
+    record = lines[0]
+    assert record["request_id"] == "req-1"
+    assert record["path"] == "/api/v1/shopee/offers/products/search"
+    assert record["status"] == 200
+    assert record["body"] == {"keyword": "fone", "limit": 20}
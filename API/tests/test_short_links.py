@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import os
 import re
 
@@ -7,6 +8,7 @@ import httpx
 import respx
 from fastapi.testclient import TestClient
 
+from app.core.short_link_store import ShortLinkStore, short_link_key
 from app.services.shopee_signing import build_shopee_signature
 
 
@@ -93,3 +95,137 @@ def test_short_link_maps_shopee_auth_error_to_502(client: TestClient, auth_heade
     assert payload["error"]["code"] == "shopee_auth_error"
     assert payload["error"]["upstream"]["code"] == 10020
 
+
+@respx.mock
+def test_short_link_reused_for_same_origin_and_sub_ids(client: TestClient, auth_headers: dict[str, str]) -> None:
+    route = respx.post("https://open-api.affiliate.shopee.com.br/graphql").mock(
+        return_value=httpx.Response(200, json={"data": {"generateShortLink": {"shortLink": "https://s.shopee.com.br/ab"}}})
+    )
+
+    first = client.post(
+        "/api/v1/shopee/short-links",
+        headers=auth_headers,
+        json={"originUrl": "https://Shopee.com.br/produto-x#top", "subIds": ["s1"]},
+    )
+    second = client.post(
+        "/api/v1/shopee/short-links",
+        headers=auth_headers,
+        json={"originUrl": "https://shopee.com.br/produto-x", "subIds": ["s1"]},
+    )
+    other_sub_ids = client.post(
+        "/api/v1/shopee/short-links",
+        headers=auth_headers,
+        json={"originUrl": "https://shopee.com.br/produto-x", "subIds": ["s2"]},
+    )
+
+    assert first.json()["meta"]["cached"] is False
+    assert second.json()["meta"]["cached"] is True
+    assert second.json()["data"]["shortLink"] == "https://s.shopee.com.br/ab"
+    assert other_sub_ids.json()["meta"]["cached"] is False
+    assert route.call_count == 2
+
+
+def test_short_link_store_persists_to_sqlite(tmp_path) -> None:
+    path = str(tmp_path / "short_links.sqlite3")
+    key = short_link_key("123456", "https://shopee.com.br/produto", ["s1"])
+
+    async def scenario() -> str | None:
+        writer = ShortLinkStore(maxsize=10, path=path)
+        await writer.set(key, "https://s.shopee.com.br/persisted")
+        writer.close()
+
+        reader = ShortLinkStore(maxsize=10, path=path)
+        try:
+            return await reader.get(key)
+        finally:
+            reader.close()
+
+    assert asyncio.run(scenario()) == "https://s.shopee.com.br/persisted"
+
+
+@respx.mock
+def test_short_link_batch_sends_one_aliased_mutation_with_per_item_errors(
+    client: TestClient,
+    auth_headers: dict[str, str],
+) -> None:
+    captured: dict[str, str] = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        captured["auth"] = request.headers["Authorization"]
+        captured["body"] = request.content.decode("utf-8")
+        return httpx.Response(
+            200,
+            json={
+                "data": {"link0": {"shortLink": "https://s.shopee.com.br/a"}, "link1": None},
+                "errors": [
+                    {
+                        "message": "error [11001]: invalid originUrl",
+                        "path": ["link1"],
+                        "extensions": {"code": 11001, "message": "invalid originUrl"},
+                    }
+                ],
+            },
+        )
+
+    route = respx.post("https://open-api.affiliate.shopee.com.br/graphql").mock(side_effect=handler)
+
+    response = client.post(
+        "/api/v1/shopee/short-links/batch",
+        headers=auth_headers,
+        json={
+            "items": [
+                {"originUrl": "https://shopee.com.br/produto-a", "subIds": ["s1"]},
+                {"originUrl": "https://shopee.com.br/produto-b"},
+                {"originUrl": "https://shopee.com.br/produto-a", "subIds": ["s1"]},
+            ]
+        },
+    )
+
+    assert response.status_code == 200, response.text
+    items = response.json()["data"]["items"]
+    assert route.call_count == 1
+    assert captured["body"].count("generateShortLink") == 2
+    assert "link0: generateShortLink" in captured["body"]
+    assert [item["success"] for item in items] == [True, False, True]
+    assert items[0]["shortLink"] == items[2]["shortLink"] == "https://s.shopee.com.br/a"
+    assert items[1]["error"]["code"] == "shopee_upstream_error"
+    assert items[1]["error"]["upstream"]["code"] == 11001
+
+    timestamp, signature = _parse_auth_header(captured["auth"])
+    expected = build_shopee_signature(
+        app_id=os.environ["SHOPEE_APP_ID"],
+        app_secret=os.environ["SHOPEE_APP_SECRET"],
+        payload_json=captured["body"],
+        timestamp=timestamp,
+    )
+    assert signature == expected.signature
+
+    again = client.post(
+        "/api/v1/shopee/short-links/batch",
+        headers=auth_headers,
+        json={"items": [{"originUrl": "https://shopee.com.br/produto-a", "subIds": ["s1"]}]},
+    )
+    assert again.json()["data"]["items"][0]["cached"] is True
+    assert again.json()["meta"]["cached"] is True
+    assert route.call_count == 1
+
+
+@respx.mock
+def test_short_link_batch_rate_limit_fails_whole_request(client: TestClient, auth_headers: dict[str, str]) -> None:
+    respx.post("https://open-api.affiliate.shopee.com.br/graphql").mock(
+        return_value=httpx.Response(
+            200,
+            json={
+                "data": None,
+                "errors": [{"message": "too many requests", "path": ["link0"], "extensions": {"code": 10030}}],
+            },
+        )
+    )
+
+    response = client.post(
+        "/api/v1/shopee/short-links/batch",
+        headers=auth_headers,
+        json={"items": [{"originUrl": "https://shopee.com.br/produto-a"}]},
+    )
+    assert response.status_code == 429
+    assert response.json()["error"]["code"] == "shopee_rate_limited"
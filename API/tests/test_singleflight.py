@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import respx
+
+from app.core.http_client import close_http_client
+from app.core.singleflight import SingleFlight, get_single_flight
+from app.schemas.shopee_offers import ProductOffersSearchRequest
+from app.services.shopee_offer_service import search_product_offers
+
+
+def test_single_flight_shares_result_and_reports_waiters() -> None:
+    flight = SingleFlight()
+    calls = 0
+
+    async def upstream() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def scenario() -> list[tuple[str, bool]]:
+        return await asyncio.gather(*(flight.run("k", upstream) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+
+    assert calls == 1
+    assert [value for value, _ in results] == ["value"] * 5
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert flight.snapshot() == {"inflight": 0, "leaders": 1, "waitersServed": 4, "maxWaiters": 4}
+
+
+def test_single_flight_propagates_leader_error_to_waiters() -> None:
+    flight = SingleFlight()
+
+    async def upstream() -> str:
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def scenario() -> list[object]:
+        return await asyncio.gather(*(flight.run("k", upstream) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.snapshot()["inflight"] == 0
+
+
+def test_single_flight_follower_takes_over_when_leader_is_cancelled() -> None:
+    flight = SingleFlight()
+    calls = 0
+
+    async def upstream() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return f"value-{calls}"
+
+    async def scenario() -> tuple[bool, tuple[str, bool]]:
+        leader = asyncio.create_task(flight.run("k", upstream))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.run("k", upstream))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        await asyncio.gather(leader, return_exceptions=True)
+        return leader.cancelled(), await follower
+
+    leader_cancelled, follower_result = asyncio.run(scenario())
+
+    assert leader_cancelled
+    assert follower_result == ("value-2", False)
+    assert calls == 2
+    assert flight.snapshot()["inflight"] == 0
+
+
+@respx.mock
+def test_concurrent_identical_searches_make_one_upstream_call() -> None:
+    async def slow_handler(_: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.02)
+        return httpx.Response(
+            200,
+            json={
+                "data": {
+                    "productOfferV2": {
+                        "nodes": [{"itemId": 1, "productName": "Demo"}],
+                        "pageInfo": {"limit": 20, "hasNextPage": False},
+                    }
+                }
+            },
+        )
+
+    route = respx.post("https://open-api.affiliate.shopee.com.br/graphql").mock(side_effect=slow_handler)
+
+    async def scenario() -> list[tuple[object, bool]]:
+        payload = ProductOffersSearchRequest(keyword="fone")
+        try:
+            return await asyncio.gather(*(search_product_offers(payload) for _ in range(4)))
+        finally:
+            await close_http_client()
+
+    results = asyncio.run(scenario())
+
+    assert route.call_count == 1
+    assert all(data.nodes[0].itemId == 1 for data, _ in results)
+    assert get_single_flight().snapshot()["waitersServed"] == 3
+
@@ -9,6 +9,24 @@ from app.core.config import Settings
 from app.core.exceptions import ApiException
 
 
+# Node fields read by the suggestion pipeline; the offers API only requests these from Shopee,
+# so `Suggestion.raw_payload` is a sparse snapshot (add a field here to keep it).
+PRODUCT_SEARCH_FIELDS = [
+    "itemId",
+    "shopId",
+    "productName",
+    "imageUrl",
+    "priceMin",
+    "priceMax",
+    "productLink",
+    "offerLink",
+    "commissionRate",
+    "ratingStar",
+    "sales",
+    "priceDiscountRate",
+]
+
+
 class ShopeeApiClient:
     def __init__(self, settings: Settings) -> None:
         self.settings = settings
@@ -122,7 +140,13 @@ class ShopeeApiClient:
         body = self._request(
             "POST",
             "/api/v1/shopee/offers/products/search",
-            json_body={"keyword": keyword, "page": page, "limit": limit, "sortType": sort_type},
+            json_body={
+                "keyword": keyword,
+                "page": page,
+                "limit": limit,
+                "sortType": sort_type,
+                "fields": PRODUCT_SEARCH_FIELDS,
+            },
         )
         nodes = body.get("data", {}).get("nodes", [])
         return nodes if isinstance(nodes, list) else []
@@ -318,7 +318,8 @@ class AutomationService:
             sales=_safe_int(node.get("sales")) if node.get("sales") is not None else None,
             score=_compute_score(node),
             status="pending",
-            raw_payload=node,
+            # Only PRODUCT_SEARCH_FIELDS are requested, so the snapshot keeps just the fields Shopee returned.
+            raw_payload={key: value for key, value in node.items() if value is not None},
         )
 
     def generate_suggestions(self, db: Session, payload: SuggestionGenerateRequest) -> GenerateSuggestionsResult:
@@ -0,0 +1,35 @@
+"""Functions run for every product node when suggestions are generated and posted."""
+
+from __future__ import annotations
+
+from app.services.automation_service import _compute_score, format_brl_price
+
+PRICES = ["39.9", "129.90", "1234,5", "1.234,56", "12999", "0.99", "2499.00", "  89,90 ", "", "sob consulta"]
+NODES = [
+    {
+        "itemId": 20000000000 + index,
+        "commissionRate": "0.08" if index % 3 else "0,12",
+        "ratingStar": "4.8",
+        "sales": 1500 + index * 37,
+        "priceDiscountRate": index % 60,
+        "priceMin": PRICES[index % len(PRICES)],
+        "productName": f"Fone de Ouvido Bluetooth TWS Modelo {index}",
+    }
+    for index in range(100)
+]
+
+
+def bench_format_brl_price(benchmark) -> None:
+    def format_all() -> list[str | None]:
+        return [format_brl_price(price) for price in PRICES]
+
+    formatted = benchmark(format_all)
+    assert formatted[3] == "1.234,56"
+
+
+def bench_compute_score_100_nodes(benchmark) -> None:
+    def score_all() -> list[float]:
+        return [_compute_score(node) for node in NODES]
+
+    scores = benchmark(score_all)
+    assert len(scores) == 100
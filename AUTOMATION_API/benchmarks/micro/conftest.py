@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import os
+import re
+import warnings
+
+import cpuinfo
+import pytest
+
+
+def _hardware_id() -> str:
+    brand = cpuinfo.get_cpu_info().get("brand_raw") or "unknown"
+    return f"{os.cpu_count()}cpu-{re.sub(r'[^A-Za-z0-9]+', '_', brand).strip('_')}"
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_configure(config: pytest.Config) -> None:
+    session = getattr(config, "_benchmarksession", None)
+    if session is None:
+        return
+    # pytest-benchmark keys baselines by OS and Python only; timings also depend on the CPU.
+    session.machine_id = session.storage.default_machine_id = f"{session.machine_id}-{_hardware_id()}"
+    session.handle_loading()
+    if not session.compare_fail or session.compared_mapping:
+        return
+    # Saving the first baseline for this machine has nothing to compare against.
+    if not (session.save or session.autosave):
+        message = f"no micro-benchmark baseline for {session.machine_id}; save one with --benchmark-save=baseline"
+        if os.environ.get("BENCHMARK_ALLOW_MISSING_BASELINE") != "1":
+            raise pytest.UsageError(f"{message} (or set BENCHMARK_ALLOW_MISSING_BASELINE=1 to run without comparing)")
+        warnings.warn(message)
+    session.compare_fail = []